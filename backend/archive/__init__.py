@@ -0,0 +1 @@
+# Cold-storage archiving module
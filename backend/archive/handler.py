@@ -0,0 +1,107 @@
+"""
+Scheduled job moving old journal and skin records to S3 (utils/archive.py).
+
+Runs as a Lambda on a schedule, or by hand:
+
+    python -m archive.handler --user sophia --horizon-days 365 --dry-run
+
+The Lambda event may carry "user" to archive a single user and
+"horizon_days" to override ARCHIVE_HORIZON_DAYS.
+"""
+import argparse
+import os
+import sys
+
+# Allow running as a script from the backend directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from boto3.dynamodb.conditions import Attr
+
+from utils.archive import ARCHIVE_HORIZON_DAYS, archive_user
+from utils.dynamo_helper import UserProfileTableObject
+from utils.logger import select_powertools_logger
+from utils.repository import GlowCycleRepository
+
+logger = select_powertools_logger("archive-lambda")
+
+# Stop starting new users when less than this is left of the invocation
+TIME_RESERVE_MS = 60_000
+
+
+def list_users(repository: GlowCycleRepository):
+    """Yields every user with a profile, from a keys-only scan"""
+    scan_kwargs = {
+        "FilterExpression": Attr("date").eq(UserProfileTableObject.SK),
+        "ProjectionExpression": "#p0",
+        "ExpressionAttributeNames": {"#p0": "user"},
+    }
+    while True:
+        response = repository.table.scan(**scan_kwargs)
+        for item in response.get("Items", []):
+            yield item["user"]
+        last_key = response.get("LastEvaluatedKey")
+        if not last_key:
+            return
+        scan_kwargs["ExclusiveStartKey"] = last_key
+
+
+def run(
+    users, horizon_days: int = ARCHIVE_HORIZON_DAYS, dry_run: bool = False, context=None
+) -> dict:
+    repository = GlowCycleRepository()
+    totals = {"users": 0, "journal": 0, "skin": 0}
+
+    for user in users or list_users(repository):
+        if (
+            context is not None
+            and context.get_remaining_time_in_millis() < TIME_RESERVE_MS
+        ):
+            logger.warning(
+                f"Stopping before {user}, out of time; the next run continues"
+            )
+            break
+        try:
+            archived = archive_user(
+                repository, user, horizon_days=horizon_days, dry_run=dry_run
+            )
+        except Exception as e:
+            logger.error(f"Archiving failed for {user}: {str(e)}")
+            continue
+        totals["users"] += 1
+        for kind, count in archived.items():
+            totals[kind] += count
+
+    logger.info(f"Archive run finished: {totals}")
+    return totals
+
+
+def lambda_handler(event, context):
+    event = event or {}
+    users = [event["user"]] if event.get("user") else None
+    return run(
+        users,
+        horizon_days=int(event.get("horizon_days", ARCHIVE_HORIZON_DAYS)),
+        context=context,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Archive old journal and skin records to S3"
+    )
+    parser.add_argument(
+        "--user", action="append", help="Archive only this user (repeatable)"
+    )
+    parser.add_argument("--horizon-days", type=int, default=ARCHIVE_HORIZON_DAYS)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    totals = run(args.user, horizon_days=args.horizon_days, dry_run=args.dry_run)
+    print(
+        f"Archived {totals['journal']} journal and {totals['skin']} skin records "
+        f"for {totals['users']} users"
+    )
+
+
+if __name__ == "__main__":
+    main()
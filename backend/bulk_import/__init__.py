@@ -0,0 +1 @@
+# Bulk history import module
@@ -0,0 +1,384 @@
+"""
+Bulk import of journal and period history.
+
+POST /import?user=<user>[&format=ndjson|csv] with the records as the
+request body, one per line (NDJSON) or per row (CSV with a header).
+Every record has a "type" of "journal" or "period" and a "date"
+(DD-MM-YYYY, as everywhere else in the API):
+
+    {"type": "journal", "date": "15-02-2025", "feeling": "happy", "energy": 7,
+     "thoughts": "Today was good", "tags": ["work"], "night": false, "time": "08:30"}
+    {"type": "period", "date": "03-02-2025", "cycle_length": 28}
+
+In CSV, tags are separated by ";". Records are validated like
+save_entry/save_period, written with BatchWriteItem, and rows that fail
+are reported individually; the rest of the import still goes through.
+
+Journal entries without a time are placed at DEFAULT_TIMES, a second
+apart for each further untimed entry of the same day and part of the
+day, skipping times already taken by the import or by existing
+entries. A timed entry at the time of an existing one replaces it, and
+its row is listed under "overwritten" in the response.
+
+An import runs inside API Gateway's 29 second integration timeout,
+writes, search postings and the STATS refresh included, so a request
+holds at most MAX_IMPORT_ROWS rows; longer histories are sent in parts.
+"""
+import base64
+import csv
+import io
+import json
+import os
+from collections import defaultdict
+from dataclasses import replace
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Tuple
+
+from journal.types import DayPeriod, FeelingType
+from utils.dynamo_helper import JournalTableObject, PeriodTableObject
+from utils.lambda_utils import handle_error_response
+from utils.logger import select_powertools_logger
+from utils.repository import GlowCycleRepository
+from utils.search_index import index_entries, is_indexed, mark_indexed
+from utils.sort_keys import legacy_period_sk, parse_api_date
+from utils.user_stats import get_stats, refresh_stats
+
+logger = select_powertools_logger("bulk-import-lambda")
+
+repository = GlowCycleRepository()
+
+MAX_IMPORT_ROWS = int(os.environ.get("MAX_IMPORT_ROWS", "2000"))
+
+# Journal entries without a time are placed at these times of day
+DEFAULT_TIMES = {
+    DayPeriod.day: (8, 0, 0),
+    DayPeriod.night: (20, 0, 0),
+}
+
+
+# -------------------------
+# Parsing
+# -------------------------
+
+def _read_body(event) -> str:
+    body = event.get("body") or ""
+    if event.get("isBase64Encoded"):
+        body = base64.b64decode(body).decode("utf-8")
+    return body
+
+
+def _detect_format(event) -> str:
+    params = event.get("queryStringParameters") or {}
+    if params.get("format"):
+        return params["format"].lower()
+    headers = {
+        name.lower(): value for name, value in (event.get("headers") or {}).items()
+    }
+    return "csv" if "csv" in headers.get("content-type", "") else "ndjson"
+
+
+def _iter_records(
+    body: str, fmt: str
+) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """Yields (row number, record, parse error) for every non-blank row"""
+    if fmt == "ndjson":
+        for line_number, line in enumerate(body.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, None, f"Invalid JSON: {e.msg}"
+                continue
+            if not isinstance(record, dict):
+                yield line_number, None, "Expected a JSON object"
+                continue
+            yield line_number, record, None
+    elif fmt == "csv":
+        reader = csv.DictReader(io.StringIO(body))
+        for record in reader:
+            if not any((value or "").strip() for value in record.values()):
+                continue
+            record = {name.strip(): value for name, value in record.items() if name}
+            yield reader.line_num, record, None
+    else:
+        raise ValueError(f"Unsupported format: {fmt}. Expected ndjson or csv")
+
+
+def _to_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ("true", "1", "yes", "evening", "night"):
+        return True
+    if text in ("false", "0", "no", "morning", "day", ""):
+        return False
+    raise ValueError(f"Invalid night value: {value}")
+
+
+def _to_optional_int(record: dict, field: str) -> Optional[int]:
+    value = record.get(field)
+    if value in (None, ""):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f"Invalid {field}: {json.dumps(value)}")
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"Invalid {field}: {value}")
+
+
+def _to_optional_text(record: dict, field: str) -> Optional[str]:
+    """A text field; CSV cells are always strings, JSON values may not be"""
+    value = record.get(field)
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f"Invalid {field}: {json.dumps(value)}. Expected a string")
+    return value
+
+
+def _parse_date(value) -> datetime:
+    try:
+        return parse_api_date(str(value))
+    except ValueError:
+        raise ValueError(f"Invalid date: {value}. Expected DD-MM-YYYY")
+
+
+def _parse_journal(user: str, record: dict) -> JournalTableObject:
+    missing_fields = [
+        field
+        for field in ("date", "feeling", "energy")
+        if record.get(field) in (None, "")
+    ]
+    if missing_fields:
+        raise ValueError(f"Missing required fields: {', '.join(missing_fields)}")
+
+    feeling = _to_optional_text(record, "feeling")
+    if feeling not in [f.value for f in FeelingType]:
+        raise ValueError(f"Invalid feeling type: {feeling}")
+
+    period = DayPeriod.from_bool(_to_bool(record.get("night", False)))
+    day = _parse_date(_to_optional_text(record, "date"))
+
+    hour, minute, second = DEFAULT_TIMES[period]
+    time = _to_optional_text(record, "time")
+    if time:
+        try:
+            parsed = datetime.strptime(
+                time, "%H:%M:%S" if time.count(":") == 2 else "%H:%M"
+            )
+        except ValueError:
+            raise ValueError(f"Invalid time: {time}. Expected HH:MM or HH:MM:SS")
+        hour, minute, second = parsed.hour, parsed.minute, parsed.second
+
+    tags = record.get("tags") or []
+    if isinstance(tags, str):
+        tags = [tag.strip() for tag in tags.split(";") if tag.strip()]
+    if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+        raise ValueError(f"Invalid tags: {json.dumps(tags)}. Expected strings")
+
+    energy = _to_optional_int(record, "energy")
+
+    return JournalTableObject(
+        user=user,
+        feeling=FeelingType(feeling),
+        energy=energy,
+        thoughts=_to_optional_text(record, "thoughts") or "",
+        tags=tags,
+        date=day.replace(hour=hour, minute=minute, second=second),
+        time=period
+    )
+
+
+def _parse_period(user: str, record: dict) -> PeriodTableObject:
+    value = record.get("date") or record.get("period_date")
+    if not value:
+        raise ValueError("Missing required fields: date")
+
+    return PeriodTableObject(
+        user=user,
+        period_date=_parse_date(value),
+        created_at=datetime.now().isoformat(),
+        user_age=_to_optional_int(record, "user_age"),
+        cycle_length=_to_optional_int(record, "cycle_length")
+    )
+
+
+# -------------------------
+# Import
+# -------------------------
+
+def _existing_journal_sks(user: str, journal_objs: List[JournalTableObject]) -> set:
+    """Sort keys of the user's entries over the days covered by the import"""
+    if not journal_objs:
+        return set()
+    days = [journal_obj.date for journal_obj in journal_objs]
+    items, _ = repository.query_items(
+        user,
+        sort_condition=repository.sort_condition(
+            JournalTableObject, min(days), max(days)
+        ),
+        attributes=["date"]
+    )
+    return {item["date"] for item in items}
+
+
+def import_history(event):
+    """
+    Validates every row, batch-writes the valid ones and returns counts
+    plus per-row errors.
+    """
+    params = event.get("queryStringParameters") or {}
+    user = params.get("user")
+    if not user:
+        raise ValueError("Missing user parameter")
+
+    fmt = _detect_format(event)
+    body = _read_body(event)
+
+    errors: List[dict] = []
+    rows_by_sk = {}  # sort key -> (row number, record type)
+    journal_objs = {}  # sort key -> entry, for the search index
+    requests = []
+    untimed = []  # (row number, entry) placed once the timed rows are known
+
+    records = enumerate(_iter_records(body, fmt), start=1)
+    for row_count, (row, record, parse_error) in records:
+        if row_count > MAX_IMPORT_ROWS:
+            raise ValueError(f"Too many rows, at most {MAX_IMPORT_ROWS} per import")
+        if parse_error:
+            errors.append({"row": row, "error": parse_error})
+            continue
+
+        record_type = str(record.get("type", "")).strip().lower()
+        try:
+            if record_type == "journal":
+                record_obj = _parse_journal(user, record)
+            elif record_type == "period":
+                record_obj = _parse_period(user, record)
+            else:
+                raise ValueError(
+                    f"Invalid type: {record.get('type')}. Expected journal or period"
+                )
+        except ValueError as e:
+            errors.append({"row": row, "error": str(e)})
+            continue
+
+        if record_type == "journal" and not record.get("time"):
+            untimed.append((row, record_obj))
+            continue
+
+        item = record_obj._to_dynamo_representation()
+        # BatchWriteItem rejects a request with the same key twice
+        if item["date"] in rows_by_sk:
+            first_row, _ = rows_by_sk[item["date"]]
+            errors.append({"row": row, "error": f"Duplicate of row {first_row}"})
+            continue
+
+        rows_by_sk[item["date"]] = (row, record_type)
+        requests.append(repository.put_request(item))
+        if record_type == "journal":
+            journal_objs[item["date"]] = record_obj
+        if record_type == "period":
+            # Drop a not-yet-migrated copy of the same date, like save_period
+            legacy_sk = legacy_period_sk(record_obj.period_date)
+            requests.append(repository.delete_request(user, legacy_sk))
+
+    existing = _existing_journal_sks(
+        user, [*journal_objs.values(), *(journal_obj for _, journal_obj in untimed)]
+    )
+
+    # (default time, part of the day) -> seconds after it given out so far
+    offsets = defaultdict(int)
+    for row, journal_obj in untimed:
+        slot = (journal_obj.date, journal_obj.time)
+        while True:
+            placed = replace(
+                journal_obj, date=journal_obj.date + timedelta(seconds=offsets[slot])
+            )
+            offsets[slot] += 1
+            sk = placed._get_sk()
+            if sk not in rows_by_sk and sk not in existing:
+                break
+        rows_by_sk[sk] = (row, "journal")
+        requests.append(repository.put_request(placed._to_dynamo_representation()))
+        journal_objs[sk] = placed
+
+    # A user without journal entries yet is fully indexed once the
+    # imported ones are; anyone else keeps searching by scan until re-indexed
+    first_entries = (
+        not is_indexed(repository, user)
+        and get_stats(repository, user).journal_count == 0
+    )
+
+    logger.info(
+        f"Importing {len(rows_by_sk)} records for user: {user} "
+        f"({len(errors)} invalid rows)"
+    )
+    failed = repository.batch_write(requests)
+
+    for request in failed:
+        if "PutRequest" in request:
+            sk = request["PutRequest"]["Item"]["date"]
+            row, _ = rows_by_sk.pop(sk)
+            errors.append(
+                {"row": row, "error": "Write was throttled, please retry this row"}
+            )
+    if failed:
+        logger.warning(f"{len(failed)} batch writes still unprocessed for user: {user}")
+
+    imported = {"journal": 0, "period": 0}
+    for _, record_type in rows_by_sk.values():
+        imported[record_type] += 1
+
+    if rows_by_sk:
+        # Imported rows bypass write_with_stats, so recompute the aggregate
+        stats = refresh_stats(repository, user)
+        written = [
+            journal_obj for sk, journal_obj in journal_objs.items() if sk in rows_by_sk
+        ]
+        try:
+            failed_postings = index_entries(repository, written)
+            if first_entries and written and not failed_postings:
+                mark_indexed(repository, user, stats.journal_count)
+        except Exception as e:
+            # The rows have been written; re-indexing the user makes them searchable
+            logger.warning(f"Could not index imported entries for {user}: {str(e)}")
+
+    errors.sort(key=lambda error: error["row"])
+    return {
+        "status": "partial" if errors else "success",
+        "user": user,
+        "imported": imported,
+        "overwritten": sorted(
+            row for sk, (row, _) in rows_by_sk.items() if sk in existing
+        ),
+        "error_count": len(errors),
+        "errors": errors
+    }
+
+
+@handle_error_response
+def lambda_handler(event, context):
+    """
+    Main Lambda handler for bulk imports.
+    Supports POST (import records).
+    """
+    try:
+        method = event.get("httpMethod", "")
+        logger.info(f"Received {method} request")
+
+        if method == "OPTIONS":
+            return {"status": "ok", "message": "CORS preflight"}
+
+        if method == "POST":
+            return import_history(event)
+
+        raise ValueError(f"Unsupported HTTP method: {method}")
+
+    except Exception as e:
+        logger.error(f"Lambda handler error: {str(e)}")
+        raise
@@ -0,0 +1,53 @@
+"""
+Export of a user's full history.
+
+POST /export?user=<user>[&format=ndjson|csv] writes every journal,
+period and skin record of the user (archived years included) to the
+export bucket and returns a presigned URL for the file, see
+utils/export.py. Journal and period rows can be fed back to /import.
+"""
+from utils.export import FORMATS, export_user
+from utils.lambda_utils import handle_error_response
+from utils.logger import select_powertools_logger
+from utils.repository import GlowCycleRepository
+
+logger = select_powertools_logger("export-lambda")
+
+repository = GlowCycleRepository()
+
+
+def create_export(event):
+    params = event.get("queryStringParameters") or {}
+    user = params.get("user")
+    if not user:
+        raise ValueError("Missing user parameter")
+
+    fmt = (params.get("format") or "ndjson").lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}. Expected ndjson or csv")
+
+    logger.info(f"Exporting {fmt} for user: {user}")
+    return {"status": "success", "user": user, **export_user(repository, user, fmt)}
+
+
+@handle_error_response
+def lambda_handler(event, context):
+    """
+    Main Lambda handler for exports.
+    Supports POST (create export).
+    """
+    try:
+        method = event.get("httpMethod", "")
+        logger.info(f"Received {method} request")
+
+        if method == "OPTIONS":
+            return {"status": "ok", "message": "CORS preflight"}
+
+        if method == "POST":
+            return create_export(event)
+
+        raise ValueError(f"Unsupported HTTP method: {method}")
+
+    except Exception as e:
+        logger.error(f"Lambda handler error: {str(e)}")
+        raise
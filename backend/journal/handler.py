@@ -2,29 +2,33 @@ from datetime import datetime
 from dataclasses import dataclass
 import json
 from typing import List
-from decimal import Decimal
-from utils.dynamo_client import get_dynamodb_client
+from utils.archive import read_archived_page
+from utils.correlations import advance_correlations
 from utils.dynamo_helper import JournalTableObject
 from utils.lambda_utils import handle_error_response
+from utils.repository import GlowCycleRepository
+from utils.insights import add_journal, summarize
+from utils.search_index import index_entries, mark_indexed, search
+from utils.user_stats import get_insights, write_with_stats
 from journal.types import FeelingType, DayPeriod
 from boto3.dynamodb.conditions import Key
 from utils.logger import select_powertools_logger
-import os
+from utils.sort_keys import LEGACY_JOURNAL_UPPER, LEGACY_READS, parse_api_date
+from utils.pagination import (
+    OLDER_PHASE,
+    decode_cursor,
+    encode_older_cursor,
+    older_position,
+    parse_limit,
+)
 
 logger = select_powertools_logger("journal-lambda")
 
-DYNAMODB_TABLE_NAME = os.environ.get("DYNAMODB_TABLE_NAME", "GlowCycleTable")
-dynamodb = get_dynamodb_client()
-journal_table = dynamodb.Table(DYNAMODB_TABLE_NAME)
+repository = GlowCycleRepository()
 
+# Attributes rendered by the journal history view
+JOURNAL_LIST_ATTRIBUTES = ["feeling", "energy", "thoughts", "tags"]
 
-# Custom JSON encoder for Decimal objects
-class DecimalEncoder(json.JSONEncoder):
-    """JSON encoder that converts Decimal to int or float"""
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return int(obj) if obj % 1 == 0 else float(obj)
-        return super(DecimalEncoder, self).default(obj)
 
 @dataclass
 class JournalEntry:
@@ -103,10 +107,26 @@ def save_entry(event):
             time=period
         )
 
-        # Convert to DynamoDB item
         item = entry_obj._to_dynamo_representation()
         logger.info(f"Saving entry for user: {item['user']}, date: {item['date']}")
-        journal_table.put_item(Item=item)
+        # Entry and STATS aggregate are written in one transaction
+        stats = write_with_stats(
+            repository,
+            entry_obj.user,
+            [repository.put_op(item)],
+            lambda stats: add_journal(stats, entry_obj)
+        )
+
+        # Search postings and the correlation series follow the committed entry
+        advance_correlations(repository, entry_obj.user, stats, journal_obj=entry_obj)
+        try:
+            failed_postings = index_entries(repository, [entry_obj])
+            if stats.journal_count == 1 and not failed_postings:
+                # First entry ever, so the whole history is now indexed
+                mark_indexed(repository, entry_obj.user, 1)
+        except Exception as e:
+            # The entry has been committed; re-indexing the user makes it searchable
+            logger.warning(f"Could not index entry for {entry_obj.user}: {str(e)}")
 
         return {
             "status": "success",
@@ -122,8 +142,36 @@ def save_entry(event):
         raise
 
 
+def legacy_entries(user: str, start, end) -> List[JournalTableObject]:
+    """Entries not yet moved under JOURNAL#, listed after the last prefixed page"""
+    if not LEGACY_READS:
+        return []
+    legacy_items, _ = repository.query_items(
+        user,
+        sort_condition=Key("date").lt(LEGACY_JOURNAL_UPPER),
+        attributes=JOURNAL_LIST_ATTRIBUTES
+    )
+    return [
+        journal_obj
+        for journal_obj in repository.to_records(JournalTableObject, legacy_items)
+        if not (start and journal_obj.date < start)
+        and not (end and journal_obj.date.date() > end.date())
+    ]
+
+
+def _older_position(journal_obj: JournalTableObject) -> tuple:
+    return journal_obj.date.isoformat(), journal_obj._get_sk()
+
+
 # get historic journal entries (GET)
 def get_entries(event):
+    """
+    Handles GET requests to retrieve journal history for a user.
+    Query parameters: user, optional from/to (DD-MM-YYYY) to bound the range,
+    optional limit/cursor to read one page at a time. Pages go through the
+    JOURNAL# entries first and then the legacy and archived ones; a cursor
+    into the latter carries phase "older" and the position of its last entry.
+    """
     try:
         params = event.get("queryStringParameters") or {}
         user = params.get("user")
@@ -132,32 +180,47 @@ def get_entries(event):
             logger.error("Missing user parameter in GET request")
             raise ValueError("Missing user parameter")
 
-        logger.info(f"Fetching entries for user: {user}")
-        response = journal_table.query(
-            KeyConditionExpression=Key("user").eq(user),
-            ScanIndexForward=False  # newest first
-        )
+        limit = parse_limit(params)
+        cursor = decode_cursor(params.get("cursor"), user)
 
-        items = response.get("Items", [])
-        logger.info(f"Found {len(items)} total items for user: {user}")
-
-        # Filter out PERIOD entries (only keep journal entries)
-        journal_items = [item for item in items if not item.get("date", "").startswith("PERIOD#")]
-        logger.info(f"Found {len(journal_items)} journal entries after filtering")
+        logger.info(f"Fetching entries for user: {user}")
+        start = parse_api_date(params["from"]) if params.get("from") else None
+        end = parse_api_date(params["to"]) if params.get("to") else None
 
-        # Convert items to entries, skipping any that fail
         entries = []
-        for item in journal_items:
-            try:
-                entry = JournalTableObject._from_dynamo_representation(item).to_dict()
-                entries.append(entry)
-            except Exception as e:
-                logger.warning(f"Skipping malformed entry: {item.get('date', 'unknown')}, error: {str(e)}")
-                continue
+        next_cursor = None
+        if not cursor or cursor.get("phase") != OLDER_PHASE:
+            items, next_cursor = repository.query_items(
+                user,
+                sort_condition=repository.sort_condition(
+                    JournalTableObject, start, end
+                ),
+                attributes=JOURNAL_LIST_ATTRIBUTES,
+                limit=limit,
+                cursor=cursor,
+                fast=True
+            )
+            # Rendered straight from the items, the page never becomes records
+            entries = repository.to_dicts(JournalTableObject, items)
+            logger.info(f"Found {len(entries)} journal entries for user: {user}")
+
+        if next_cursor is None:
+            page, position = read_archived_page(
+                repository, user, JournalTableObject, _older_position,
+                after=older_position(cursor),
+                start=start,
+                end=end,
+                limit=None if limit is None else limit - len(entries),
+                others=legacy_entries(user, start, end)
+            )
+            entries += [journal_obj.to_dict() for journal_obj in page]
+            if position is not None:
+                next_cursor = encode_older_cursor(user, position)
 
         return {
             "entries": entries,
-            "count": len(entries)
+            "count": len(entries),
+            "next_cursor": next_cursor
         }
     except ValueError as e:
         logger.error(f"Validation error: {str(e)}")
@@ -168,11 +231,95 @@ def get_entries(event):
 
 
 
+# full-text search over journal entries (GET /journal/search)
+def search_entries(event):
+    """
+    Handles GET /journal/search requests.
+    Query parameters: user, q (words and "quoted phrases", all required
+    to match), optional limit/cursor to read one page at a time
+    """
+    try:
+        params = event.get("queryStringParameters") or {}
+        user = params.get("user")
+        query = params.get("q", "")
+
+        if not user:
+            raise ValueError("Missing user parameter")
+        if not query.strip():
+            raise ValueError("Missing q parameter")
+
+        limit = parse_limit(params)
+        cursor = decode_cursor(params.get("cursor"), user)
+
+        logger.info(f"Searching entries for user: {user}")
+        journal_objs, next_cursor, total = search(
+            repository, user, query, limit=limit, cursor=cursor
+        )
+        logger.info(f"Search matched {total} journal entries for user: {user}")
+
+        entries = [journal_obj.to_dict() for journal_obj in journal_objs]
+
+        return {
+            "entries": entries,
+            "count": len(entries),
+            "total": total,
+            "next_cursor": next_cursor
+        }
+    except ValueError as e:
+        logger.error(f"Validation error: {str(e)}")
+        raise
+    except Exception as e:
+        logger.error(f"Error searching entries: {str(e)}")
+        raise
+
+
+# tag/feeling/phase co-occurrence statistics (GET /journal/insights)
+def get_insights_summary(event):
+    """
+    Handles GET /journal/insights requests.
+    Query parameters: user, optional feeling and/or phase to list the
+    tags that co-occur with them
+    """
+    try:
+        params = event.get("queryStringParameters") or {}
+        user = params.get("user")
+
+        if not user:
+            raise ValueError("Missing user parameter")
+        feeling = params.get("feeling")
+        if feeling and feeling not in [f.value for f in FeelingType]:
+            raise ValueError(f"Invalid feeling type: {feeling}")
+
+        logger.info(f"Fetching insights for user: {user}")
+        return summarize(
+            get_insights(repository, user), feeling=feeling, phase=params.get("phase")
+        )
+    except ValueError as e:
+        logger.error(f"Validation error: {str(e)}")
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching insights: {str(e)}")
+        raise
+
+
+def _route(event) -> str:
+    return (event.get("resource") or event.get("path") or "").rstrip("/")
+
+
+def is_search_request(event) -> bool:
+    return _route(event).endswith("/search")
+
+
+def is_insights_request(event) -> bool:
+    return _route(event).endswith("/insights")
+
+
 @handle_error_response
 def lambda_handler(event, context):
     """
     Main Lambda handler for journal operations.
-    Supports GET (retrieve entries) and POST (save entry) methods.
+    Supports GET (retrieve entries) and POST (save entry) methods,
+    GET /journal/search (full-text search) and GET /journal/insights.
     """
     try:
         method = event.get("httpMethod", "")
@@ -185,6 +332,12 @@ def lambda_handler(event, context):
         if method == "POST":
             return save_entry(event)
 
+        if method == "GET" and is_search_request(event):
+            return search_entries(event)
+
+        if method == "GET" and is_insights_request(event):
+            return get_insights_summary(event)
+
         if method == "GET":
             return get_entries(event)
 
@@ -3,17 +3,14 @@ Judge Setup Handler
 Manages judge account setup completion status in DynamoDB
 """
 import json
-import boto3
 import logging
-import os
+from utils.dynamo_helper import JudgeSetupTableObject
+from utils.repository import GlowCycleRepository
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Initialize DynamoDB
-dynamodb = boto3.resource('dynamodb')
-table_name = os.environ.get('DYNAMODB_TABLE_NAME', 'GlowCycleTable')
-table = dynamodb.Table(table_name)
+repository = GlowCycleRepository()
 
 
 def lambda_handler(event, context):
@@ -79,15 +76,10 @@ def check_setup(event):
         
         # Query DynamoDB
         # PK = user, SK = JUDGE_SETUP
-        response = table.get_item(
-            Key={
-                'user': username,
-                'date': 'JUDGE_SETUP'
-            }
+        judge_setup = repository.get(
+            JudgeSetupTableObject, username, attributes=['completed']
         )
-        
-        item = response.get('Item')
-        has_completed = item is not None and item.get('completed') == True
+        has_completed = judge_setup is not None and judge_setup.completed
         
         logger.info(f'Judge {username} setup completed: {has_completed}')
         
@@ -143,15 +135,12 @@ def save_setup(event):
         
         # Save to DynamoDB
         # PK = user, SK = JUDGE_SETUP
-        item = {
-            'user': username,
-            'date': 'JUDGE_SETUP',
-            'completed': True,
-            'profileData': profile_data,
-            'timestamp': profile_data.get('timestamp', '')
-        }
-        
-        table.put_item(Item=item)
+        repository.put(JudgeSetupTableObject(
+            user=username,
+            completed=True,
+            profile_data=profile_data,
+            timestamp=profile_data.get('timestamp', '')
+        ))
         
         logger.info(f'Setup saved successfully for judge: {username}')
         
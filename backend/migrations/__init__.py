@@ -0,0 +1 @@
+# Data migrations for GlowCycleTable
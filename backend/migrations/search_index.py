@@ -0,0 +1,66 @@
+"""
+Search Index Backfill
+Indexes the journal history of users whose entries predate the search
+index (utils/search_index.py), then writes their SEARCH_INDEX marker so
+searches switch from scanning the history to the index. Users already
+marked are skipped, so an interrupted run can simply be restarted.
+
+Run it after migrations/sort_keys.py, since postings point at the
+entries' current sort keys:
+
+    cd backend
+    python -m migrations.search_index
+    python -m migrations.search_index --user sophia --force
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from archive.handler import list_users
+from utils.logger import select_powertools_logger
+from utils.repository import GlowCycleRepository
+from utils.search_index import is_indexed, rebuild_index
+
+logger = select_powertools_logger("search-index-migration")
+
+
+def run(users=None, force: bool = False) -> dict:
+    repository = GlowCycleRepository()
+    totals = {"users": 0, "skipped": 0, "failed": 0, "entries": 0}
+
+    for user in users or list_users(repository):
+        if not force and is_indexed(repository, user):
+            totals["skipped"] += 1
+            continue
+        try:
+            totals["entries"] += rebuild_index(repository, user)
+            totals["users"] += 1
+        except Exception as e:
+            logger.error(f"Indexing failed for {user}: {str(e)}")
+            totals["failed"] += 1
+
+    logger.info(f"Search index backfill finished: {totals}")
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build the journal search index for existing users"
+    )
+    parser.add_argument(
+        "--user", action="append", help="Index only this user (repeatable)"
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="Re-index users that are already marked"
+    )
+    args = parser.parse_args()
+
+    totals = run(args.user, force=args.force)
+    print(f"Indexed {totals['entries']} entries for {totals['users']} users "
+          f"({totals['skipped']} already indexed, {totals['failed']} failed)")
+
+
+if __name__ == "__main__":
+    main()
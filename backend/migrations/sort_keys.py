@@ -0,0 +1,200 @@
+"""
+Sort-Key Migration
+Rewrites GlowCycleTable items from legacy sort keys to the current
+encoding in utils/sort_keys.py, while the application keeps serving.
+
+Each item is moved with a single TransactWriteItems call (put new key +
+delete old key), so readers never see an item disappear or appear twice.
+Progress is checkpointed per scan segment in the table itself, so an
+interrupted run resumes where it stopped:
+
+    cd backend
+    python -m migrations.sort_keys --table GlowCycleTable
+    python -m migrations.sort_keys --segment 0 --total-segments 4   # parallel workers
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Optional
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+from utils.dynamo_client import get_dynamodb_client
+from utils.logger import select_powertools_logger
+from utils.sort_keys import SORT_KEY_VERSION, SORT_KEY_VERSION_ATTRIBUTE, upgrade_sk
+
+logger = select_powertools_logger("sort-key-migration")
+
+CHECKPOINT_USER = "__migrations__"
+
+
+def _checkpoint_key(segment: int, total_segments: int) -> dict:
+    return {
+        "user": CHECKPOINT_USER,
+        "date": f"SORT_KEY_V{SORT_KEY_VERSION}#{segment}-of-{total_segments}"
+    }
+
+
+def load_checkpoint(table, segment: int, total_segments: int) -> dict:
+    response = table.get_item(Key=_checkpoint_key(segment, total_segments))
+    return response.get("Item", {})
+
+
+def save_checkpoint(
+    table, segment: int, total_segments: int, last_key: Optional[dict], migrated: int
+):
+    item = {
+        **_checkpoint_key(segment, total_segments),
+        "migrated": migrated,
+        "done": last_key is None,
+        "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
+    if last_key:
+        item["last_key"] = last_key
+    table.put_item(Item=item)
+
+
+def migrate_item(table, item: dict, dry_run: bool = False) -> bool:
+    """
+    Moves one item to its current-version sort key.
+    Returns True if the item was rewritten.
+    """
+    new_sk = upgrade_sk(item["date"])
+    if new_sk is None:
+        return False
+
+    if dry_run:
+        logger.info(f"[dry-run] {item['user']}: {item['date']} -> {new_sk}")
+        return True
+
+    new_item = {**item, "date": new_sk, SORT_KEY_VERSION_ATTRIBUTE: SORT_KEY_VERSION}
+    old_key = {"user": item["user"], "date": item["date"]}
+
+    try:
+        table.meta.client.transact_write_items(
+            TransactItems=[
+                {
+                    "Put": {
+                        "TableName": table.name,
+                        "Item": new_item,
+                        "ConditionExpression": "attribute_not_exists(#sk)",
+                        "ExpressionAttributeNames": {"#sk": "date"}
+                    }
+                },
+                {
+                    "Delete": {
+                        "TableName": table.name,
+                        "Key": old_key,
+                        "ConditionExpression": "attribute_exists(#sk)",
+                        "ExpressionAttributeNames": {"#sk": "date"}
+                    }
+                }
+            ]
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "TransactionCanceledException":
+            raise
+        reasons = [r.get("Code") for r in e.response.get("CancellationReasons", [])]
+        if reasons and reasons[0] == "ConditionalCheckFailed":
+            # Already written under the new key (e.g. re-saved by the app); drop
+            # the old copy
+            table.delete_item(Key=old_key)
+            return True
+        if len(reasons) > 1 and reasons[1] == "ConditionalCheckFailed":
+            # Old item was deleted by the app meanwhile; nothing left to move
+            return False
+        raise
+    return True
+
+
+def run(
+    table_name: str,
+    segment: int = 0,
+    total_segments: int = 1,
+    page_size: int = 100,
+    pause: float = 0.0,
+    dry_run: bool = False,
+) -> int:
+    """
+    Scans one segment of the table and migrates every legacy item.
+    Returns the number of items migrated in this segment (including earlier runs).
+    """
+    table = get_dynamodb_client().Table(table_name)
+
+    checkpoint = load_checkpoint(table, segment, total_segments)
+    if checkpoint.get("done"):
+        logger.info(f"Segment {segment}/{total_segments} already migrated")
+        return int(checkpoint.get("migrated", 0))
+
+    migrated = int(checkpoint.get("migrated", 0))
+    last_key = checkpoint.get("last_key")
+
+    scan_kwargs = {
+        "Limit": page_size,
+        "Segment": segment,
+        "TotalSegments": total_segments,
+        # Only items written before the current version need work
+        "FilterExpression": Attr(SORT_KEY_VERSION_ATTRIBUTE).not_exists()
+        | Attr(SORT_KEY_VERSION_ATTRIBUTE).lt(SORT_KEY_VERSION),
+    }
+
+    while True:
+        if last_key:
+            scan_kwargs["ExclusiveStartKey"] = last_key
+        response = table.scan(**scan_kwargs)
+
+        for item in response.get("Items", []):
+            if item.get("user") == CHECKPOINT_USER:
+                continue
+            if migrate_item(table, item, dry_run=dry_run):
+                migrated += 1
+
+        last_key = response.get("LastEvaluatedKey")
+        if not dry_run:
+            save_checkpoint(table, segment, total_segments, last_key, migrated)
+        logger.info(
+            f"Segment {segment}/{total_segments}: {migrated} items migrated so far"
+        )
+
+        if not last_key:
+            break
+        if pause:
+            # Leave capacity for live traffic
+            time.sleep(pause)
+
+    return migrated
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Migrate GlowCycleTable sort keys to the current encoding"
+    )
+    parser.add_argument(
+        "--table", default=os.environ.get("DYNAMODB_TABLE_NAME", "GlowCycleTable")
+    )
+    parser.add_argument("--segment", type=int, default=0)
+    parser.add_argument("--total-segments", type=int, default=1)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument(
+        "--pause", type=float, default=0.0, help="Seconds to sleep between scan pages"
+    )
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    migrated = run(
+        args.table,
+        segment=args.segment,
+        total_segments=args.total_segments,
+        page_size=args.page_size,
+        pause=args.pause,
+        dry_run=args.dry_run,
+    )
+    print(f"Migrated {migrated} items")
+
+
+if __name__ == "__main__":
+    main()
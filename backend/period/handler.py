@@ -1,43 +1,29 @@
 from datetime import datetime
 from dataclasses import dataclass
+import hashlib
 import json
 from typing import List, Optional
-import boto3
-from boto3.dynamodb.conditions import Key
-from decimal import Decimal
-import os
-
-DYNAMODB_TABLE_NAME = os.environ.get("DYNAMODB_TABLE_NAME", "GlowCycleTable")
-dynamodb = boto3.resource('dynamodb')
-period_table = dynamodb.Table(DYNAMODB_TABLE_NAME)
-
-
-# Custom JSON encoder for Decimal objects
-class DecimalEncoder(json.JSONEncoder):
-    """JSON encoder that converts Decimal to int or float"""
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return int(obj) if obj % 1 == 0 else float(obj)
-        return super(DecimalEncoder, self).default(obj)
-
-
-# Helper function to convert Decimal to int/float for JSON serialization
-def decimal_to_number(obj):
-    """Convert Decimal objects to int or float for JSON serialization"""
-    if isinstance(obj, Decimal):
-        return int(obj) if obj % 1 == 0 else float(obj)
-    return obj
-
-
-def convert_decimals(data):
-    """Recursively convert all Decimal objects in a data structure"""
-    if isinstance(data, list):
-        return [convert_decimals(item) for item in data]
-    elif isinstance(data, dict):
-        return {key: convert_decimals(value) for key, value in data.items()}
-    elif isinstance(data, Decimal):
-        return decimal_to_number(data)
-    return data
+from utils.correlations import advance_correlations
+from utils.cycle_engine import (
+    CYCLE_MODEL_VERSION,
+    get_cycle_stats,
+    load_periods,
+    project_calendar,
+)
+from utils.dynamo_helper import PeriodTableObject
+from utils.serialization import dumps
+from utils.repository import GlowCycleRepository
+from utils.sort_keys import legacy_period_sk, parse_api_date, period_sk, to_api_date
+from utils.pagination import decode_cursor, parse_limit
+from utils.user_stats import get_stats, latest_periods, write_with_stats
+
+repository = GlowCycleRepository()
+
+# Attributes rendered by the period history view
+PERIOD_LIST_ATTRIBUTES = ["period_date", "created_at", "user_age", "cycle_length"]
+
+# Longest range /period/calendar renders in one request (a year view plus margins)
+MAX_CALENDAR_DAYS = 400
 
 @dataclass
 class PeriodEntry:
@@ -83,30 +69,32 @@ def save_period(event):
         
         # Validate date format
         try:
-            date_parts = period_date.split('-')
-            if len(date_parts) != 3:
-                raise ValueError("Invalid date format")
-            datetime(int(date_parts[2]), int(date_parts[1]), int(date_parts[0]))
-        except:
+            period_datetime = parse_api_date(period_date)
+        except ValueError:
             raise ValueError("Invalid date format. Expected DD-MM-YYYY")
         
-        # Create DynamoDB item
-        # PK = user, SK = PERIOD#DD-MM-YYYY
-        item = {
-            "user": user,
-            "date": f"PERIOD#{period_date}",
-            "period_date": period_date,
-            "created_at": datetime.now().isoformat()
-        }
-        
-        # Add optional fields only if provided
-        if user_age:
-            item["user_age"] = user_age
-        if cycle_length:
-            item["cycle_length"] = cycle_length
+        # PK = user, SK = PERIOD#YYYY-MM-DD
+        period_obj = PeriodTableObject(
+            user=user,
+            period_date=period_datetime,
+            created_at=datetime.now().isoformat(),
+            user_age=user_age,
+            cycle_length=cycle_length
+        )
         
         print(f"Saving period for user: {user}, date: {period_date}")
-        period_table.put_item(Item=item)
+        # Also drop a not-yet-migrated copy of the same date so it isn't listed twice
+        stats = write_with_stats(
+            repository,
+            user,
+            [
+                repository.put_op(period_obj._to_dynamo_representation()),
+                repository.delete_op(user, legacy_period_sk(period_datetime))
+            ],
+            lambda stats: stats.add_period(period_datetime)
+        )
+        # Phases shift with the periods, so the correlation summary is recomputed
+        advance_correlations(repository, user, stats)
 
         return {
             "status": "success",
@@ -126,7 +114,9 @@ def save_period(event):
 def get_periods(event):
     """
     Handles GET requests to retrieve period history for a user.
-    Query parameter: user
+    Query parameters: user, optional from/to (DD-MM-YYYY) to bound the range,
+    optional limit/cursor to read one page at a time.
+    The first page also carries the cycle statistics and prediction.
     """
     try:
         params = event.get("queryStringParameters") or {}
@@ -136,52 +126,38 @@ def get_periods(event):
             print("Missing user parameter in GET request")
             raise ValueError("Missing user parameter")
 
+        limit = parse_limit(params)
+        cursor = decode_cursor(params.get("cursor"), user)
+
         print(f"Fetching periods for user: {user}")
         
-        # Query all items for user that start with PERIOD#
-        response = period_table.query(
-            KeyConditionExpression=Key("user").eq(user) & Key("date").begins_with("PERIOD#"),
-            ScanIndexForward=False  # newest first
+        # Query PERIOD# items for user, bounded by the requested date range
+        start = parse_api_date(params["from"]) if params.get("from") else None
+        end = parse_api_date(params["to"]) if params.get("to") else None
+
+        period_objs, next_cursor = repository.query(
+            PeriodTableObject,
+            user,
+            start=start,
+            end=end,
+            attributes=PERIOD_LIST_ATTRIBUTES,
+            limit=limit,
+            cursor=cursor,
+            fast=True
         )
+        print(f"Found {len(period_objs)} period entries for user: {user}")
 
-        items = response.get("Items", [])
-        print(f"Found {len(items)} period entries for user: {user}")
-
-        # Format the response, skipping any malformed entries
-        periods = []
-        for item in items:
-            try:
-                # Ensure period_date exists
-                if "period_date" not in item:
-                    print(f"Skipping entry without period_date: {item.get('date', 'unknown')}")
-                    continue
-                
-                # Convert all Decimals in the item
-                item = convert_decimals(item)
-                
-                period_data = {
-                    "period_date": item.get("period_date"),
-                    "created_at": item.get("created_at", "")
-                }
-                
-                # Add optional fields only if they exist
-                if "user_age" in item and item.get("user_age") is not None:
-                    period_data["user_age"] = item.get("user_age")
-                
-                if "cycle_length" in item and item.get("cycle_length") is not None:
-                    period_data["cycle_length"] = item.get("cycle_length")
-                
-                periods.append(period_data)
-            except Exception as e:
-                print(f"Skipping malformed period entry: {item.get('date', 'unknown')}, error: {str(e)}")
-                import traceback
-                traceback.print_exc()
-                continue
+        periods = [period_obj.to_dict() for period_obj in period_objs]
 
-        return {
+        result = {
             "periods": periods,
-            "count": len(periods)
+            "count": len(periods),
+            "next_cursor": next_cursor
         }
+        if cursor is None:
+            cycle_stats = get_cycle_stats(repository, user, get_stats(repository, user))
+            result["cycle"] = cycle_stats.predict()
+        return result
     except ValueError as e:
         print(f"Validation error: {str(e)}")
         raise
@@ -190,6 +166,74 @@ def get_periods(event):
         raise
 
 
+# Calendar projection (GET /period/calendar)
+def calendar_etag(
+    user: str, start: datetime, end: datetime, period_version: int
+) -> str:
+    """
+    Every period write bumps the STATS period_version, so the version
+    together with the range identifies the calendar without reading the
+    periods. Today's date is part of the key because the "cycle"
+    prediction (cycle day, days until the next period) moves daily.
+    """
+    today = datetime.now().date()
+    key = (
+        f"{user}:{start.date()}:{end.date()}:{today}:"
+        f"{period_version}:{CYCLE_MODEL_VERSION}"
+    )
+    return '"' + hashlib.sha256(key.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def get_calendar(event):
+    """
+    Handles GET /period/calendar requests.
+    Query parameters: user, from and to (DD-MM-YYYY, inclusive)
+    Returns (etag, result); result is None when the client's
+    If-None-Match already matches.
+    """
+    params = event.get("queryStringParameters") or {}
+    user = params.get("user")
+    if not user:
+        raise ValueError("Missing user parameter")
+    if not params.get("from") or not params.get("to"):
+        raise ValueError("Missing from or to parameter")
+
+    start = parse_api_date(params["from"])
+    end = parse_api_date(params["to"])
+    if end < start:
+        raise ValueError("to must not be before from")
+    if (end - start).days + 1 > MAX_CALENDAR_DAYS:
+        raise ValueError(f"Calendar range is limited to {MAX_CALENDAR_DAYS} days")
+
+    stats = get_stats(repository, user)
+    etag = calendar_etag(user, start, end, stats.period_version)
+    headers = {
+        name.lower(): value for name, value in (event.get("headers") or {}).items()
+    }
+    if etag in [tag.strip() for tag in headers.get("if-none-match", "").split(",")]:
+        print(f"Calendar for user: {user} not modified")
+        return etag, None
+
+    period_objs = load_periods(repository, user)
+    cycle_stats = get_cycle_stats(repository, user, stats, period_objs)
+    days = project_calendar(
+        (period_obj.period_date for period_obj in period_objs), cycle_stats, start, end
+    )
+    print(f"Projected {len(days)} calendar days for user: {user}")
+
+    return etag, {
+        "from": to_api_date(start),
+        "to": to_api_date(end),
+        "cycle": cycle_stats.predict(),
+        "days": days
+    }
+
+
+def is_calendar_request(event) -> bool:
+    path = event.get("resource") or event.get("path") or ""
+    return path.rstrip("/").endswith("/calendar")
+
+
 # Delete period entry (DELETE)
 def delete_period(event):
     """
@@ -211,12 +255,20 @@ def delete_period(event):
         
         print(f"Deleting period for user: {user}, date: {period_date}")
         
-        period_table.delete_item(
-            Key={
-                "user": user,
-                "date": f"PERIOD#{period_date}"
-            }
+        period_datetime = parse_api_date(period_date)
+        remaining = latest_periods(repository, user, excluding=period_datetime)
+        # Remove both encodings in case the item has not been migrated yet
+        stats = write_with_stats(
+            repository,
+            user,
+            [
+                repository.delete_op(user, period_sk(period_datetime)),
+                repository.delete_op(user, legacy_period_sk(period_datetime))
+            ],
+            lambda stats: stats.set_periods(remaining)
         )
+        # Phases shift with the periods, so the correlation summary is recomputed
+        advance_correlations(repository, user, stats)
         
         return {
             "status": "success",
@@ -233,7 +285,8 @@ def delete_period(event):
 def lambda_handler(event, context):
     """
     Main Lambda handler for period operations.
-    Supports GET (retrieve periods), POST (save period), and DELETE (remove period) methods.
+    Supports GET (retrieve periods), POST (save period), and DELETE (remove period)
+    methods, and GET /period/calendar (daily cycle projection).
     """
     try:
         method = event.get("httpMethod", "")
@@ -246,13 +299,26 @@ def lambda_handler(event, context):
                 "headers": {
                     "Access-Control-Allow-Origin": "*",
                     "Access-Control-Allow-Methods": "GET,POST,DELETE,OPTIONS",
-                    "Access-Control-Allow-Headers": "Content-Type"
+                    "Access-Control-Allow-Headers": "Content-Type,If-None-Match"
                 },
-                "body": json.dumps({"status": "ok", "message": "CORS preflight"}, cls=DecimalEncoder)
+                "body": dumps({"status": "ok", "message": "CORS preflight"})
             }
 
         result = None
-        if method == "POST":
+        if method == "GET" and is_calendar_request(event):
+            etag, result = get_calendar(event)
+            headers = {
+                "Access-Control-Allow-Origin": "*",
+                "Access-Control-Allow-Methods": "GET,POST,DELETE,OPTIONS",
+                "Access-Control-Allow-Headers": "Content-Type,If-None-Match",
+                "Access-Control-Expose-Headers": "ETag",
+                "ETag": etag,
+                "Cache-Control": "private, no-cache"
+            }
+            if result is None:
+                return {"statusCode": 304, "headers": headers, "body": ""}
+            return {"statusCode": 200, "headers": headers, "body": dumps(result)}
+        elif method == "POST":
             result = save_period(event)
         elif method == "GET":
             result = get_periods(event)
@@ -269,7 +335,7 @@ def lambda_handler(event, context):
                 "Access-Control-Allow-Methods": "GET,POST,DELETE,OPTIONS",
                 "Access-Control-Allow-Headers": "Content-Type"
             },
-            "body": json.dumps(result, cls=DecimalEncoder)
+            "body": dumps(result)
         }
     
     except ValueError as e:
@@ -280,7 +346,7 @@ def lambda_handler(event, context):
                 "Access-Control-Allow-Origin": "*",
                 "Access-Control-Allow-Headers": "Content-Type"
             },
-            "body": json.dumps({"error": str(e)}, cls=DecimalEncoder)
+            "body": dumps({"error": str(e)})
         }
     except Exception as e:
         print(f"Lambda handler error: {str(e)}")
@@ -292,5 +358,5 @@ def lambda_handler(event, context):
                 "Access-Control-Allow-Origin": "*",
                 "Access-Control-Allow-Headers": "Content-Type"
             },
-            "body": json.dumps({"error": "Internal server error", "details": str(e)}, cls=DecimalEncoder)
+            "body": dumps({"error": "Internal server error", "details": str(e)})
         }
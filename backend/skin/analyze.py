@@ -1,69 +1,170 @@
 import json
 import os
 import base64
-import boto3
-
-s3 = boto3.client("s3")
-rekognition = boto3.client("rekognition")
-bedrock = boto3.client("bedrock-runtime")
+import time
+from utils.analysis_cache import (
+    context_fingerprint,
+    get_local,
+    get_stored,
+    put_local,
+    put_stored,
+    result_digest,
+)
+from utils.aws_clients import get_client
+from utils.image_processing import (
+    TOO_BLURRY,
+    TOO_DARK,
+    TOO_SMALL,
+    fetch_analysis_source,
+    prepare_analysis_image,
+    prescreen,
+    store_thumbnail,
+)
 
 BUCKET = os.environ["BUCKET_NAME"]
 MODEL_ID = os.environ["BEDROCK_MODEL_ID"]
 
+NO_FACE_MESSAGE = (
+    "No face detected. Please retake the photo in good lighting, facing the camera."
+)
+NOT_CLEAR_MESSAGE = (
+    "Face is not clear enough. Please retake the photo with your face centered "
+    "in the oval."
+)
+TOO_DARK_MESSAGE = "Photo is too dark. Please move to brighter lighting and try again."
+TOO_BLURRY_MESSAGE = "Photo is too blurry. Hold still and retake the photo."
+
+# Parts of the Rekognition face kept in the result cache
+CACHED_FACE_FIELDS = ("BoundingBox", "Landmarks", "Confidence", "Quality")
+
+PRESCREEN_MESSAGES = {
+    TOO_SMALL: NOT_CLEAR_MESSAGE,
+    TOO_DARK: TOO_DARK_MESSAGE,
+    TOO_BLURRY: TOO_BLURRY_MESSAGE,
+}
+
 def lambda_handler(event, context):
     try:
         body = json.loads(event.get("body") or "{}")
-        s3_key = body["s3Key"]
-
-        # -------------------------
-        # 1) Rekognition face check
-        # -------------------------
-        face_resp = rekognition.detect_faces(
-            Image={"S3Object": {"Bucket": BUCKET, "Name": s3_key}},
-            Attributes=["ALL"]
-        )
-
-        faces = face_resp.get("FaceDetails", [])
-        if not faces:
-            return _error(400, "No face detected. Please retake the photo in good lighting, facing the camera.")
-
-        face = sorted(faces, key=lambda f: f.get("Confidence", 0), reverse=True)[0]
-
-        conf = face.get("Confidence", 0)
-        quality = face.get("Quality", {})
-        brightness = quality.get("Brightness", 0)
-        sharpness = quality.get("Sharpness", 0)
-
-        if conf < 90:
-            return _error(400, "Face is not clear enough. Please retake the photo with your face centered in the oval.")
-        if brightness < 35:
-            return _error(400, "Photo is too dark. Please move to brighter lighting and try again.")
-        if sharpness < 35:
-            return _error(400, "Photo is too blurry. Hold still and retake the photo.")
-
-        # -------------------------
-        # 2) Get image bytes from S3
-        # -------------------------
-        obj = s3.get_object(Bucket=BUCKET, Key=s3_key)
-        image_bytes = obj["Body"].read()
-        image_b64 = base64.b64encode(image_bytes).decode("utf-8")
-
-        # -------------------------
-        # 3) Bedrock Claude analysis
-        # -------------------------
-        user_context = {
-            "timeOfDay": body.get("timeOfDay"),
-            "cyclePhase": body.get("cyclePhase"),
-            "skinGoals": body.get("skinGoals", []),
-            "rekognition": {
-                "confidence": conf,
-                "brightness": brightness,
-                "sharpness": sharpness,
-                "pose": face.get("Pose", {}),
-            }
+        return analyze(body)
+
+    except Exception as e:
+        import traceback
+        print("UNHANDLED EXCEPTION:", str(e))
+        print(traceback.format_exc())
+        return {
+            "statusCode": 500,
+            "headers": {
+                "Content-Type": "application/json",
+                "Access-Control-Allow-Origin": "*",
+            },
+            "body": json.dumps({"error": str(e)}),
+        }
+
+
+def analyze(body):
+    """
+    Analyses the uploaded selfie body["s3Key"] with the prompt context of
+    body (timeOfDay, cyclePhase, skinGoals). Returns the API response:
+    200 with the analysis, or 400 if the photo can't be used. Shared by
+    the synchronous route and the S3-triggered worker (skin/worker.py).
+    """
+    s3_key = body["s3Key"]
+
+    # -------------------------
+    # 0) Result cache: container LRU, then DynamoDB by image ETag. A hit
+    #    is answered before any image is downloaded or written
+    # -------------------------
+    fingerprint = context_fingerprint(body)
+    cached = get_local(s3_key, fingerprint)
+    if cached is not None:
+        print(f"Analysis cache hit (container) for {s3_key}")
+        return _result(cached)
+
+    etag = get_client("s3").head_object(Bucket=BUCKET, Key=s3_key)["ETag"]
+    digest = result_digest(etag, fingerprint, MODEL_ID)
+    cached = get_stored(digest)
+    if cached is not None:
+        print(f"Analysis cache hit (table) for {s3_key}")
+        # The entry may come from someone else's upload of the same photo;
+        # its thumbnail shows the same image, so it is reused as it is
+        result = _upload_result(s3_key, cached, cached.get("thumbnail_key"))
+        put_local(s3_key, fingerprint, result)
+        return _result(result)
+
+    timings = {}
+    started = time.perf_counter()
+    source = fetch_analysis_source(BUCKET, s3_key)
+    timings["s3_fetch"] = _elapsed_ms(started)
+
+    # -------------------------
+    # 1) Local pre-screen of the original (a cached normalised image passed already)
+    # -------------------------
+    image_bytes, is_normalised = source
+    if not is_normalised:
+        started = time.perf_counter()
+        rejection, metrics = prescreen(image_bytes)
+        timings["prescreen"] = _elapsed_ms(started)
+        if rejection:
+            print(f"Pre-screen rejected {s3_key} ({rejection}): {json.dumps(metrics)}")
+            return _error(400, PRESCREEN_MESSAGES[rejection])
+
+    # -------------------------
+    # 2) Rekognition face check, only for photos that passed the pre-screen.
+    #    DEFAULT returns exactly the attributes used below (BoundingBox,
+    #    Confidence, Pose, Quality, Landmarks).
+    # -------------------------
+    started = time.perf_counter()
+    face_resp = get_client("rekognition").detect_faces(
+        Image={"S3Object": {"Bucket": BUCKET, "Name": s3_key}},
+        Attributes=["DEFAULT"]
+    )
+    timings["rekognition"] = _elapsed_ms(started)
+
+    faces = face_resp.get("FaceDetails", [])
+    if not faces:
+        return _error(400, NO_FACE_MESSAGE)
+
+    face = sorted(faces, key=lambda f: f.get("Confidence", 0), reverse=True)[0]
+
+    conf = face.get("Confidence", 0)
+    quality = face.get("Quality", {})
+    brightness = quality.get("Brightness", 0)
+    sharpness = quality.get("Sharpness", 0)
+
+    if conf < 90:
+        return _error(400, NOT_CLEAR_MESSAGE)
+    if brightness < 35:
+        return _error(400, TOO_DARK_MESSAGE)
+    if sharpness < 35:
+        return _error(400, TOO_BLURRY_MESSAGE)
+
+    # -------------------------
+    # 3) Normalised image (upright, face crop, max edge), cached in S3
+    # -------------------------
+    started = time.perf_counter()
+    image_bytes = prepare_analysis_image(
+        BUCKET, s3_key, source, face.get("BoundingBox")
+    )
+    timings["normalise"] = _elapsed_ms(started)
+    image_b64 = base64.b64encode(image_bytes).decode("utf-8")
+
+    # -------------------------
+    # 4) Bedrock Claude analysis
+    # -------------------------
+    user_context = {
+        "timeOfDay": body.get("timeOfDay"),
+        "cyclePhase": body.get("cyclePhase"),
+        "skinGoals": body.get("skinGoals", []),
+        "rekognition": {
+            "confidence": conf,
+            "brightness": brightness,
+            "sharpness": sharpness,
+            "pose": face.get("Pose", {}),
         }
+    }
 
-        system_prompt = """You are GlowCycle's experienced skincare analysis assistant.
+    system_prompt = """You are GlowCycle's experienced skincare analysis assistant.
 Rules:
 - Do NOT diagnose medical conditions.
 - Do NOT mention diseases.
@@ -76,7 +177,7 @@ Rules:
 - Use appropriate emoticons at the start of each recommendation to make it look fun.
 - """
 
-        schema = """{
+    schema = """{
             "summary": "...",
             "concerns_detected": ["concern_detected1","concern_detected2"],
             "metrics": {
@@ -95,7 +196,7 @@ Rules:
             "disclaimer": "..."
         }"""
 
-        user_prompt = f"""Analyse the face image and provide skincare recommendations.
+    user_prompt = f"""Analyse the face image and provide skincare recommendations.
         Use the user context and Rekognition quality info to adjust suggestions.
 
 User context:
@@ -104,75 +205,101 @@ User context:
 Return JSON in this exact schema (numbers should be 0-100):
 {schema}"""
 
-        req = {
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 2000,
-            "system": system_prompt,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": user_prompt},
-                        {
-                            "type": "image",
-                            "source": {
-                                "type": "base64",
-                                "media_type": "image/jpeg",
-                                "data": image_b64
-                            }
+    req = {
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": 2000,
+        "system": system_prompt,
+        "messages": [
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": user_prompt},
+                    {
+                        "type": "image",
+                        "source": {
+                            "type": "base64",
+                            "media_type": "image/jpeg",
+                            "data": image_b64
                         }
-                    ],
-                }
-            ],
-        }
+                    }
+                ],
+            }
+        ],
+    }
+
+    started = time.perf_counter()
+    resp = get_client("bedrock-runtime").invoke_model(
+        modelId=MODEL_ID,
+        contentType="application/json",
+        accept="application/json",
+        body=json.dumps(req),
+    )
+    timings["bedrock"] = _elapsed_ms(started)
+    print("Stage timings (ms):", json.dumps(timings))
+
+    raw = json.loads(resp["body"].read())
+    print("Bedrock raw response:", json.dumps(raw))  # for debugging
+
+    text = raw["content"][0]["text"].strip()
+    print("Claude text output:", text)  # for debugging
+    
+
+    # Strip markdown code fences if Claude added them despite instructions
+    if text.startswith("```"):
+        text = text.split("```")[1]
+        if text.startswith("json"):
+            text = text[4:]
+        text = text.strip()
+
+    # Only what depends on the photo's content is shared through the table
+    cacheable = {
+        "analysis": json.loads(text),
+        "face": {name: face[name] for name in CACHED_FACE_FIELDS if name in face},
+    }
 
-        resp = bedrock.invoke_model(
-            modelId=MODEL_ID,
-            contentType="application/json",
-            accept="application/json",
-            body=json.dumps(req),
-        )
-
-        raw = json.loads(resp["body"].read())
-        print("Bedrock raw response:", json.dumps(raw))  # for debugging
-
-        text = raw["content"][0]["text"].strip()
-        print("Claude text output:", text)  # for debugging
-        
-
-        # Strip markdown code fences if Claude added them despite instructions
-        if text.startswith("```"):
-            text = text.split("```")[1]
-            if text.startswith("json"):
-                text = text[4:]
-            text = text.strip()
-
-        result = json.loads(text)
-        result["face_data"] = {
+    # History thumbnail, written only once the analysis succeeded (a failed
+    # one would leave it orphaned). Later hits on the entry reuse it
+    thumbnail_key = store_thumbnail(BUCKET, s3_key, image_bytes)
+    put_stored(digest, {**cacheable, "thumbnail_key": thumbnail_key})
+    result = _upload_result(s3_key, cacheable, thumbnail_key)
+    put_local(s3_key, fingerprint, result)
+
+    return _result(result)
+
+
+def _upload_result(s3_key, cacheable, thumbnail_key):
+    """The response for this upload: the cached analysis and face plus its keys"""
+    face = cacheable["face"]
+    quality = face.get("Quality", {})
+    return {
+        **cacheable["analysis"],
+        "face_data": {
             "landmarks": face.get("Landmarks", []),
             "bounding_box": face.get("BoundingBox", {}),
-            }
-        result["image_quality"] = {
-            "brightness": brightness,
-            "sharpness": sharpness,
-            "face_confidence": conf
-        }
+        },
+        "image_quality": {
+            "brightness": quality.get("Brightness", 0),
+            "sharpness": quality.get("Sharpness", 0),
+            "face_confidence": face.get("Confidence", 0)
+        },
+        "thumbnail_key": thumbnail_key,
+        "s3ImageKey": s3_key,
+    }
 
-        return {
-            "statusCode": 200,
-            "headers": {"Content-Type": "application/json", "Access-Control-Allow-Origin": "*"},
-            "body": json.dumps(result),
-        }
 
-    except Exception as e:
-        import traceback
-        print("UNHANDLED EXCEPTION:", str(e))
-        print(traceback.format_exc())
-        return {
-            "statusCode": 500,
-            "headers": {"Content-Type": "application/json", "Access-Control-Allow-Origin": "*"},
-            "body": json.dumps({"error": str(e)}),
-        }
+def _elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def _result(result):
+    return {
+        "statusCode": 200,
+        "headers": {
+            "Content-Type": "application/json",
+            "Access-Control-Allow-Origin": "*",
+        },
+        "body": json.dumps(result),
+    }
 
 
 def _error(code, message):
@@ -1,4 +1,3 @@
-import boto3
 import base64
 import os
 import json
@@ -11,8 +10,6 @@ from utils.s3_helper import S3, S3Location
 
 logger = select_powertools_logger(service_name="skin")
 
-
-rekognition = boto3.client("rekognition")
 s3_helper = S3()
 BUCKET_NAME = "glowcycle-assets"
 
@@ -1,26 +1,57 @@
 import json
-import boto3
 import logging
-import decimal
+import os
 from datetime import datetime
 from typing import Optional
+from botocore.exceptions import ClientError
+from utils.archive import get_archived, read_archived_page
+from utils.correlations import advance_correlations
+from utils.dynamo_helper import SkinAnalysisTableObject
+from utils.serialization import dumps, to_dynamo
+from utils.repository import GlowCycleRepository
+from utils.s3_helper import S3
+from utils.sort_keys import SKIN_PREFIX, parse_api_date
+from utils.pagination import (
+    OLDER_PHASE,
+    decode_cursor,
+    encode_older_cursor,
+    older_position,
+    parse_limit,
+)
+from utils.user_stats import write_with_stats
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-dynamodb = boto3.resource("dynamodb")
-skin_table = dynamodb.Table("GlowCycleTable")
+repository = GlowCycleRepository()
+s3_helper = S3()
+
+# Selfie bucket; thumbnail URLs are left out where it isn't configured
+ASSETS_BUCKET = os.environ.get("BUCKET_NAME")
+THUMBNAIL_URL_EXPIRY = 3600  # seconds
+
+# Attributes rendered by the history list; face_data landmarks are only
+# needed when a single analysis is opened (GET with ?date=<sk>)
+HISTORY_LIST_ATTRIBUTES = [
+    "created_at",
+    "summary",
+    "overall_skin_health",
+    "metrics",
+    "concerns_detected",
+    "am_routine",
+    "pm_routine",
+    "tips",
+    "cycle_day",
+    "cycle_phase",
+    "disclaimer",
+    "s3_image_key",
+    "thumbnail_key",
+]
 
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, decimal.Decimal):
-            return int(obj) if obj % 1 == 0 else float(obj)
-        return super().default(obj)
-    
 def save_skin_analysis(event):
     """
     POST - Save skin analysis result to DynamoDB.
-    PK = user, SK = SKIN#DD-MM-YYYY#HH-MM-SS
+    PK = user, SK = SKIN#YYYY-MM-DDTHH:MM:SS
     """
     try:
         body = json.loads(event.get("body", "{}"))
@@ -31,52 +62,18 @@ def save_skin_analysis(event):
             raise ValueError(f"Missing required fields: {', '.join(missing_fields)}")
 
         user = body["user"]
-        analysis = body["analysis"]
-        now = datetime.now()
-        date_str = now.strftime("%d-%m-%Y")
-        time_str = now.strftime("%H-%M-%S")
-        sk = f"SKIN#{date_str}#{time_str}"
-
-        # Convert float values to Decimal for DynamoDB
-        def convert_floats(obj):
-            if isinstance(obj, float):
-                return decimal.Decimal(str(obj))
-            elif isinstance(obj, dict):
-                return {k: convert_floats(v) for k, v in obj.items()}
-            elif isinstance(obj, list):
-                return [convert_floats(item) for item in obj]
-            return obj
-
-        item = {
-            "user": user,
-            "date": sk,
-            "created_at": now.isoformat(),
-            "summary": analysis.get("summary", ""),
-            "overall_skin_health": convert_floats(analysis.get("overall_skin_health")),
-            "metrics": convert_floats(analysis.get("metrics", {})),
-            "concerns_detected": analysis.get("concerns_detected", []),
-            "am_routine": analysis.get("am_routine", []),
-            "pm_routine": analysis.get("pm_routine", []),
-            "tips": analysis.get("tips", []),
-            "cycle_day": convert_floats(analysis.get("cycleDay")),    
-            "cycle_phase": analysis.get("cyclePhase"),
-            "face_data": convert_floats(analysis.get("face_data")),
-            "disclaimer": analysis.get("disclaimer", "This analysis is for informational purposes only."),
-            "s3_image_key": analysis.get("s3ImageKey")  # Store S3 key for loading image from history
-        }
-
-        logger.info(f"Saving skin analysis for user: {user}, sk: {sk}")
-        skin_table.put_item(Item=item)
+        skin_obj = store_analysis(user, body["analysis"])
+        sk = skin_obj._get_sk()
 
         return {
             "statusCode": 200,
             "headers": {"Content-Type": "application/json", "Access-Control-Allow-Origin": "*"},
-            "body": json.dumps({
+            "body": dumps({
                 "status": "success",
                 "user": user,
                 "date": sk,
                 "message": "Skin analysis saved successfully"
-            },cls=DecimalEncoder)
+            })
         }
 
     except ValueError as e:
@@ -87,34 +84,179 @@ def save_skin_analysis(event):
         raise
 
 
+def store_analysis(
+    user: str, analysis: dict, created_at: Optional[datetime] = None
+) -> SkinAnalysisTableObject:
+    """
+    Writes an analysis as the user's SKIN# record and updates STATS and
+    the correlations. Used by POST and by the S3-triggered worker
+    (skin/worker.py), which passes the created_at it reserved for the
+    job: the record is then only written if that key is still free, so
+    a retried job never saves its analysis twice.
+    """
+    now = created_at or datetime.now()
+
+    # Floats become Decimal for DynamoDB in the same pass
+    skin_obj = SkinAnalysisTableObject(user=user, created_at=now, attributes=to_dynamo({
+        "summary": analysis.get("summary", ""),
+        "overall_skin_health": analysis.get("overall_skin_health"),
+        "metrics": analysis.get("metrics", {}),
+        "concerns_detected": analysis.get("concerns_detected", []),
+        "am_routine": analysis.get("am_routine", []),
+        "pm_routine": analysis.get("pm_routine", []),
+        "tips": analysis.get("tips", []),
+        "cycle_day": analysis.get("cycleDay"),
+        "cycle_phase": analysis.get("cyclePhase"),
+        "face_data": analysis.get("face_data"),
+        "disclaimer": analysis.get(
+            "disclaimer", "This analysis is for informational purposes only."
+        ),
+        # Store S3 key for loading image from history
+        "s3_image_key": analysis.get("s3ImageKey"),
+        "thumbnail_key": analysis.get("thumbnail_key")
+    }))
+
+    logger.info(f"Saving skin analysis for user: {user}, sk: {skin_obj._get_sk()}")
+    if created_at is None:
+        put_op = repository.put_op(skin_obj._to_dynamo_representation())
+    else:
+        put_op = repository.put_op(
+            skin_obj._to_dynamo_representation(),
+            condition="attribute_not_exists(#sk)",
+            names={"#sk": "date"}
+        )
+    try:
+        stats = write_with_stats(
+            repository,
+            user,
+            [put_op],
+            lambda stats: stats.set_latest_skin(skin_obj)
+        )
+    except ClientError as e:
+        reasons = e.response.get("CancellationReasons") or [{}]
+        if created_at is None or reasons[0].get("Code") != "ConditionalCheckFailed":
+            raise
+        logger.info(
+            f"Skin analysis {skin_obj._get_sk()} for user: {user} was already saved"
+        )
+        return skin_obj
+    advance_correlations(repository, user, stats, skin_obj=skin_obj)
+    return skin_obj
+
+
+def with_thumbnail_urls(analyses: list) -> list:
+    """
+    Adds thumbnail_url (presigned, memoized until near expiry) to each
+    analysis, None for analyses saved without a thumbnail
+    """
+    keys = [
+        analysis["thumbnail_key"]
+        for analysis in analyses
+        if analysis.get("thumbnail_key")
+    ]
+    urls = {}
+    if keys and ASSETS_BUCKET:
+        urls = s3_helper.get_presigned_urls(
+            ASSETS_BUCKET, keys, expires_in=THUMBNAIL_URL_EXPIRY
+        )
+    for analysis in analyses:
+        analysis["thumbnail_url"] = urls.get(analysis.get("thumbnail_key"))
+    return analyses
+
+
+def _history_position(skin_obj: SkinAnalysisTableObject) -> tuple:
+    return skin_obj.created_at.isoformat(), skin_obj._get_sk()
+
+
 def get_skin_analyses(event):
     """
     GET - Retrieve skin analysis history for a user.
+    Optional from/to (DD-MM-YYYY) query parameters bound the date range,
+    optional limit/cursor read one page at a time. Analyses archived to
+    S3 are paged after the table's, behind an "older" cursor.
+    With ?date=<sk> returns that single analysis including face_data.
     """
     try:
-        from boto3.dynamodb.conditions import Key
-
         params = event.get("queryStringParameters") or {}
         user = params.get("user")
 
         if not user:
             raise ValueError("Missing user parameter")
 
+        limit = parse_limit(params)
+        cursor = decode_cursor(params.get("cursor"), user)
+
+        sk = params.get("date")
+        if sk:
+            if not sk.startswith(SKIN_PREFIX):
+                raise ValueError(f"Invalid skin analysis key: {sk}")
+            logger.info(f"Fetching skin analysis {sk} for user: {user}")
+            skin_obj = repository.get(SkinAnalysisTableObject, user, sk)
+            if skin_obj is None:
+                skin_obj = get_archived(repository, user, SkinAnalysisTableObject, sk)
+            if skin_obj is None:
+                return {
+                    "statusCode": 404,
+                    "headers": {
+                        "Content-Type": "application/json",
+                        "Access-Control-Allow-Origin": "*",
+                    },
+                    "body": dumps({"error": "Skin analysis not found"}),
+                }
+            analysis = with_thumbnail_urls([skin_obj.to_dict()])[0]
+            return {
+                "statusCode": 200,
+                "headers": {
+                    "Content-Type": "application/json",
+                    "Access-Control-Allow-Origin": "*",
+                },
+                "body": dumps({"analysis": analysis}),
+            }
+
         logger.info(f"Fetching skin analyses for user: {user}")
-        response = skin_table.query(
-            KeyConditionExpression=Key("user").eq(user) & Key("date").begins_with("SKIN#"),
-            ScanIndexForward=False  # newest first
-        )
+        start = parse_api_date(params["from"]) if params.get("from") else None
+        end = parse_api_date(params["to"]) if params.get("to") else None
 
-        items = response.get("Items", [])
-        logger.info(f"Found {len(items)} skin analyses for user: {user}")
+        skin_objs, next_cursor = [], None
+        if not cursor or cursor.get("phase") != OLDER_PHASE:
+            skin_objs, next_cursor = repository.query(
+                SkinAnalysisTableObject,
+                user,
+                start=start,
+                end=end,
+                attributes=HISTORY_LIST_ATTRIBUTES,
+                limit=limit,
+                cursor=cursor,
+                fast=True
+            )
+        if next_cursor is None:
+            # Analyses archived to S3 follow the last page
+            archived_objs, position = read_archived_page(
+                repository, user, SkinAnalysisTableObject, _history_position,
+                after=older_position(cursor),
+                start=start,
+                end=end,
+                limit=None if limit is None else limit - len(skin_objs)
+            )
+            for skin_obj in archived_objs:
+                skin_obj.attributes = {
+                    name: value
+                    for name, value in skin_obj.attributes.items()
+                    if name in HISTORY_LIST_ATTRIBUTES
+                }
+            skin_objs += archived_objs
+            if position is not None:
+                next_cursor = encode_older_cursor(user, position)
+        logger.info(f"Found {len(skin_objs)} skin analyses for user: {user}")
 
+        analyses = with_thumbnail_urls([skin_obj.to_dict() for skin_obj in skin_objs])
         return {
             "statusCode": 200,
-            "headers": {"Content-Type": "application/json", "Access-Control-Allow-Origin": "*"},
-            "body": json.dumps({
-                "analyses": items,
-            },cls=DecimalEncoder)
+            "headers": {
+                "Content-Type": "application/json",
+                "Access-Control-Allow-Origin": "*",
+            },
+            "body": dumps({"analyses": analyses, "next_cursor": next_cursor})
         }
 
     except ValueError as e:
@@ -147,12 +289,12 @@ def lambda_handler(event, context):
         return {
             "statusCode": 405,
             "headers": {"Content-Type": "application/json", "Access-Control-Allow-Origin": "*"},
-            "body": json.dumps({"error": f"Unsupported method: {method}"}, cls=DecimalEncoder)
+            "body": dumps({"error": f"Unsupported method: {method}"})
         }
     except Exception as e:
         logger.error(f"Lambda handler error: {str(e)}")
         return {
             "statusCode": 500,
             "headers": {"Content-Type": "application/json", "Access-Control-Allow-Origin": "*"},
-            "body": json.dumps({"error": str(e)},cls=DecimalEncoder)
+            "body": dumps({"error": str(e)})
         }
\ No newline at end of file
@@ -0,0 +1,78 @@
+"""
+GET /skin/analysis-status?key=<s3Key>[&wait=<seconds>]
+
+Status of an asynchronous analysis (utils/analysis_jobs.py): pending,
+processing, complete (with the analysis and the SKIN# date it was saved
+under) or failed (with the reason). With wait, the request is held
+until the job finishes or the wait runs out, re-reading the job every
+POLL_SECONDS, which replaces a client-side polling loop. The wait is
+capped below API Gateway's 29 s integration timeout.
+"""
+import time
+
+from utils.analysis_jobs import COMPLETE, FAILED, get_job, job_response
+from utils.logger import select_powertools_logger
+from utils.repository import GlowCycleRepository
+from utils.serialization import dumps
+
+logger = select_powertools_logger("skin-analysis-status")
+
+repository = GlowCycleRepository()
+
+MAX_WAIT_SECONDS = 20
+POLL_SECONDS = 1.0
+
+HEADERS = {"Content-Type": "application/json", "Access-Control-Allow-Origin": "*"}
+
+
+def lambda_handler(event, context):
+    try:
+        if event.get("httpMethod") == "OPTIONS":
+            return {
+                "statusCode": 200,
+                "headers": {
+                    "Access-Control-Allow-Origin": "*",
+                    "Access-Control-Allow-Headers": "Content-Type",
+                    "Access-Control-Allow-Methods": "OPTIONS,GET",
+                },
+                "body": "",
+            }
+
+        params = event.get("queryStringParameters") or {}
+        s3_key = params.get("key")
+        if not s3_key:
+            return {
+                "statusCode": 400,
+                "headers": HEADERS,
+                "body": dumps({"error": "Missing key parameter"}),
+            }
+        try:
+            wait = min(max(float(params.get("wait") or 0), 0), MAX_WAIT_SECONDS)
+        except ValueError:
+            return {
+                "statusCode": 400,
+                "headers": HEADERS,
+                "body": dumps({"error": "wait must be a number of seconds"}),
+            }
+
+        deadline = time.monotonic() + wait
+        job = get_job(repository, s3_key)
+        while (
+            job is not None
+            and job.status not in (COMPLETE, FAILED)
+            and time.monotonic() + POLL_SECONDS <= deadline
+        ):
+            time.sleep(POLL_SECONDS)
+            job = get_job(repository, s3_key)
+
+        if job is None:
+            return {
+                "statusCode": 404,
+                "headers": HEADERS,
+                "body": dumps({"error": "No analysis for this key"}),
+            }
+        return {"statusCode": 200, "headers": HEADERS, "body": dumps(job_response(job))}
+
+    except Exception as e:
+        logger.error(f"Error reading analysis status: {str(e)}")
+        return {"statusCode": 500, "headers": HEADERS, "body": dumps({"error": str(e)})}
@@ -1,11 +1,14 @@
 import json
 import os
 import uuid
-import boto3
+from utils.analysis_jobs import create_job
+from utils.aws_clients import get_client
+from utils.repository import GlowCycleRepository
 
-s3 = boto3.client("s3")
 BUCKET = os.environ["BUCKET_NAME"]
 
+repository = GlowCycleRepository()
+
 def lambda_handler(event, context):
     if event.get("httpMethod") == "OPTIONS":
         return {
@@ -22,17 +25,23 @@ def lambda_handler(event, context):
 
     key = f"selfies/{uuid.uuid4()}.jpg"
 
-    upload_url = s3.generate_presigned_url(
+    upload_url = get_client("s3").generate_presigned_url(
         ClientMethod="put_object",
         Params={"Bucket": BUCKET, "Key": key, "ContentType": content_type},
         ExpiresIn=300,
     )
 
+    # {"async": true, "user": ...}: the upload itself starts the analysis
+    # (skin/worker.py); poll GET /skin/analysis-status?key=<s3Key>
+    is_async = bool(body.get("async") and body.get("user"))
+    if is_async:
+        create_job(repository, key, body["user"], body)
+
     return {
         "statusCode": 200,
         "headers": {
             "Content-Type": "application/json",
             "Access-Control-Allow-Origin": "*",
         },
-        "body": json.dumps({"uploadUrl": upload_url, "s3Key": key}),
+        "body": json.dumps({"uploadUrl": upload_url, "s3Key": key, "async": is_async}),
     }
\ No newline at end of file
@@ -0,0 +1,70 @@
+"""
+S3-triggered skin analysis (see utils/analysis_jobs.py).
+
+Runs on ObjectCreated events for selfies/. Uploads without a job (the
+synchronous flow) are ignored, as are the normalised copies analyze.py
+writes under analysis/ should the notification ever cover them. The
+function's reserved concurrency caps how many analyses run at once,
+independently of the API.
+"""
+import json
+from datetime import datetime
+from urllib.parse import unquote_plus
+
+from skin.analyze import analyze
+from skin.history import repository, store_analysis
+from utils.analysis_jobs import (
+    MAX_ATTEMPTS,
+    claim_job,
+    complete_job,
+    fail_job,
+    release_job,
+    reserve_skin_sk,
+)
+from utils.image_processing import is_normalised_key
+from utils.logger import select_powertools_logger
+from utils.serialization import to_json_ready
+from utils.sort_keys import parse_skin_sk, skin_sk
+
+logger = select_powertools_logger("skin-analysis-worker")
+
+
+def process(s3_key: str) -> None:
+    job = claim_job(repository, s3_key)
+    if job is None:
+        logger.info(f"No pending analysis job for {s3_key}")
+        return
+
+    context = to_json_ready(job.context)
+    try:
+        response = analyze({**context, "s3Key": s3_key})
+        body = json.loads(response["body"])
+        if response["statusCode"] != 200:
+            # The photo can't be used; retrying won't change that
+            fail_job(repository, job, body.get("error", "Analysis failed"))
+            return
+
+        # The key is kept on the job, so a retry saves to it again instead
+        # of adding a second record
+        if not reserve_skin_sk(repository, job, skin_sk(datetime.now())):
+            logger.info(f"Analysis job for {s3_key} was taken over by another worker")
+            return
+        analysis = {**body, **context, "s3ImageKey": s3_key}
+        store_analysis(job.user, analysis, created_at=parse_skin_sk(job.skin_sk))
+        complete_job(repository, job, body, job.skin_sk)
+    except Exception as e:
+        logger.exception(f"Analysis of {s3_key} failed (attempt {job.attempts})")
+        if release_job(repository, job, str(e)) and job.attempts < MAX_ATTEMPTS:
+            # Let Lambda's asynchronous retry run it again
+            raise
+        return
+
+    logger.info(f"Analysis of {s3_key} saved as {job.skin_sk}")
+
+
+def lambda_handler(event, context):
+    for record in event.get("Records", []):
+        s3_key = unquote_plus(record["s3"]["object"]["key"])
+        if is_normalised_key(s3_key):
+            continue
+        process(s3_key)
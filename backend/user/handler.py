@@ -3,18 +3,15 @@ User Management Handler
 Handles user registration, authentication, and setup
 """
 import json
-import boto3
 import hashlib
 import logging
-import os
+from utils.dynamo_helper import UserProfileTableObject
+from utils.repository import GlowCycleRepository
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Initialize DynamoDB
-dynamodb = boto3.resource('dynamodb')
-table_name = os.environ.get('DYNAMODB_TABLE_NAME', 'GlowCycleTable')
-table = dynamodb.Table(table_name)
+repository = GlowCycleRepository()
 
 
 def hash_password(password):
@@ -46,15 +43,10 @@ def create_user(event, context):
         
         logger.info(f'Creating user: {username}')
         
-        # Check if user already exists
-        response = table.get_item(
-            Key={
-                'user': username,
-                'date': 'USER_PROFILE'
-            }
-        )
+        # Check if user already exists (keys only)
+        existing = repository.get(UserProfileTableObject, username, attributes=['user'])
         
-        if 'Item' in response:
+        if existing is not None:
             return {
                 'statusCode': 409,
                 'headers': {
@@ -67,15 +59,12 @@ def create_user(event, context):
         # Create user
         password_hash = hash_password(password)
         
-        item = {
-            'user': username,
-            'date': 'USER_PROFILE',
-            'displayName': display_name,
-            'passwordHash': password_hash,
-            'setupCompleted': False
-        }
-        
-        table.put_item(Item=item)
+        repository.put(UserProfileTableObject(
+            user=username,
+            display_name=display_name,
+            password_hash=password_hash,
+            setup_completed=False
+        ))
         
         logger.info(f'User created successfully: {username}')
         
@@ -128,16 +117,13 @@ def authenticate_user(event, context):
         logger.info(f'Authenticating user: {username}')
         
         # Get user from DynamoDB
-        response = table.get_item(
-            Key={
-                'user': username,
-                'date': 'USER_PROFILE'
-            }
+        profile = repository.get(
+            UserProfileTableObject,
+            username,
+            attributes=['displayName', 'passwordHash', 'setupCompleted']
         )
         
-        item = response.get('Item')
-        
-        if not item:
+        if not profile:
             return {
                 'statusCode': 401,
                 'headers': {
@@ -150,7 +136,7 @@ def authenticate_user(event, context):
         # Verify password
         password_hash = hash_password(password)
         
-        if item.get('passwordHash') != password_hash:
+        if profile.password_hash != password_hash:
             return {
                 'statusCode': 401,
                 'headers': {
@@ -171,8 +157,8 @@ def authenticate_user(event, context):
             'body': json.dumps({
                 'status': 'success',
                 'username': username,
-                'displayName': item.get('displayName', username),
-                'setupCompleted': item.get('setupCompleted', False)
+                'displayName': profile.display_name,
+                'setupCompleted': profile.setup_completed
             })
         }
         
@@ -211,16 +197,7 @@ def complete_setup(event, context):
         logger.info(f'Completing setup for user: {username}')
         
         # Update user
-        table.update_item(
-            Key={
-                'user': username,
-                'date': 'USER_PROFILE'
-            },
-            UpdateExpression='SET setupCompleted = :val',
-            ExpressionAttributeValues={
-                ':val': True
-            }
-        )
+        repository.update(username, UserProfileTableObject.SK, {'setupCompleted': True})
         
         logger.info(f'Setup completed for user: {username}')
         
@@ -0,0 +1,144 @@
+"""
+Result cache for skin analyses.
+
+An analysis depends only on the image and on the request fields that
+go into the prompt, so a retried, double-tapped or repeated request can
+reuse an earlier result instead of calling Rekognition and Bedrock
+again. Results are kept at two levels:
+
+    in-container LRU   (s3Key, context) -> result, no AWS calls at all
+    DynamoDB           ANALYSIS_CACHE#<digest>, expiring after CACHE_TTL_SECONDS
+
+The DynamoDB digest covers the object's ETag (the content MD5 for a
+single PUT upload, so the same photo uploaded twice is one entry), the
+prompt context, the model and the image preprocessing settings. Since
+an entry can serve another upload of the same photo, possibly by
+another user, it holds only what depends on the content: the model's
+analysis, the Rekognition face and the key of the history thumbnail
+made from the first upload, which later uploads of the photo reuse
+instead of downloading it again. The upload's own key is added per
+request by skin/analyze.py.
+The LRU trusts the key: upload keys are fresh UUIDs
+(skin/upload_url.py), and its entries are short-lived in case a key is
+re-uploaded within its presigned URL's lifetime.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from utils.dynamo_helper import AnalysisCacheTableObject
+from utils.image_processing import JPEG_QUALITY, MAX_EDGE
+from utils.logger import select_powertools_logger
+from utils.repository import GlowCycleRepository
+from utils.serialization import to_dynamo, to_json_ready
+
+logger = select_powertools_logger("aws-helpers-analysis-cache")
+
+# Bump when the prompt or result format changes so old results are not served
+CACHE_VERSION = 3
+
+CACHE_TTL_SECONDS = int(
+    os.environ.get("ANALYSIS_CACHE_TTL_SECONDS", str(7 * 24 * 3600))
+)
+LOCAL_CACHE_SIZE = int(os.environ.get("ANALYSIS_LOCAL_CACHE_SIZE", "64"))
+LOCAL_CACHE_SECONDS = 600
+
+# Request fields that change the prompt
+CONTEXT_FIELDS = ("timeOfDay", "cyclePhase", "skinGoals")
+
+_local: "OrderedDict[Tuple[str, str], Tuple[float, dict]]" = OrderedDict()
+_local_lock = threading.Lock()
+
+_repository: Optional[GlowCycleRepository] = None
+
+
+def _get_repository() -> GlowCycleRepository:
+    # Created on first use: the analyze function only needs the table for the cache
+    global _repository
+    if _repository is None:
+        _repository = GlowCycleRepository()
+    return _repository
+
+
+def context_fingerprint(body: dict) -> str:
+    """Canonical JSON of the prompt-relevant request fields"""
+    context = {name: body.get(name) for name in CONTEXT_FIELDS}
+    if isinstance(context["skinGoals"], list):
+        context["skinGoals"] = sorted(str(goal) for goal in context["skinGoals"])
+    return json.dumps(context, sort_keys=True, separators=(",", ":"))
+
+
+def result_digest(etag: str, fingerprint: str, model_id: str) -> str:
+    material = "|".join(
+        [
+            str(CACHE_VERSION),
+            etag.strip('"'),
+            fingerprint,
+            model_id,
+            f"{MAX_EDGE}q{JPEG_QUALITY}",
+        ]
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+# -------------------------
+# In-container LRU
+# -------------------------
+
+def get_local(s3_key: str, fingerprint: str) -> Optional[dict]:
+    with _local_lock:
+        entry = _local.get((s3_key, fingerprint))
+        if entry is None:
+            return None
+        stored_at, result = entry
+        if time.monotonic() - stored_at > LOCAL_CACHE_SECONDS:
+            del _local[(s3_key, fingerprint)]
+            return None
+        _local.move_to_end((s3_key, fingerprint))
+        return result
+
+
+def put_local(s3_key: str, fingerprint: str, result: dict) -> None:
+    with _local_lock:
+        _local[(s3_key, fingerprint)] = (time.monotonic(), result)
+        _local.move_to_end((s3_key, fingerprint))
+        while len(_local) > LOCAL_CACHE_SIZE:
+            _local.popitem(last=False)
+
+
+# -------------------------
+# DynamoDB
+# -------------------------
+
+def get_stored(digest: str) -> Optional[dict]:
+    """A stored result, unless expired (TTL deletion can lag by days)"""
+    try:
+        record = _get_repository().get(
+            AnalysisCacheTableObject, AnalysisCacheTableObject.key(digest)
+        )
+    except ClientError as e:
+        logger.warning(f"Analysis cache read failed: {str(e)}")
+        return None
+    if record is None or record.expires_at <= time.time():
+        return None
+    return to_json_ready(record.result)
+
+
+def put_stored(digest: str, result: dict) -> None:
+    try:
+        _get_repository().put(AnalysisCacheTableObject(
+            digest=digest,
+            result=to_dynamo(result),
+            expires_at=int(time.time()) + CACHE_TTL_SECONDS,
+            created_at=datetime.now().isoformat()
+        ))
+    except ClientError as e:
+        # The analysis itself succeeded; the next request just misses
+        logger.warning(f"Analysis cache write failed: {str(e)}")
@@ -0,0 +1,156 @@
+"""
+Asynchronous skin analysis jobs.
+
+With {"async": true} the upload-url request creates a pending job for
+the new key, holding the user and prompt context. Uploading the photo
+fires the S3 ObjectCreated event that runs skin/worker.py, which claims
+the job, analyses the image, saves the result as the user's SKIN#
+record and marks the job complete (or failed, for photos that can't be
+used). The client polls skin/status.py for the outcome.
+
+Claims are optimistic: a worker only takes a job whose updated_at is
+still the one it read, so duplicate S3 deliveries analyse a photo once.
+A processing job not touched for STALE_SECONDS is assumed to belong to
+a worker that died and may be claimed again.
+"""
+import os
+import time
+from datetime import datetime
+from typing import Optional
+
+from botocore.exceptions import ClientError
+
+from utils.dynamo_helper import AnalysisJobTableObject
+from utils.repository import GlowCycleRepository
+from utils.serialization import to_dynamo
+
+PENDING = "pending"
+PROCESSING = "processing"
+COMPLETE = "complete"
+FAILED = "failed"
+
+# Request fields copied into the job and used for the prompt
+CONTEXT_FIELDS = ("timeOfDay", "cyclePhase", "cycleDay", "skinGoals")
+
+JOB_TTL_SECONDS = int(os.environ.get("ANALYSIS_JOB_TTL_SECONDS", str(24 * 3600)))
+# Longer than the worker's timeout, so a live worker is never overtaken
+STALE_SECONDS = int(os.environ.get("ANALYSIS_JOB_STALE_SECONDS", "300"))
+MAX_ATTEMPTS = int(os.environ.get("ANALYSIS_JOB_MAX_ATTEMPTS", "3"))
+
+
+def create_job(
+    repository: GlowCycleRepository, s3_key: str, user: str, body: dict
+) -> AnalysisJobTableObject:
+    now = int(time.time())
+    job = AnalysisJobTableObject(
+        s3_key=s3_key,
+        user=user,
+        context=to_dynamo(
+            {name: body[name] for name in CONTEXT_FIELDS if body.get(name) is not None}
+        ),
+        created_at=datetime.now().isoformat(),
+        updated_at=now,
+        expires_at=now + JOB_TTL_SECONDS
+    )
+    repository.put(job)
+    return job
+
+
+def get_job(
+    repository: GlowCycleRepository, s3_key: str
+) -> Optional[AnalysisJobTableObject]:
+    return repository.get(AnalysisJobTableObject, AnalysisJobTableObject.key(s3_key))
+
+
+def _transition(
+    repository: GlowCycleRepository, job: AnalysisJobTableObject, values: dict
+) -> bool:
+    """
+    Applies values if nobody changed the job since it was read, to the
+    stored job and to job itself
+    """
+    values = {**values, "updated_at": max(int(time.time()), job.updated_at + 1)}
+    try:
+        repository.update(
+            job._get_pk(),
+            job._get_sk(),
+            values,
+            condition="#seen = :seen",
+            names={"#seen": "updated_at"},
+            condition_values={":seen": job.updated_at}
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+            return False
+        raise
+    for name, value in values.items():
+        setattr(job, name, value)
+    return True
+
+
+def claim_job(
+    repository: GlowCycleRepository, s3_key: str
+) -> Optional[AnalysisJobTableObject]:
+    """
+    The job for s3_key, now marked processing by this worker. None if
+    there is no job (a synchronous upload), it is finished, or another
+    worker holds it.
+    """
+    job = get_job(repository, s3_key)
+    if job is None or job.status in (COMPLETE, FAILED):
+        return None
+    if job.status == PROCESSING and time.time() - job.updated_at < STALE_SECONDS:
+        return None
+    claimed = {"status": PROCESSING, "attempts": job.attempts + 1}
+    if not _transition(repository, job, claimed):
+        return None
+    return get_job(repository, s3_key)
+
+
+def reserve_skin_sk(
+    repository: GlowCycleRepository, job: AnalysisJobTableObject, skin_sk: str
+) -> bool:
+    """
+    Records the SKIN# key the analysis will be saved under, before it is
+    saved. A retry after a failed completion finds the key on the job
+    and saves to it again, which store_analysis turns into a no-op.
+    """
+    if job.skin_sk:
+        return True
+    return _transition(repository, job, {"skin_sk": skin_sk})
+
+
+def complete_job(
+    repository: GlowCycleRepository,
+    job: AnalysisJobTableObject,
+    result: dict,
+    skin_sk: str,
+) -> bool:
+    values = {"status": COMPLETE, "result": to_dynamo(result), "skin_sk": skin_sk}
+    return _transition(repository, job, values)
+
+
+def fail_job(
+    repository: GlowCycleRepository, job: AnalysisJobTableObject, error: str
+) -> bool:
+    return _transition(repository, job, {"status": FAILED, "error": error})
+
+
+def release_job(
+    repository: GlowCycleRepository, job: AnalysisJobTableObject, error: str
+) -> bool:
+    """Hands the job back for the event's retry, or fails it after MAX_ATTEMPTS"""
+    if job.attempts >= MAX_ATTEMPTS:
+        return fail_job(repository, job, error)
+    return _transition(repository, job, {"status": PENDING, "error": error})
+
+
+def job_response(job: AnalysisJobTableObject) -> dict:
+    """The status endpoint's view of a job"""
+    response = {"s3Key": job.s3_key, "status": job.status}
+    if job.status == COMPLETE:
+        response["date"] = job.skin_sk
+        response["analysis"] = job.result
+    elif job.status == FAILED:
+        response["error"] = job.error
+    return response
@@ -0,0 +1,376 @@
+"""
+Cold storage for old journal and skin records.
+
+archive_user moves a user's records dated before a horizon out of
+GlowCycleTable into gzip NDJSON objects in S3, one per record type and
+year, and keeps an ARCHIVE_MANIFEST item pointing at them. History
+endpoints list archived records after their last table page through
+read_archived_page, which downloads only the years a page needs and
+only when the requested range reaches past the horizon.
+
+Records are copied to S3 and recorded in the manifest before they are
+deleted from the table, so a partly finished run can leave a record in
+both places; readers drop archived copies of keys still in the table.
+Records written below the horizon after a run (e.g. bulk imports) stay
+hot until the next run folds them into their year's object.
+"""
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+from boto3.dynamodb.conditions import Key
+
+from utils.concurrency import fetch_concurrently
+from utils.dynamo_helper import (
+    ArchiveManifestTableObject,
+    JournalTableObject,
+    SkinAnalysisTableObject,
+)
+from utils.logger import select_powertools_logger
+from utils.repository import GlowCycleRepository, Record
+from utils.s3_helper import S3
+from utils.sort_keys import DATE_FORMAT, range_bounds
+
+logger = select_powertools_logger("aws-helpers-archive")
+
+ARCHIVE_BUCKET = os.environ.get("ARCHIVE_BUCKET_NAME", "")
+ARCHIVE_HORIZON_DAYS = int(os.environ.get("ARCHIVE_HORIZON_DAYS", "365"))
+
+# Record types that are archived, by manifest name
+ARCHIVED_TYPES: Dict[str, type] = {
+    "journal": JournalTableObject,
+    "skin": SkinAnalysisTableObject,
+}
+
+s3_helper = S3()
+
+
+def _kind(record_cls: type) -> str:
+    for kind, cls in ARCHIVED_TYPES.items():
+        if cls is record_cls:
+            return kind
+    raise ValueError(f"{record_cls.__name__} records are not archived")
+
+
+def archive_key(user: str, kind: str, year: int) -> str:
+    return f"archive/{user}/{kind}/{year}.ndjson.gz"
+
+
+def _year_of(record_cls: type, sk: str) -> int:
+    return int(sk[len(record_cls.SK_PREFIX):len(record_cls.SK_PREFIX) + 4])
+
+
+def get_manifest(
+    repository: GlowCycleRepository, user: str
+) -> Optional[ArchiveManifestTableObject]:
+    return repository.get(ArchiveManifestTableObject, user)
+
+
+def _load_years(
+    manifest: ArchiveManifestTableObject, kind: str, years: List[int]
+) -> List[dict]:
+    """Downloads the given years' objects in parallel"""
+    objects = manifest.objects.get(kind, {})
+
+    def load(key: str):
+        return lambda: s3_helper.get_gzip_ndjson(ARCHIVE_BUCKET, key) or []
+
+    calls = {
+        str(year): load(objects[str(year)]["key"])
+        for year in years
+        if str(year) in objects
+    }
+    if not calls:
+        return []
+    results = fetch_concurrently(calls)
+    return [item for year in sorted(results) for item in results[year]]
+
+
+# -------------------------
+# Reads
+# -------------------------
+
+def _years_in_range(
+    manifest: Optional[ArchiveManifestTableObject],
+    kind: str,
+    start: Optional[datetime],
+    end: Optional[datetime],
+) -> List[int]:
+    """Years with archived records of kind between start and end, oldest first"""
+    if manifest is None or not manifest.horizon:
+        return []
+    horizon = datetime.strptime(manifest.horizon, DATE_FORMAT)
+    if start and start >= horizon:
+        return []
+    last_year = min(end, horizon).year if end else horizon.year
+    return [
+        year
+        for year in manifest.years(kind)
+        if (not start or year >= start.year) and year <= last_year
+    ]
+
+
+def read_archived(
+    repository: GlowCycleRepository,
+    user: str,
+    record_cls: Type[Record],
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    exclude: Iterable[str] = (),
+) -> List[Record]:
+    """
+    Archived records of one type between start and end (inclusive dates),
+    newest first. Sort keys in exclude (records still in the table) are
+    skipped. Costs one GetItem when nothing archived is in range.
+    """
+    if not ARCHIVE_BUCKET:
+        return []
+    manifest = get_manifest(repository, user)
+    kind = _kind(record_cls)
+    years = _years_in_range(manifest, kind, start, end)
+    if not years:
+        return []
+
+    low, high = range_bounds(record_cls.SK_PREFIX, start, end)
+    excluded = set(exclude)
+    items = [
+        item for item in _load_years(manifest, kind, years)
+        if low <= item["date"] <= high and item["date"] not in excluded
+    ]
+    items.sort(key=lambda item: item["date"], reverse=True)
+    logger.info(
+        f"Read {len(items)} archived {kind} records for {user} ({len(years)} objects)"
+    )
+    return repository.to_records(record_cls, items)
+
+
+def get_archived(
+    repository: GlowCycleRepository, user: str, record_cls: Type[Record], sk: str
+) -> Optional[Record]:
+    """Looks up one archived record by its sort key"""
+    if not ARCHIVE_BUCKET:
+        return None
+    manifest = get_manifest(repository, user)
+    if manifest is None:
+        return None
+    for item in _load_years(manifest, _kind(record_cls), [_year_of(record_cls, sk)]):
+        if item["date"] == sk:
+            return record_cls._from_dynamo_representation(item)
+    return None
+
+
+def iter_archived(
+    repository: GlowCycleRepository,
+    user: str,
+    record_cls: Type[Record],
+    exclude: Iterable[str] = (),
+) -> Iterator[dict]:
+    """
+    Yields every archived item of one type, oldest first, downloading one
+    year's object at a time (for exports). Sort keys in exclude are skipped.
+    """
+    if not ARCHIVE_BUCKET:
+        return
+    manifest = get_manifest(repository, user)
+    if manifest is None:
+        return
+    kind = _kind(record_cls)
+    excluded = set(exclude)
+    for year in manifest.years(kind):
+        items = _load_years(manifest, kind, [year])
+        items.sort(key=lambda item: item["date"])
+        for item in items:
+            if item["date"] not in excluded:
+                yield item
+
+
+def _archived_year(
+    repository: GlowCycleRepository,
+    user: str,
+    record_cls: Type[Record],
+    manifest: ArchiveManifestTableObject,
+    year: int,
+    start: Optional[datetime],
+    end: Optional[datetime],
+) -> List[Record]:
+    """
+    One year's archived records between start and end, without those
+    whose key is still in the table anywhere in the year's key range (a
+    partly finished archive run can leave a record in both places)
+    """
+    low, high = range_bounds(record_cls.SK_PREFIX, start, end)
+    items = [
+        item for item in _load_years(manifest, _kind(record_cls), [year])
+        if low <= item["date"] <= high
+    ]
+    if not items:
+        return []
+    sort_keys = [item["date"] for item in items]
+    hot_items, _ = repository.query_items(
+        user,
+        sort_condition=Key("date").between(min(sort_keys), max(sort_keys)),
+        attributes=["date"]
+    )
+    hot_keys = {item["date"] for item in hot_items}
+    return repository.to_records(
+        record_cls, [item for item in items if item["date"] not in hot_keys]
+    )
+
+
+def read_archived_page(
+    repository: GlowCycleRepository,
+    user: str,
+    record_cls: Type[Record],
+    position: Callable[[Record], Tuple[str, str]],
+    after: Optional[Tuple[str, str]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: Optional[int] = None,
+    others: Iterable[Record] = (),
+) -> Tuple[List[Record], Optional[Tuple[str, str]]]:
+    """
+    One page of the records a history lists after its last table page:
+    the archived records merged with others (records read from the
+    table, e.g. legacy keys), newest first by position(record), which is
+    (ISO timestamp, sort key). Starts below the position after (None for
+    the newest) and returns (page, position to continue from), the
+    position being None after the last page.
+
+    Archived years are downloaded newest first and only as far as the
+    page needs. With a limit that is limit records. Without one, a range
+    with a start gets every year it covers, while an open-ended history
+    gets no year on its first call (the default load stays on the table)
+    and one year per call after that. A page never holds a record older
+    than a year it hasn't read, so pages come out in order without
+    re-reading the whole archive.
+    """
+    max_years = None
+    if limit is None and start is None:
+        max_years = 0 if after is None else 1
+    pool = [record for record in others if after is None or position(record) < after]
+    years = []  # still to read, newest first
+    manifest = get_manifest(repository, user) if ARCHIVE_BUCKET else None
+    if manifest is not None:
+        years = _years_in_range(manifest, _kind(record_cls), start, end)[::-1]
+        if after is not None:
+            # Any year whose records can sort below after
+            years = [year for year in years if f"{year:04d}" < after[0]]
+
+    def unread_boundary() -> Tuple[str, str]:
+        # Sorts above every position in the newest unread year and below
+        # every position in the years after it
+        return f"{years[0] + 1:04d}", ""
+
+    read = 0
+    while years:
+        if limit is not None:
+            ready = sum(1 for record in pool if position(record) >= unread_boundary())
+            if ready >= limit:
+                break
+        elif max_years is not None and read >= max_years:
+            break
+        archived = _archived_year(
+            repository, user, record_cls, manifest, years.pop(0), start, end
+        )
+        pool += [
+            record for record in archived if after is None or position(record) < after
+        ]
+        read += 1
+
+    pool.sort(key=position, reverse=True)
+    if years:
+        ready = [record for record in pool if position(record) >= unread_boundary()]
+    else:
+        ready = pool
+    logger.info(
+        f"Read {read} archived {_kind(record_cls)} objects for {user}, "
+        f"{len(ready)} older records ready"
+    )
+
+    if limit is not None and len(ready) > limit:
+        page = ready[:limit]
+        # An empty position starts again from the newest older record
+        return page, position(page[-1]) if page else after or ("", "")
+    return ready, unread_boundary() if years else None
+
+
+# -------------------------
+# Archiving
+# -------------------------
+
+def archive_user(
+    repository: GlowCycleRepository,
+    user: str,
+    horizon_days: int = ARCHIVE_HORIZON_DAYS,
+    dry_run: bool = False,
+) -> Dict[str, int]:
+    """
+    Moves the user's journal and skin records older than horizon_days to
+    S3. Returns the number of records archived per type.
+    """
+    if not ARCHIVE_BUCKET:
+        raise ValueError("ARCHIVE_BUCKET_NAME is not set")
+
+    horizon = (datetime.now() - timedelta(days=horizon_days)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    manifest = get_manifest(repository, user) or ArchiveManifestTableObject(user=user)
+    archived: Dict[str, int] = {}
+    moved_keys: List[str] = []
+
+    for kind, record_cls in ARCHIVED_TYPES.items():
+        low, high = range_bounds(
+            record_cls.SK_PREFIX, None, horizon - timedelta(days=1)
+        )
+        items, _ = repository.query_items(
+            user, sort_condition=Key("date").between(low, high), newest_first=False
+        )
+        archived[kind] = len(items)
+        if not items or dry_run:
+            continue
+
+        by_year = defaultdict(list)
+        for item in items:
+            by_year[_year_of(record_cls, item["date"])].append(item)
+
+        objects = manifest.objects.setdefault(kind, {})
+        for year, year_items in sorted(by_year.items()):
+            key = archive_key(user, kind, year)
+            merged = {}
+            if str(year) in objects:
+                merged = {
+                    item["date"]: item
+                    for item in s3_helper.get_gzip_ndjson(ARCHIVE_BUCKET, key) or []
+                }
+            merged.update((item["date"], item) for item in year_items)
+
+            s3_helper.put_gzip_ndjson(
+                ARCHIVE_BUCKET, key, [merged[sk] for sk in sorted(merged)]
+            )
+            objects[str(year)] = {"key": key, "count": len(merged)}
+
+        moved_keys.extend(item["date"] for item in items)
+
+    logger.info(
+        f"Archiving for {user} before {horizon.strftime(DATE_FORMAT)}: "
+        f"{archived}{' (dry run)' if dry_run else ''}"
+    )
+    if dry_run or not moved_keys:
+        return archived
+
+    manifest.horizon = max(manifest.horizon, horizon.strftime(DATE_FORMAT))
+    manifest.updated_at = datetime.now().isoformat()
+    repository.put(manifest)
+
+    failed = repository.batch_write(
+        [repository.delete_request(user, sk) for sk in moved_keys]
+    )
+    if failed:
+        # Still readable (archived copies are skipped while the key is hot);
+        # the next run retries
+        logger.warning(
+            f"{len(failed)} archived records for {user} could not be deleted "
+            "from the table"
+        )
+    return archived
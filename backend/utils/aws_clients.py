@@ -0,0 +1,140 @@
+"""
+Container-wide registry of boto3 clients and resources.
+
+Clients are created on first use and then reused for the life of the
+Lambda container, so importing a handler costs nothing and a warm
+invocation never rebuilds a client. No probe calls are made: a bad
+configuration surfaces on the first real request instead of adding a
+round trip to every cold start.
+
+init_timings() reports how long each client took to build, so the
+cold-start cost of a function can be read from its logs.
+"""
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import boto3
+from botocore.config import Config
+
+from utils.logger import select_powertools_logger
+
+logger = select_powertools_logger("aws-helpers-clients")
+
+DEFAULT_REGION = os.environ.get("AWS_DEFAULT_REGION", "ap-southeast-2")
+
+# Enough for the concurrent fan-out in utils/concurrency.py plus headroom
+MAX_POOL_CONNECTIONS = 16
+
+BASE_CONFIG = Config(
+    connect_timeout=2,
+    read_timeout=10,
+    tcp_keepalive=True,
+    max_pool_connections=MAX_POOL_CONNECTIONS,
+    retries={
+        "max_attempts": 10,
+        "mode": "adaptive"
+    }
+)
+
+# Per-service overrides merged into BASE_CONFIG
+SERVICE_CONFIG = {
+    # Model invocations routinely take longer than a data-plane call
+    "bedrock-runtime": Config(
+        read_timeout=60, retries={"max_attempts": 3, "mode": "adaptive"}
+    ),
+    "rekognition": Config(read_timeout=20),
+}
+
+_session: Optional[boto3.session.Session] = None
+_clients: Dict[tuple, object] = {}
+_overrides: Dict[tuple, object] = {}
+_timings: Dict[str, float] = {}
+_lock = threading.Lock()
+_timings_logged = False
+
+
+def _get_session() -> boto3.session.Session:
+    # The default boto3 session is not safe to create from several threads
+    global _session
+    if _session is None:
+        _session = boto3.session.Session()
+    return _session
+
+
+def _config_for(service: str) -> Config:
+    override = SERVICE_CONFIG.get(service)
+    return BASE_CONFIG.merge(override) if override else BASE_CONFIG
+
+
+def _get_or_create(
+    kind: str, service: str, region_name: Optional[str], thread_id: Optional[int] = None
+):
+    override = _overrides.get((kind, service))
+    if override is not None:
+        return override
+
+    key = (kind, service, region_name or DEFAULT_REGION, thread_id)
+    existing = _clients.get(key)
+    if existing is not None:
+        return existing
+
+    with _lock:
+        existing = _clients.get(key)
+        if existing is not None:
+            return existing
+
+        started = time.perf_counter()
+        session = _get_session()
+        factory = session.resource if kind == "resource" else session.client
+        created = factory(service, region_name=key[2], config=_config_for(service))
+        elapsed = round((time.perf_counter() - started) * 1000, 1)
+
+        _clients[key] = created
+        if thread_id is None:
+            _timings[f"{kind}:{service}:{key[2]}"] = elapsed
+        logger.info(f"Created {service} {kind} in {key[2]} ({elapsed} ms)")
+        return created
+
+
+def get_client(service: str, region_name: Optional[str] = None):
+    """Shared low-level client; boto3 clients are safe to use across threads"""
+    return _get_or_create("client", service, region_name)
+
+
+def get_resource(service: str, region_name: Optional[str] = None):
+    """
+    Resources are not thread-safe, so each thread gets its own; the main
+    thread's instance is the one shared across invocations.
+    """
+    thread = threading.current_thread()
+    thread_id = None if thread is threading.main_thread() else thread.ident
+    return _get_or_create("resource", service, region_name, thread_id)
+
+
+def set_override(service: str, instance, kind: str = "resource") -> None:
+    """
+    Serves instance for every get_resource/get_client call for the service
+    (all regions and threads), e.g. the in-memory table emulator.
+    Pass None to go back to real clients.
+    """
+    if instance is None:
+        _overrides.pop((kind, service), None)
+    else:
+        _overrides[(kind, service)] = instance
+
+
+def init_timings() -> Dict[str, float]:
+    """Milliseconds spent creating each client/resource in this container"""
+    return dict(_timings)
+
+
+def log_init_timings() -> None:
+    """Logs the client creation cost once, after the container's first invocation"""
+    global _timings_logged
+    if _timings_logged or not _timings:
+        return
+    _timings_logged = True
+    total = round(sum(_timings.values()), 1)
+    logger.info(f"AWS client init timings (ms): {_timings}, total: {total}")
@@ -1,10 +1,10 @@
 import json
-import boto3
+from utils.aws_clients import get_client
 from utils.logger import select_powertools_logger
 
 logger = select_powertools_logger("bedrock-client")
 
-bedrock_runtime = boto3.client('bedrock-runtime', region_name='us-east-1')
+BEDROCK_REGION = 'us-east-1'
 
 MOTIVATIONAL_QUOTE_PROMPT = """You are a deeply empathetic wellness companion who truly understands what women go through during their cycle.
 
@@ -172,6 +172,28 @@ def generate_motivational_quote(user_context: dict) -> str:
     if top_concerns:
         patterns_summary += f", main concerns: {', '.join(top_concerns[:2])}"
     
+    # Longer-horizon habits for this phase (utils/insights.py)
+    phase_patterns = user_context.get('phase_patterns') or {}
+    if phase_patterns.get('entries', 0) >= 3:
+        patterns_summary += (
+            f"; usually {phase_patterns['dominant_feeling']} in this phase "
+            f"(avg energy {phase_patterns['avg_energy']}/100)"
+        )
+        phase_tags = [tag['name'] for tag in phase_patterns.get('top_tags', [])[:2]]
+        if phase_tags:
+            patterns_summary += f", often about {', '.join(phase_tags)}"
+    
+    # Mood/energy vs skin links over the last year (utils/correlations.py)
+    for correlation in (user_context.get('skin_correlations') or [])[:2]:
+        direction = "higher" if correlation['r'] > 0 else "lower"
+        delay = ""
+        if correlation['lag_days']:
+            delay = f" {correlation['lag_days']} day(s) later"
+        metric = correlation['metric'].replace('_', ' ')
+        patterns_summary += (
+            f"; higher {correlation['driver']} goes with {direction} {metric}{delay}"
+        )
+    
     # Build ultra-concise but rich prompt
     message_prompt = MOTIVATIONAL_QUOTE_PROMPT.format(
         user_name=user_name,
@@ -201,7 +223,7 @@ def generate_motivational_quote(user_context: dict) -> str:
     
     logger.info(f"🤖 Calling Bedrock for message (cycle: {cycle_phase} day {cycle_day}, journals: {journal_entries})")
     
-    response = bedrock_runtime.invoke_model(
+    response = get_bedrock_client().invoke_model(
         modelId='anthropic.claude-3-haiku-20240307-v1:0',
         body=json.dumps(request_body)
     )
@@ -277,4 +299,4 @@ def generate_wellness_support(user_context: dict) -> dict:
 
 def get_bedrock_client():
     """Get configured Bedrock runtime client"""
-    return bedrock_runtime
+    return get_client('bedrock-runtime', region_name=BEDROCK_REGION)
@@ -0,0 +1,100 @@
+"""
+Concurrent fan-out of independent I/O calls (DynamoDB queries, S3 reads).
+
+Calls run on a small thread pool shared by the container, so a group of
+reads costs roughly the slowest call instead of their sum. Each call has
+its own timeout, measured from when the group was submitted.
+
+A call that fans out itself (correlations.load_days reading the archive
+through archive.read_archived) gets the pool one level down: a thread
+never waits for work queued on its own pool, which could otherwise be
+full of callers waiting on each other.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.logger import select_powertools_logger
+
+logger = select_powertools_logger("aws-helpers-concurrency")
+
+MAX_WORKERS = 8
+DEFAULT_TIMEOUT = 5.0  # seconds
+
+_depth = threading.local()
+# _executors[n] runs the calls submitted from threads of _executors[n - 1]
+_executors: List[ThreadPoolExecutor] = []
+_executors_lock = threading.Lock()
+
+
+def _set_depth(depth: int) -> None:
+    _depth.value = depth
+
+
+def _executor() -> ThreadPoolExecutor:
+    """The pool for calls submitted by the current thread"""
+    depth = getattr(_depth, "value", 0)
+    with _executors_lock:
+        while len(_executors) <= depth:
+            level = len(_executors)
+            _executors.append(ThreadPoolExecutor(
+                max_workers=MAX_WORKERS,
+                thread_name_prefix=f"glowcycle-io-{level}" if level else "glowcycle-io",
+                initializer=_set_depth,
+                initargs=(level + 1,)
+            ))
+        return _executors[depth]
+
+
+class FetchTimeoutError(Exception):
+    pass
+
+
+def _timed(name: str, call: Callable[[], Any], timings: Dict[str, float]) -> Any:
+    started = time.perf_counter()
+    try:
+        return call()
+    finally:
+        timings[name] = round((time.perf_counter() - started) * 1000, 1)
+
+
+def fetch_concurrently(
+    calls: Dict[str, Callable[[], Any]],
+    timeout: float = DEFAULT_TIMEOUT,
+    timeouts: Optional[Dict[str, float]] = None,
+) -> Dict[str, Any]:
+    """
+    Runs every call in parallel and returns {name: result}.
+
+    timeouts overrides the default timeout for individual calls. A call
+    that doesn't finish in time raises FetchTimeoutError; an exception
+    raised by a call is re-raised here.
+    """
+    timeouts = timeouts or {}
+    timings: Dict[str, float] = {}
+    submitted = time.monotonic()
+    executor = _executor()
+    futures = {
+        name: executor.submit(_timed, name, call, timings)
+        for name, call in calls.items()
+    }
+
+    results = {}
+    try:
+        for name, future in futures.items():
+            remaining = submitted + timeouts.get(name, timeout) - time.monotonic()
+            try:
+                results[name] = future.result(timeout=max(remaining, 0))
+            except TimeoutError:
+                raise FetchTimeoutError(
+                    f"{name} did not finish within {timeouts.get(name, timeout)}s"
+                )
+    finally:
+        for future in futures.values():
+            future.cancel()  # no-op for calls already running
+
+    total = round((time.monotonic() - submitted) * 1000, 1)
+    logger.info(f"Concurrent fetch timings (ms): {timings}, total: {total}")
+    return results
+
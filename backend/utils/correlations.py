@@ -0,0 +1,567 @@
+"""
+Mood/energy vs cycle phase vs skin metrics.
+
+Journal energy and feeling (scored 1-5) and the skin analysis metrics
+are kept as daily sums over the last WINDOW_DAYS in the user's
+CORRELATIONS item:
+
+    days = {"YYYY-MM-DD": {"entries": n, "energy": sum, "mood": sum,
+                           "skin": {metric: sum},
+                           "skin_counts": {metric: count}}}
+
+analyze lays them on one daily axis together with the cycle phase of
+each day (cycle_engine.project_calendar) and, in a single pass over
+the axis, accumulates per-phase means, least-squares trends and the
+correlation of every skin metric with energy and mood on the same day
+and up to MAX_LAG_DAYS earlier (mood leads skin, not the other way).
+
+Journal, skin and period writes bring the item forward with
+advance_correlations, a single UpdateItem that adds to the counters of
+the day they touch and marks the cached summary stale; the rest of the
+item is neither read nor rewritten. The item records the STATS version
+it matches, so a write that was not applied (a concurrent write, an
+import) shows up as a version mismatch and the next read rebuilds the
+series from the history.
+The summary is read with get_correlations (GET /wellness/correlations and
+the wellness context), which recomputes and stores it inside the request
+when a write has made it stale, so nothing is left to run after the
+response.
+Phases are never stored, since new periods change them retroactively.
+"""
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from botocore.exceptions import ClientError
+from boto3.dynamodb.conditions import Key
+
+from utils.archive import read_archived
+from utils.concurrency import fetch_concurrently
+from utils.cycle_engine import (
+    CycleStats,
+    get_cycle_stats,
+    load_periods,
+    project_calendar,
+)
+from utils.dynamo_helper import (
+    CorrelationsTableObject,
+    JournalTableObject,
+    SkinAnalysisTableObject,
+    UserStatsTableObject,
+)
+from utils.logger import select_powertools_logger
+from utils.repository import GlowCycleRepository
+from utils.serialization import to_dynamo, to_json_ready
+from utils.sort_keys import DATE_FORMAT, LEGACY_JOURNAL_UPPER, LEGACY_READS
+from utils.user_stats import JOURNAL_STATS_ATTRIBUTES, get_stats
+
+logger = select_powertools_logger("aws-helpers-correlations")
+
+# Bump when the stored series or the summary change; older items are rebuilt
+CORRELATIONS_VERSION = 2
+
+WINDOW_DAYS = 365
+MAX_LAG_DAYS = 3
+# Fewer pairs/points than this give no correlation/trend
+MIN_PAIRS = 5
+MIN_TREND_POINTS = 3
+# Correlations at least this strong are worth mentioning to the user
+NOTABLE_CORRELATION = 0.3
+HIGHLIGHTS = 3
+
+FEELING_SCORES = {"amazing": 5, "happy": 4, "okay": 3, "tired": 2, "sad": 1}
+SKIN_METRICS = (
+    "overall_skin_health",
+    "radiance",
+    "moisture",
+    "texture",
+    "pores",
+    "dark_circles",
+    "oiliness",
+    "redness",
+)
+DRIVERS = ("energy", "mood")
+UNKNOWN_PHASE = "unknown"
+
+# Full-history reads on a rebuild, as in user_stats.rebuild_stats
+REBUILD_TIMEOUT = 10.0  # seconds
+
+
+# -------------------------
+# Daily series
+# -------------------------
+
+def _day(days: dict, date: datetime) -> dict:
+    return days.setdefault(
+        date.strftime(DATE_FORMAT),
+        {"entries": 0, "energy": 0, "mood": 0, "skin": {}, "skin_counts": {}}
+    )
+
+
+def add_journal(days: dict, journal_obj: JournalTableObject) -> None:
+    day = _day(days, journal_obj.date)
+    day["entries"] += 1
+    day["energy"] += journal_obj.energy
+    day["mood"] += FEELING_SCORES.get(journal_obj.feeling.value, 3)
+
+
+def skin_metrics(attributes: dict) -> Dict[str, float]:
+    """The numeric metrics of a skin analysis"""
+    attributes = to_json_ready(attributes)
+    values = {
+        **(attributes.get("metrics") or {}),
+        "overall_skin_health": attributes.get("overall_skin_health"),
+    }
+    return {
+        name: values[name]
+        for name in SKIN_METRICS
+        if isinstance(values.get(name), (int, float))
+        and not isinstance(values[name], bool)
+    }
+
+
+def add_skin(days: dict, skin_obj: SkinAnalysisTableObject) -> None:
+    metrics = skin_metrics(skin_obj.attributes)
+    if not metrics:
+        return
+    day = _day(days, skin_obj.created_at)
+    for name, value in metrics.items():
+        day["skin"][name] = day["skin"].get(name, 0) + value
+        day["skin_counts"][name] = day["skin_counts"].get(name, 0) + 1
+
+
+def trim(days: dict) -> None:
+    """Drops days more than WINDOW_DAYS before the latest one"""
+    if not days:
+        return
+    latest = datetime.strptime(max(days), DATE_FORMAT)
+    oldest = (latest - timedelta(days=WINDOW_DAYS - 1)).strftime(DATE_FORMAT)
+    for key in [key for key in days if key < oldest]:
+        del days[key]
+
+
+def build_days(
+    journal_objs: Iterable[JournalTableObject],
+    skin_objs: Iterable[SkinAnalysisTableObject],
+) -> dict:
+    days: dict = {}
+    for journal_obj in journal_objs:
+        add_journal(days, journal_obj)
+    for skin_obj in skin_objs:
+        add_skin(days, skin_obj)
+    trim(days)
+    return days
+
+
+# -------------------------
+# Analysis
+# -------------------------
+
+def _pearson(
+    n: int, sx: float, sy: float, sxy: float, sxx: float, syy: float
+) -> Optional[float]:
+    if n < MIN_PAIRS:
+        return None
+    covariance = sxy - sx * sy / n
+    variance_x = sxx - sx * sx / n
+    variance_y = syy - sy * sy / n
+    if variance_x <= 1e-9 or variance_y <= 1e-9:
+        return None
+    return max(-1.0, min(1.0, covariance / math.sqrt(variance_x * variance_y)))
+
+
+def _trend(n: int, st: float, sy: float, sty: float, stt: float) -> Optional[dict]:
+    if n < MIN_TREND_POINTS or n * stt - st * st <= 0:
+        return None
+    slope = (n * sty - st * sy) / (n * stt - st * st)
+    return {
+        "slope_per_week": round(slope * 7, 3),
+        "mean": round(sy / n, 2),
+        "points": n,
+    }
+
+
+def empty_summary() -> dict:
+    return {
+        "version": CORRELATIONS_VERSION,
+        "window": None,
+        "phases": {},
+        "correlations": [],
+        "trends": {},
+    }
+
+
+def analyze(days: dict, period_dates: List[datetime], cycle_stats: CycleStats) -> dict:
+    """
+    Per-phase means, trends and lagged correlations of the daily series,
+    in one pass over the days from the first to the last with data.
+    """
+    if not days:
+        return empty_summary()
+
+    first = datetime.strptime(min(days), DATE_FORMAT)
+    last = datetime.strptime(max(days), DATE_FORMAT)
+    length = (last - first).days + 1
+    names = DRIVERS + SKIN_METRICS
+
+    # Daily means on a dense axis, None where nothing was logged
+    series = {name: [None] * length for name in names}
+    for key, day in days.items():
+        index = (datetime.strptime(key, DATE_FORMAT) - first).days
+        if day.get("entries"):
+            series["energy"][index] = day["energy"] / day["entries"]
+            series["mood"][index] = day["mood"] / day["entries"]
+        counts = day.get("skin_counts", {})
+        for metric, total in day.get("skin", {}).items():
+            if counts.get(metric) and metric in series:
+                series[metric][index] = total / counts[metric]
+
+    if period_dates:
+        calendar = project_calendar(period_dates, cycle_stats, first, last)
+        phases = [day["cycle_phase"] for day in calendar]
+    else:
+        phases = [UNKNOWN_PHASE] * length
+
+    phase_sums = defaultdict(lambda: defaultdict(lambda: [0.0, 0]))
+    phase_days = defaultdict(int)
+    # n, sum t, sum y, sum ty, sum tt
+    trends = {name: [0, 0.0, 0.0, 0.0, 0.0] for name in names}
+    # n, sum x, sum y, sum xy, sum xx, sum yy
+    pairs = defaultdict(lambda: [0, 0.0, 0.0, 0.0, 0.0, 0.0])
+
+    for index in range(length):
+        phase = phases[index]
+        logged = False
+        for name in names:
+            value = series[name][index]
+            if value is None:
+                continue
+            logged = True
+            mean = phase_sums[phase][name]
+            mean[0] += value
+            mean[1] += 1
+            trend = trends[name]
+            trend[0] += 1
+            trend[1] += index
+            trend[2] += value
+            trend[3] += index * value
+            trend[4] += index * index
+            if name in DRIVERS:
+                continue
+            for driver in DRIVERS:
+                for lag in range(min(MAX_LAG_DAYS, index) + 1):
+                    driven_by = series[driver][index - lag]
+                    if driven_by is None:
+                        continue
+                    pair = pairs[(driver, name, lag)]
+                    pair[0] += 1
+                    pair[1] += driven_by
+                    pair[2] += value
+                    pair[3] += driven_by * value
+                    pair[4] += driven_by * driven_by
+                    pair[5] += value * value
+        if logged:
+            phase_days[phase] += 1
+
+    correlations = []
+    for driver in DRIVERS:
+        for metric in SKIN_METRICS:
+            keys = [(driver, metric, lag) for lag in range(MAX_LAG_DAYS + 1)]
+            by_lag = [_pearson(*pairs[key]) if key in pairs else None for key in keys]
+            found = [(abs(r), lag, r) for lag, r in enumerate(by_lag) if r is not None]
+            if not found:
+                continue
+            _, lag, r = max(found)
+            rounded = [None if value is None else round(value, 3) for value in by_lag]
+            correlations.append({
+                "driver": driver,
+                "metric": metric,
+                "lag_days": lag,
+                "r": round(r, 3),
+                "pairs": pairs[(driver, metric, lag)][0],
+                "by_lag": rounded,
+            })
+    correlations.sort(key=lambda correlation: abs(correlation["r"]), reverse=True)
+
+    return {
+        "version": CORRELATIONS_VERSION,
+        "window": {
+            "start": first.strftime(DATE_FORMAT),
+            "end": last.strftime(DATE_FORMAT),
+            "days": length,
+        },
+        "phases": {
+            phase: {
+                "days": phase_days[phase],
+                **{
+                    name: round(total / count, 2)
+                    for name, (total, count) in sums.items()
+                    if count
+                },
+            }
+            for phase, sums in phase_sums.items()
+        },
+        "correlations": correlations,
+        "trends": {
+            name: trend
+            for name, trend in ((name, _trend(*trends[name])) for name in names)
+            if trend
+        },
+    }
+
+
+def highlights(summary: dict, limit: int = HIGHLIGHTS) -> List[dict]:
+    """The strongest correlations worth mentioning, for the wellness context"""
+    return [
+        {key: correlation[key] for key in ("driver", "metric", "lag_days", "r")}
+        for correlation in summary.get("correlations", [])
+        if abs(correlation["r"]) >= NOTABLE_CORRELATION
+    ][:limit]
+
+
+# -------------------------
+# Stored series
+# -------------------------
+
+def load_days(repository: GlowCycleRepository, user: str) -> dict:
+    """The daily series rebuilt from the user's journal and skin records"""
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    start = today - timedelta(days=WINDOW_DAYS)
+
+    def journals():
+        thread_repository = repository.for_current_thread()
+        journal_objs, _ = thread_repository.query(
+            JournalTableObject, user, start=start, attributes=JOURNAL_STATS_ATTRIBUTES
+        )
+        if LEGACY_READS:
+            legacy_items, _ = thread_repository.query_items(
+                user,
+                sort_condition=Key("date").lt(LEGACY_JOURNAL_UPPER),
+                attributes=JOURNAL_STATS_ATTRIBUTES
+            )
+            legacy_objs = thread_repository.to_records(JournalTableObject, legacy_items)
+            journal_objs += [
+                journal_obj for journal_obj in legacy_objs if journal_obj.date >= start
+            ]
+        return journal_objs + read_archived(
+            thread_repository,
+            user,
+            JournalTableObject,
+            start=start,
+            exclude=[journal_obj._get_sk() for journal_obj in journal_objs]
+        )
+
+    def skins():
+        thread_repository = repository.for_current_thread()
+        skin_objs, _ = thread_repository.query(
+            SkinAnalysisTableObject,
+            user,
+            start=start,
+            attributes=["metrics", "overall_skin_health"]
+        )
+        return skin_objs + read_archived(
+            thread_repository,
+            user,
+            SkinAnalysisTableObject,
+            start=start,
+            exclude=[skin_obj._get_sk() for skin_obj in skin_objs]
+        )
+
+    results = fetch_concurrently(
+        {"journals": journals, "skins": skins}, timeout=REBUILD_TIMEOUT
+    )
+    return build_days(results["journals"], results["skins"])
+
+
+def _store(
+    repository: GlowCycleRepository,
+    record: CorrelationsTableObject,
+    expected: Optional[int],
+) -> None:
+    """
+    Writes the item if it still matches what was read (stats_version
+    expected, None if there was no item); otherwise another request has
+    moved it on and this copy is dropped.
+    """
+    record.updated_at = datetime.now().isoformat()
+    if expected is None:
+        condition, values = "attribute_not_exists(#sk)", None
+    else:
+        condition, values = "#stats_version = :expected", {":expected": expected}
+    try:
+        repository.put(
+            record,
+            condition=condition,
+            names=(
+                {"#sk": "date"}
+                if expected is None
+                else {"#stats_version": "stats_version"}
+            ),
+            values=values,
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+        logger.info(f"CORRELATIONS for {record.user} changed concurrently, not stored")
+
+
+def _counters(day: dict, path: tuple = ()) -> Dict[tuple, float]:
+    """The non-zero numbers of a day, keyed by their path within it"""
+    counters = {}
+    for name, value in day.items():
+        if isinstance(value, dict):
+            counters.update(_counters(value, path + (name,)))
+        elif value:
+            counters[path + (name,)] = value
+    return counters
+
+
+def _advance(
+    repository: GlowCycleRepository,
+    user: str,
+    stats: UserStatsTableObject,
+    key: Optional[str],
+    day: Optional[dict],
+    day_exists: bool,
+) -> bool:
+    """
+    One conditional UpdateItem: adds day to the stored day key (or
+    creates it) and moves stats_version on. False if the item is not at
+    the previous STATS version, or the day is not in the expected state.
+    """
+    condition = "#version = :version AND #stats_version = :expected"
+    names = {"#version": "version", "#stats_version": "stats_version"}
+    values = {
+        "stats_version": stats.version,
+        "summary_stale": True,
+        "updated_at": datetime.now().isoformat(),
+    }
+    increments = None
+    if key is not None:
+        names.update({"#days": "days", "#day": key})
+        if day_exists:
+            condition += " AND attribute_exists(#days.#day)"
+            increments = {
+                ("days", key) + path: amount
+                for path, amount in to_dynamo(_counters(day)).items()
+            }
+        else:
+            condition += " AND attribute_not_exists(#days.#day)"
+            values[("days", key)] = to_dynamo(day)
+    try:
+        repository.update(
+            user,
+            CorrelationsTableObject.SK,
+            values,
+            condition=condition,
+            names=names,
+            condition_values={
+                ":version": CORRELATIONS_VERSION,
+                ":expected": stats.version - 1,
+            },
+            increments=increments
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+        return False
+    return True
+
+
+def advance_correlations(
+    repository: GlowCycleRepository,
+    user: str,
+    stats: UserStatsTableObject,
+    journal_obj: Optional[JournalTableObject] = None,
+    skin_obj: Optional[SkinAnalysisTableObject] = None,
+) -> None:
+    """
+    Applies a committed write (stats as returned by write_with_stats) to
+    the stored series, if the series was current just before it: the
+    touched day's counters are added to in place, or the day created
+    when it has none yet. A period write passes no record and only marks
+    the summary stale.
+    """
+    touched: dict = {}
+    if journal_obj is not None:
+        add_journal(touched, journal_obj)
+    if skin_obj is not None:
+        add_skin(touched, skin_obj)
+    try:
+        if not touched:
+            applied = _advance(repository, user, stats, None, None, day_exists=True)
+        else:
+            # A journal or a skin record touches one day
+            [(key, day)] = touched.items()
+            applied = (
+                _advance(repository, user, stats, key, day, day_exists=True)
+                or _advance(repository, user, stats, key, day, day_exists=False)
+            )
+        if not applied:
+            logger.info(f"CORRELATIONS for {user} not current, rebuilt on read")
+    except Exception as e:
+        # The write itself has been committed; a stale series is rebuilt on read
+        logger.warning(f"Could not update CORRELATIONS for {user}: {str(e)}")
+
+
+def _series_current(
+    record: Optional[CorrelationsTableObject], stats: UserStatsTableObject
+) -> bool:
+    return (
+        record is not None
+        and record.version == CORRELATIONS_VERSION
+        and record.stats_version == stats.version
+    )
+
+
+def _summary_current(
+    record: Optional[CorrelationsTableObject], stats: UserStatsTableObject
+) -> bool:
+    return (
+        _series_current(record, stats)
+        and bool(record.summary)
+        and not record.summary_stale
+    )
+
+
+def get_correlations(
+    repository: GlowCycleRepository,
+    user: str,
+    stats: Optional[UserStatsTableObject] = None,
+) -> dict:
+    """
+    The analysis summary, from the CORRELATIONS item when nothing has been
+    written since it was computed. Otherwise the summary is recomputed
+    (and the series rebuilt if a write was missed) and stored.
+    """
+    stats = stats or get_stats(repository, user)
+    record = repository.get(CorrelationsTableObject, user)
+    if _summary_current(record, stats):
+        return to_json_ready(record.summary)
+
+    if _series_current(record, stats):
+        days = to_json_ready(record.days)
+        trim(days)
+    else:
+        logger.info(f"Rebuilding CORRELATIONS for {user}")
+        days = load_days(repository, user)
+
+    period_objs = load_periods(repository, user)
+    summary = analyze(
+        days,
+        [period_obj.period_date for period_obj in period_objs],
+        get_cycle_stats(repository, user, stats, period_objs)
+    )
+    _store(
+        repository,
+        CorrelationsTableObject(
+            user=user,
+            version=CORRELATIONS_VERSION,
+            stats_version=stats.version,
+            days=to_dynamo(days),
+            summary=to_dynamo(summary)
+        ),
+        expected=record.stats_version if record is not None else None
+    )
+    return summary
@@ -0,0 +1,359 @@
+"""
+Cycle statistics and predictions from a user's full period history.
+
+compute_cycle_stats walks the sorted period dates once: consecutive
+starts give cycle lengths, lengths far from the median (a missed log
+shows up as a double-length cycle) are rejected as outliers, and the
+rest give the mean/median length, variability and a confidence level.
+
+The result depends only on the period history, so it is cached in the
+user's STATS item ("cycle"). Period writes go through write_with_stats,
+whose add_period/set_periods clear the cache in the same transaction;
+the next read recomputes and stores it, conditional on the STATS
+version it started from. Date-dependent values (cycle day, phase, next
+period, fertile window) are derived from the cached stats on every read
+by CycleStats.predict.
+"""
+import bisect
+import statistics
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from utils.dynamo_helper import PeriodTableObject, UserStatsTableObject
+from utils.logger import select_powertools_logger
+from utils.repository import GlowCycleRepository
+from utils.serialization import to_dynamo, to_json_ready
+from utils.sort_keys import DATE_FORMAT
+
+logger = select_powertools_logger("aws-helpers-cycle-engine")
+
+# Bump when the computation changes so cached stats are recomputed
+CYCLE_MODEL_VERSION = 1
+
+DEFAULT_CYCLE_LENGTH = 28
+# Lengths a user may report with save_period and still be trusted
+REPORTED_LENGTH_RANGE = (21, 40)
+# Intervals outside this can't be one cycle (duplicate logs, long gaps)
+PLAUSIBLE_LENGTH_RANGE = (15, 90)
+
+# Intervals further than this many scaled MADs from the median are outliers
+OUTLIER_MAD_FACTOR = 3.0
+MAD_TO_STD = 1.4826
+# ...but never reject anything within this many days of the median
+MIN_OUTLIER_DISTANCE = 4
+
+# The prediction follows the most recent cycles
+RECENT_CYCLES = 6
+
+MENSTRUAL_DAYS = 5
+LUTEAL_PHASE_DAYS = 14
+FERTILE_DAYS_BEFORE_OVULATION = 5
+FERTILE_DAYS_AFTER_OVULATION = 1
+# Fertile window is widened by the cycle variability, up to this many days each side
+MAX_WINDOW_PADDING = 3
+
+
+@dataclass
+class CycleStats:
+    period_count: int = 0
+    last_period: str = ""  # YYYY-MM-DD
+    cycle_count: int = 0  # cycles used, after outlier rejection
+    outlier_count: int = 0
+    predicted_length: int = DEFAULT_CYCLE_LENGTH
+    mean_length: Optional[float] = None
+    median_length: Optional[float] = None
+    std_dev: Optional[float] = None
+    min_length: Optional[int] = None
+    max_length: Optional[int] = None
+    confidence: str = "none"  # none, low, medium or high
+    model: int = CYCLE_MODEL_VERSION
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CycleStats":
+        fields = cls.__dataclass_fields__
+        data = to_json_ready(data)
+        return cls(**{key: value for key, value in data.items() if key in fields})
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def predict(self, today: Optional[datetime] = None) -> dict:
+        """
+        Where the user is in their cycle on the given day (default today).
+        Past an expected period that was not logged, cycles are projected
+        forward at the predicted length.
+        """
+        prediction = {
+            key: value for key, value in self.to_dict().items() if key != "model"
+        }
+        prediction.update({
+            "cycle_phase": "unknown",
+            "cycle_day": 0,
+            "cycle_length": self.predicted_length
+        })
+        if not self.last_period:
+            return prediction
+
+        today = (today or datetime.now()).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        last_period = datetime.strptime(self.last_period, DATE_FORMAT)
+        length = self.predicted_length
+        days_since = (today - last_period).days
+        if days_since < 0:
+            return prediction
+
+        cycle_start = last_period + timedelta(days=(days_since // length) * length)
+        cycle_day = (today - cycle_start).days + 1
+        next_period = cycle_start + timedelta(days=length)
+        fertile_start, ovulation, fertile_end = fertile_window(
+            next_period, self.std_dev
+        )
+
+        prediction.update({
+            "cycle_phase": cycle_phase(cycle_day, length),
+            "cycle_day": cycle_day,
+            "days_since_last_period": days_since,
+            "next_period": next_period.strftime(DATE_FORMAT),
+            "days_until_next_period": (next_period - today).days,
+            "ovulation_date": ovulation.strftime(DATE_FORMAT),
+            "fertile_window": {
+                "start": fertile_start.strftime(DATE_FORMAT),
+                "end": fertile_end.strftime(DATE_FORMAT)
+            }
+        })
+        return prediction
+
+
+# -------------------------
+# Computation
+# -------------------------
+
+def cycle_phase(cycle_day: int, cycle_length: int = DEFAULT_CYCLE_LENGTH) -> str:
+    """Phase for a day of the cycle, counting ovulation back from the next period"""
+    ovulation_day = cycle_length - LUTEAL_PHASE_DAYS
+    if cycle_day <= MENSTRUAL_DAYS:
+        return "menstrual"
+    elif cycle_day < ovulation_day - 1:
+        return "follicular"
+    elif cycle_day <= ovulation_day + 1:
+        return "ovulation"
+    else:
+        return "luteal"
+
+
+def fertile_window(
+    next_period: datetime, std_dev: Optional[float] = None
+) -> Tuple[datetime, datetime, datetime]:
+    """(start, ovulation, end) of the fertile window before a predicted period"""
+    padding = min(MAX_WINDOW_PADDING, round(std_dev or 0))
+    ovulation = next_period - timedelta(days=LUTEAL_PHASE_DAYS)
+    return (
+        ovulation - timedelta(days=FERTILE_DAYS_BEFORE_OVULATION + padding),
+        ovulation,
+        ovulation + timedelta(days=FERTILE_DAYS_AFTER_OVULATION + padding),
+    )
+
+
+def _confidence(cycle_count: int, std_dev: Optional[float]) -> str:
+    if cycle_count == 0:
+        return "none"
+    if cycle_count >= 6 and std_dev is not None and std_dev <= 3:
+        return "high"
+    if cycle_count >= 3 and std_dev is not None and std_dev <= 6:
+        return "medium"
+    return "low"
+
+
+def compute_cycle_stats(
+    period_dates: Iterable[datetime], reported_length: Optional[int] = None
+) -> CycleStats:
+    """
+    Cycle statistics from period start dates (any order, duplicates
+    allowed). reported_length is the user's own cycle length, used
+    when the history has no usable cycle yet.
+    """
+    dates = sorted({
+        period_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        for period_date in period_dates
+    })
+    if not dates:
+        return CycleStats()
+
+    low, high = PLAUSIBLE_LENGTH_RANGE
+    gaps = ((later - earlier).days for earlier, later in zip(dates, dates[1:]))
+    lengths = [length for length in gaps if low <= length <= high]
+
+    cycles: List[int] = []
+    if lengths:
+        median = statistics.median(lengths)
+        mad = statistics.median(abs(length - median) for length in lengths)
+        max_distance = max(MIN_OUTLIER_DISTANCE, OUTLIER_MAD_FACTOR * MAD_TO_STD * mad)
+        cycles = [length for length in lengths if abs(length - median) <= max_distance]
+
+    stats = CycleStats(
+        period_count=len(dates),
+        last_period=dates[-1].strftime(DATE_FORMAT),
+        cycle_count=len(cycles),
+        outlier_count=len(dates) - 1 - len(cycles),
+    )
+
+    if cycles:
+        stats.mean_length = round(statistics.fmean(cycles), 1)
+        stats.median_length = statistics.median(cycles)
+        stats.std_dev = round(statistics.pstdev(cycles), 1) if len(cycles) > 1 else None
+        stats.min_length = min(cycles)
+        stats.max_length = max(cycles)
+        stats.predicted_length = round(statistics.median(cycles[-RECENT_CYCLES:]))
+    elif (
+        reported_length
+        and REPORTED_LENGTH_RANGE[0] <= reported_length <= REPORTED_LENGTH_RANGE[1]
+    ):
+        stats.predicted_length = reported_length
+
+    stats.confidence = _confidence(stats.cycle_count, stats.std_dev)
+    return stats
+
+
+def project_calendar(
+    period_dates: Iterable[datetime],
+    cycle_stats: CycleStats,
+    start: datetime,
+    end: datetime,
+) -> List[dict]:
+    """
+    Phase and flags for every day from start to end (inclusive), in one
+    pass. Between two logged periods one plausible cycle apart, the
+    cycle is the logged one; after the last logged period, and across
+    gaps too long for one cycle (missed logs), cycles are projected at
+    the predicted length and their starts flagged as predicted_period.
+    Days before the first logged period have phase "unknown".
+    """
+    starts = sorted({
+        period_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        for period_date in period_dates
+    })
+    start = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    end = end.replace(hour=0, minute=0, second=0, microsecond=0)
+    length = cycle_stats.predicted_length
+    # Longest gap still taken as one logged cycle
+    longest = max(cycle_stats.max_length or length, length) + MIN_OUTLIER_DISTANCE
+
+    days = []
+    # Last logged period on or before the day
+    index = bisect.bisect_right(starts, start) - 1
+    cycle = None  # (cycle_start, next_start, logged) of the cycle the day is in
+    day = start
+    while day <= end:
+        while index + 1 < len(starts) and starts[index + 1] <= day:
+            index += 1
+            cycle = None
+        if index < 0:
+            days.append({
+                "date": day.strftime(DATE_FORMAT),
+                "cycle_day": 0,
+                "cycle_phase": "unknown",
+                "period": False,
+                "predicted_period": False,
+                "fertile": False,
+                "ovulation": False
+            })
+            day += timedelta(days=1)
+            continue
+
+        if cycle is None or day >= cycle[1]:
+            anchor = starts[index]
+            next_logged = starts[index + 1] if index + 1 < len(starts) else None
+            if next_logged is not None and (next_logged - anchor).days <= longest:
+                cycle = (anchor, next_logged, True)
+            else:
+                elapsed = (day - anchor).days // length * length
+                cycle_start = anchor + timedelta(days=elapsed)
+                next_start = cycle_start + timedelta(days=length)
+                if next_logged is not None:
+                    next_start = min(next_start, next_logged)
+                cycle = (cycle_start, next_start, cycle_start == anchor)
+            fertile_start, ovulation, fertile_end = fertile_window(
+                cycle[1], cycle_stats.std_dev
+            )
+
+        cycle_start, next_start, logged = cycle
+        cycle_day = (day - cycle_start).days + 1
+        cycle_length = (next_start - cycle_start).days if logged else length
+        bleeding = cycle_day <= MENSTRUAL_DAYS
+        days.append({
+            "date": day.strftime(DATE_FORMAT),
+            "cycle_day": cycle_day,
+            "cycle_phase": cycle_phase(cycle_day, cycle_length),
+            "period": bleeding and logged,
+            "predicted_period": bleeding and not logged,
+            "fertile": fertile_start <= day <= fertile_end,
+            "ovulation": day == ovulation
+        })
+        day += timedelta(days=1)
+    return days
+
+
+# -------------------------
+# Cached reads
+# -------------------------
+
+def load_periods(repository: GlowCycleRepository, user: str) -> List[PeriodTableObject]:
+    """All of the user's period records, oldest first"""
+    period_objs, _ = repository.query(
+        PeriodTableObject,
+        user,
+        attributes=["period_date", "cycle_length"],
+        newest_first=False
+    )
+    return period_objs
+
+
+def _cycle_stats_from(period_objs: List[PeriodTableObject]) -> CycleStats:
+    reported = [
+        period_obj.cycle_length for period_obj in period_objs if period_obj.cycle_length
+    ]
+    return compute_cycle_stats(
+        (period_obj.period_date for period_obj in period_objs),
+        reported_length=reported[-1] if reported else None
+    )
+
+
+def get_cycle_stats(
+    repository: GlowCycleRepository,
+    user: str,
+    stats: UserStatsTableObject,
+    period_objs: Optional[List[PeriodTableObject]] = None,
+) -> CycleStats:
+    """
+    The user's cycle statistics, from the STATS cache (stats, as read
+    with user_stats.get_stats) when it is current. Pass the period
+    records (load_periods) when the caller has already read them.
+    """
+    if stats.cycle and stats.cycle.get("model") == CYCLE_MODEL_VERSION:
+        return CycleStats.from_dict(stats.cycle)
+
+    if period_objs is None:
+        period_objs = load_periods(repository, user)
+    cycle_stats = _cycle_stats_from(period_objs)
+    try:
+        # Only if no write has happened since stats was read; otherwise
+        # this result may already be stale and the next read recomputes
+        repository.update(
+            user,
+            UserStatsTableObject.SK,
+            {"cycle": to_dynamo(cycle_stats.to_dict())},
+            condition="#version = :expected",
+            names={"#version": "version"},
+            condition_values={":expected": stats.version}
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+        logger.info(
+            f"STATS for {user} changed while computing cycle stats, not caching"
+        )
+    return cycle_stats
@@ -1,9 +1,5 @@
-import boto3
-import os
-from botocore.config import Config
-from utils.logger import select_powertools_logger
+from utils.aws_clients import get_client, get_resource
 
-logger = select_powertools_logger("aws-helpers-dynamo")
 
 def get_dynamodb_client(resource: bool = True, region_name: str = None):
     """
@@ -12,27 +8,10 @@ def get_dynamodb_client(resource: bool = True, region_name: str = None):
     Parameters:
     - resource: bool, if True returns boto3.resource, else boto3.client
     - region_name: AWS region (defaults to AWS_DEFAULT_REGION env var or ap-southeast-2)
-    
-    """
-    if region_name is None:
-        region_name = os.environ.get("AWS_DEFAULT_REGION", "ap-southeast-2")
-    
-    try:
-        config = Config(
-            retries={
-                "max_attempts": 10,
-                "mode": "standard"
-            }
-        )
-        if resource:
-            dynamodb = boto3.resource("dynamodb", region_name=region_name, config=config)
-        else:
-            dynamodb = boto3.client("dynamodb", region_name=region_name, config=config)
 
-        # Optional: test call to ensure connection
-        dynamodb.meta.client.describe_limits() if resource else dynamodb.list_tables()
-
-        return dynamodb
-    except Exception as e:
-        logger.error(f"Failed to create DynamoDB client/resource: {e}")
-        raise
+    Instances come from the shared registry in utils/aws_clients.py and are
+    created once per container, without a test call.
+    """
+    if resource:
+        return get_resource("dynamodb", region_name=region_name)
+    return get_client("dynamodb", region_name=region_name)
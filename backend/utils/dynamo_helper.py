@@ -1,27 +1,56 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
+from decimal import Decimal
 import os
 import sys
-from typing import List
+from typing import Any, ClassVar, List, Optional
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from journal.types import FeelingType, DayPeriod
 from utils.logger import select_powertools_logger
+from utils.serialization import decimal_to_number
+from utils.sort_keys import (
+    JOURNAL_PREFIX,
+    PERIOD_PREFIX,
+    SKIN_PREFIX,
+    SORT_KEY_VERSION,
+    SORT_KEY_VERSION_ATTRIBUTE,
+    journal_sk,
+    parse_journal_sk,
+    parse_period_sk,
+    parse_skin_sk,
+    period_sk,
+    skin_sk,
+    to_api_date,
+    to_api_time,
+)
 
 logger = select_powertools_logger("aws-helpers-dynamo")
 
 
-@dataclass
+# Enum members by value; a dict lookup is much cheaper than Enum(value)
+_FEELINGS = {feeling.value: feeling for feeling in FeelingType}
+_DAY_PERIODS = {period.value: period for period in DayPeriod}
+
+
+@dataclass(slots=True)
 class JournalTableObject:
     """
     Class to ensure journal objects conform to DynamoDB syntax.
     Implements serialization/deserialization for DynamoDB.
     
     PK = user e.g. sophia
-    SK = date(DD-MM-YYYY)#morning  e.g. 12-02-2025#morning
+    SK = JOURNAL#timestamp(YYYY-MM-DDTHH:MM:SS)#morning
+         e.g. JOURNAL#2025-02-12T08:30:00#morning
+
+    Histories run to tens of thousands of entries, so instances use
+    __slots__ and item_to_dict renders list responses without building
+    them at all.
     """
+    SK_PREFIX: ClassVar[str] = JOURNAL_PREFIX
+
     user: str
     feeling: FeelingType
     energy: int
@@ -34,9 +63,9 @@ class JournalTableObject:
         return self.user
 
     def _get_sk(self) -> str:
-        # Include timestamp to allow multiple entries per day
-        timestamp = self.date.strftime('%d-%m-%Y-%H-%M-%S')
-        return f"{timestamp}#{self.time.value}"  # DD-MM-YYYY-HH-MM-SS#morning
+        # Include timestamp to allow multiple entries per day:
+        # JOURNAL#YYYY-MM-DDTHH:MM:SS#morning
+        return journal_sk(self.date, self.time.value)
 
     def _to_dynamo_representation(self) -> dict:
         """
@@ -48,7 +77,8 @@ class JournalTableObject:
             "feeling": self.feeling.value,
             "energy": self.energy,
             "thoughts": self.thoughts,
-            "tags": self.tags
+            "tags": self.tags,
+            SORT_KEY_VERSION_ATTRIBUTE: SORT_KEY_VERSION
         }
 
     # -------------------------
@@ -60,28 +90,49 @@ class JournalTableObject:
         Creates a JournalTableObject from a DynamoDB item.
         """
         try:
-            # Split by last # to get timestamp and period
-            date_str, period_part = item["date"].rsplit("#", 1)
-            
-            # Parse timestamp (DD-MM-YYYY-HH-MM-SS or DD-MM-YYYY for old entries)
-            if date_str.count('-') >= 5:  # New format with time
-                date_obj = datetime.strptime(date_str, "%d-%m-%Y-%H-%M-%S")
-            else:  # Old format without time
-                date_obj = datetime.strptime(date_str, "%d-%m-%Y")
-            
+            # Handles current and legacy sort keys
+            date_obj, period_part = parse_journal_sk(item["date"])
+
             return cls(
                 user=item["user"],
-                feeling=FeelingType(item["feeling"]),
+                feeling=_FEELINGS[item["feeling"]],
                 energy=int(item["energy"]),
                 thoughts=item["thoughts"],
                 tags=item["tags"],
                 date=date_obj,
-                time=DayPeriod(period_part)
+                time=_DAY_PERIODS[period_part]
             )
+        except KeyError as e:
+            logger.error(f"Failed to deserialise DynamoDB item: missing or invalid {e}")
+            raise ValueError(f"Invalid journal item: {e}")
         except Exception as e:
             logger.error(f"Failed to deserialise DynamoDB item: {e}")
             raise
 
+    @classmethod
+    def item_to_dict(cls, item: dict) -> dict:
+        """
+        to_dict of an item, straight from its sort key
+        (JOURNAL#YYYY-MM-DDTHH:MM:SS#morning) without parsing it into a
+        datetime. Legacy keys go through _from_dynamo_representation.
+        """
+        sk = item["date"]
+        if (
+            len(sk) > 28 and sk.startswith(JOURNAL_PREFIX) and sk[27] == "#"
+            and item.get("feeling") in _FEELINGS and sk[28:] in _DAY_PERIODS
+        ):
+            return {
+                "user": item["user"],
+                "feeling": item["feeling"],
+                "energy": int(item["energy"]),
+                "thoughts": item["thoughts"],
+                "tags": item["tags"],
+                "date": f"{sk[16:18]}-{sk[13:15]}-{sk[8:12]}",
+                "time": sk[28:],
+                "timestamp": sk[19:27]
+            }
+        return cls._from_dynamo_representation(item).to_dict()
+
     def to_dict(self) -> dict:
         return {
             "user": self.user,
@@ -89,7 +140,637 @@ class JournalTableObject:
             "energy": self.energy,
             "thoughts": self.thoughts,
             "tags": self.tags,
-            "date": self.date.strftime("%d-%m-%Y"),
+            "date": to_api_date(self.date),
             "time": self.time.value,
-            "timestamp": self.date.strftime("%H:%M:%S")  # Add time for display
-        }
\ No newline at end of file
+            "timestamp": to_api_time(self.date)  # Add time for display
+        }
+
+
+def _to_number(value: Any) -> Any:
+    """Decimal -> int/float, anything else unchanged"""
+    if isinstance(value, Decimal):
+        return decimal_to_number(value)
+    return value
+
+
+# -------------------------
+# Low-level read path
+# -------------------------
+def _number(text: str):
+    # DynamoDB returns numbers normalised, so only non-integers have . or an exponent
+    if "." in text or "e" in text or "E" in text:
+        return float(text)
+    return int(text)
+
+
+def _deserialize_value(value: dict) -> Any:
+    (tag, data), = value.items()
+    if tag == "S":
+        return data
+    if tag == "N":
+        return _number(data)
+    if tag == "M":
+        return {name: _deserialize_value(member) for name, member in data.items()}
+    if tag == "L":
+        return [_deserialize_value(member) for member in data]
+    if tag == "BOOL":
+        return data
+    if tag == "NULL":
+        return None
+    if tag == "SS" or tag == "BS":
+        return list(data)
+    if tag == "NS":
+        return [_number(member) for member in data]
+    if tag == "B":
+        return data
+    raise TypeError(f"Unknown DynamoDB type: {tag}")
+
+
+def deserialize_item(item: dict, attributes: Optional[set] = None) -> dict:
+    """
+    Converts a low-level client item (wire format) straight to JSON-ready
+    values: numbers become int/float instead of Decimal and sets become
+    lists. With attributes, everything else except the key is skipped.
+
+    Only for reads that end in a response; values are not suitable for
+    writing back, since boto3 rejects floats.
+    """
+    if attributes is None:
+        return {name: _deserialize_value(value) for name, value in item.items()}
+    return {
+        name: _deserialize_value(value) for name, value in item.items()
+        if name in attributes or name == "user" or name == "date"
+    }
+
+
+@dataclass
+class PeriodTableObject:
+    """
+    Period start date for a user.
+
+    PK = user e.g. sophia
+    SK = PERIOD#date(YYYY-MM-DD)  e.g. PERIOD#2025-02-15
+    """
+    SK_PREFIX: ClassVar[str] = PERIOD_PREFIX
+
+    user: str
+    period_date: datetime
+    created_at: str = ""
+    user_age: Optional[int] = None
+    cycle_length: Optional[int] = None
+
+    def _get_pk(self) -> str:
+        return self.user
+
+    def _get_sk(self) -> str:
+        return period_sk(self.period_date)
+
+    def _to_dynamo_representation(self) -> dict:
+        item = {
+            "user": self._get_pk(),
+            "date": self._get_sk(),
+            "period_date": to_api_date(self.period_date),
+            "created_at": self.created_at,
+            SORT_KEY_VERSION_ATTRIBUTE: SORT_KEY_VERSION
+        }
+        # Add optional fields only if provided
+        if self.user_age:
+            item["user_age"] = self.user_age
+        if self.cycle_length:
+            item["cycle_length"] = self.cycle_length
+        return item
+
+    @classmethod
+    def _from_dynamo_representation(cls, item: dict) -> "PeriodTableObject":
+        try:
+            return cls(
+                user=item["user"],
+                period_date=parse_period_sk(item["date"]),
+                created_at=item.get("created_at", ""),
+                user_age=_to_number(item.get("user_age")),
+                cycle_length=_to_number(item.get("cycle_length"))
+            )
+        except Exception as e:
+            logger.error(f"Failed to deserialise DynamoDB item: {e}")
+            raise
+
+    def to_dict(self) -> dict:
+        period_data = {
+            "period_date": to_api_date(self.period_date),
+            "created_at": self.created_at
+        }
+        # Add optional fields only if they exist
+        if self.user_age is not None:
+            period_data["user_age"] = self.user_age
+        if self.cycle_length is not None:
+            period_data["cycle_length"] = self.cycle_length
+        return period_data
+
+
+@dataclass
+class SkinAnalysisTableObject:
+    """
+    Result of one skin analysis.
+
+    PK = user e.g. sophia
+    SK = SKIN#timestamp(YYYY-MM-DDTHH:MM:SS)  e.g. SKIN#2025-02-12T08:30:00
+
+    Reads may use a projection, so every attribute other than the key is
+    optional and to_dict only returns what was actually fetched.
+    """
+    SK_PREFIX: ClassVar[str] = SKIN_PREFIX
+
+    user: str
+    created_at: datetime
+    attributes: dict = field(default_factory=dict)
+
+    def _get_pk(self) -> str:
+        return self.user
+
+    def _get_sk(self) -> str:
+        return skin_sk(self.created_at)
+
+    def _to_dynamo_representation(self) -> dict:
+        return {
+            "user": self._get_pk(),
+            "date": self._get_sk(),
+            "created_at": self.created_at.isoformat(),
+            **self.attributes,
+            SORT_KEY_VERSION_ATTRIBUTE: SORT_KEY_VERSION
+        }
+
+    @classmethod
+    def _from_dynamo_representation(cls, item: dict) -> "SkinAnalysisTableObject":
+        try:
+            attributes = {
+                key: value for key, value in item.items()
+                if key not in ("user", "date", SORT_KEY_VERSION_ATTRIBUTE)
+            }
+            return cls(
+                user=item["user"],
+                created_at=parse_skin_sk(item["date"]),
+                attributes=attributes
+            )
+        except Exception as e:
+            logger.error(f"Failed to deserialise DynamoDB item: {e}")
+            raise
+
+    def to_dict(self) -> dict:
+        return {
+            "user": self.user,
+            "date": self._get_sk(),
+            "created_at": self.created_at.isoformat(),
+            **self.attributes
+        }
+
+
+@dataclass
+class UserProfileTableObject:
+    """
+    Login profile for a user.
+
+    PK = user e.g. sophia
+    SK = USER_PROFILE
+    """
+    SK: ClassVar[str] = "USER_PROFILE"
+
+    user: str
+    display_name: str = ""
+    password_hash: str = ""
+    setup_completed: bool = False
+
+    def _get_pk(self) -> str:
+        return self.user
+
+    def _get_sk(self) -> str:
+        return self.SK
+
+    def _to_dynamo_representation(self) -> dict:
+        return {
+            "user": self._get_pk(),
+            "date": self._get_sk(),
+            "displayName": self.display_name,
+            "passwordHash": self.password_hash,
+            "setupCompleted": self.setup_completed
+        }
+
+    @classmethod
+    def _from_dynamo_representation(cls, item: dict) -> "UserProfileTableObject":
+        return cls(
+            user=item["user"],
+            display_name=item.get("displayName", item["user"]),
+            password_hash=item.get("passwordHash", ""),
+            setup_completed=item.get("setupCompleted", False)
+        )
+
+
+@dataclass
+class JudgeSetupTableObject:
+    """
+    Setup state for a judge account.
+
+    PK = user e.g. sophia
+    SK = JUDGE_SETUP
+    """
+    SK: ClassVar[str] = "JUDGE_SETUP"
+
+    user: str
+    completed: bool = False
+    profile_data: dict = field(default_factory=dict)
+    timestamp: str = ""
+
+    def _get_pk(self) -> str:
+        return self.user
+
+    def _get_sk(self) -> str:
+        return self.SK
+
+    def _to_dynamo_representation(self) -> dict:
+        return {
+            "user": self._get_pk(),
+            "date": self._get_sk(),
+            "completed": self.completed,
+            "profileData": self.profile_data,
+            "timestamp": self.timestamp
+        }
+
+    @classmethod
+    def _from_dynamo_representation(cls, item: dict) -> "JudgeSetupTableObject":
+        return cls(
+            user=item["user"],
+            completed=item.get("completed") == True,
+            profile_data=item.get("profileData", {}),
+            timestamp=item.get("timestamp", "")
+        )
+
+
+@dataclass
+class UserStatsTableObject:
+    """
+    Running aggregate of a user's data, kept up to date by every journal,
+    period and skin write so the wellness agent can read it with one GetItem.
+
+    PK = user e.g. sophia
+    SK = STATS
+
+    version is bumped on every write and used as an optimistic lock;
+    period_version only when the periods change (calendar ETags).
+    cycle caches utils/cycle_engine.py's statistics; period changes clear it.
+    insights holds the journal co-occurrence counts of utils/insights.py.
+    """
+    SK: ClassVar[str] = "STATS"
+    RECENT_JOURNALS: ClassVar[int] = 7
+    RECENT_PERIODS: ClassVar[int] = 2
+
+    user: str
+    version: int = 0
+    period_version: int = 0
+    journal_count: int = 0
+    recent_journals: List[dict] = field(default_factory=list)  # newest first
+    recent_periods: List[str] = field(default_factory=list)  # YYYY-MM-DD, newest first
+    latest_skin: dict = field(default_factory=dict)
+    cycle: dict = field(default_factory=dict)
+    insights: dict = field(default_factory=dict)
+    updated_at: str = ""
+
+    def _get_pk(self) -> str:
+        return self.user
+
+    def _get_sk(self) -> str:
+        return self.SK
+
+    def _to_dynamo_representation(self) -> dict:
+        return {
+            "user": self._get_pk(),
+            "date": self._get_sk(),
+            "version": self.version,
+            "period_version": self.period_version,
+            "journal_count": self.journal_count,
+            "recent_journals": self.recent_journals,
+            "recent_periods": self.recent_periods,
+            "latest_skin": self.latest_skin,
+            "cycle": self.cycle,
+            "insights": self.insights,
+            "updated_at": self.updated_at
+        }
+
+    @classmethod
+    def _from_dynamo_representation(cls, item: dict) -> "UserStatsTableObject":
+        return cls(
+            user=item["user"],
+            version=int(item.get("version", 0)),
+            period_version=int(item.get("period_version", 0)),
+            journal_count=int(item.get("journal_count", 0)),
+            recent_journals=item.get("recent_journals", []),
+            recent_periods=item.get("recent_periods", []),
+            latest_skin=item.get("latest_skin", {}),
+            cycle=item.get("cycle", {}),
+            insights=item.get("insights", {}),
+            updated_at=item.get("updated_at", "")
+        )
+
+    # -------------------------
+    # Incremental updates
+    # -------------------------
+    def add_journal(self, journal_obj: JournalTableObject) -> None:
+        self.journal_count += 1
+        self.recent_journals.append({
+            "timestamp": journal_obj.date.isoformat(),
+            "feeling": journal_obj.feeling.value,
+            "energy": journal_obj.energy,
+            "thoughts": journal_obj.thoughts,
+            "tags": journal_obj.tags
+        })
+        # Entries can be back-dated, so keep the newest by entry date
+        self.recent_journals.sort(
+            key=lambda journal: journal["timestamp"], reverse=True
+        )
+        del self.recent_journals[self.RECENT_JOURNALS:]
+
+    def add_period(self, period_date: datetime) -> None:
+        dates = set(self.recent_periods)
+        dates.add(period_date.strftime("%Y-%m-%d"))
+        self.recent_periods = sorted(dates, reverse=True)[:self.RECENT_PERIODS]
+        self.cycle = {}
+        self.period_version += 1
+
+    def set_periods(self, period_dates: List[datetime]) -> None:
+        dates = {period_date.strftime("%Y-%m-%d") for period_date in period_dates}
+        self.recent_periods = sorted(dates, reverse=True)[:self.RECENT_PERIODS]
+        self.cycle = {}
+        self.period_version += 1
+
+    def set_latest_skin(self, skin_obj: SkinAnalysisTableObject) -> None:
+        created_at = skin_obj.created_at.isoformat()
+        if self.latest_skin.get("created_at", "") > created_at:
+            return
+        self.latest_skin = {
+            "created_at": created_at,
+            "skin_analysis": skin_obj.attributes.get("skin_analysis", {}),
+            "overall_skin_health": skin_obj.attributes.get("overall_skin_health"),
+            "concerns_detected": skin_obj.attributes.get("concerns_detected", [])
+        }
+
+
+@dataclass
+class ArchiveManifestTableObject:
+    """
+    Where a user's archived records live in S3 (see utils/archive.py).
+
+    PK = user e.g. sophia
+    SK = ARCHIVE_MANIFEST
+
+    Records of an archived type whose date is before `horizon`
+    (YYYY-MM-DD) are kept in S3, one object per type and year:
+    objects = {"journal": {"2023": {"key": ..., "count": 312}}, "skin": {...}}
+    """
+    SK: ClassVar[str] = "ARCHIVE_MANIFEST"
+
+    user: str
+    horizon: str = ""
+    objects: dict = field(default_factory=dict)
+    updated_at: str = ""
+
+    def _get_pk(self) -> str:
+        return self.user
+
+    def _get_sk(self) -> str:
+        return self.SK
+
+    def _to_dynamo_representation(self) -> dict:
+        return {
+            "user": self._get_pk(),
+            "date": self._get_sk(),
+            "horizon": self.horizon,
+            "objects": self.objects,
+            "updated_at": self.updated_at
+        }
+
+    @classmethod
+    def _from_dynamo_representation(cls, item: dict) -> "ArchiveManifestTableObject":
+        return cls(
+            user=item["user"],
+            horizon=item.get("horizon", ""),
+            objects=item.get("objects", {}),
+            updated_at=item.get("updated_at", "")
+        )
+
+    def years(self, kind: str) -> List[int]:
+        return sorted(int(year) for year in self.objects.get(kind, {}))
+
+
+@dataclass
+class SearchIndexTableObject:
+    """
+    Marks a user's journal search index as complete (see utils/search_index.py).
+
+    PK = user e.g. sophia
+    SK = SEARCH_INDEX
+
+    Written once every existing entry has been indexed; until then
+    searches scan the user's history instead of the index.
+    """
+    SK: ClassVar[str] = "SEARCH_INDEX"
+
+    user: str
+    version: int = 0
+    entry_count: int = 0
+    updated_at: str = ""
+
+    def _get_pk(self) -> str:
+        return self.user
+
+    def _get_sk(self) -> str:
+        return self.SK
+
+    def _to_dynamo_representation(self) -> dict:
+        return {
+            "user": self._get_pk(),
+            "date": self._get_sk(),
+            "version": self.version,
+            "entry_count": self.entry_count,
+            "updated_at": self.updated_at
+        }
+
+    @classmethod
+    def _from_dynamo_representation(cls, item: dict) -> "SearchIndexTableObject":
+        return cls(
+            user=item["user"],
+            version=int(item.get("version", 0)),
+            entry_count=int(item.get("entry_count", 0)),
+            updated_at=item.get("updated_at", "")
+        )
+
+
+@dataclass
+class CorrelationsTableObject:
+    """
+    Daily mood/energy/skin series and their cached analysis (see
+    utils/correlations.py).
+
+    PK = user e.g. sophia
+    SK = CORRELATIONS
+
+    days = {"YYYY-MM-DD": {"entries": n, "energy": sum, "mood": sum,
+    "skin": {metric: sum}, "skin_counts": {metric: n}}} over the last
+    WINDOW_DAYS. stats_version is the STATS version the series is up to
+    date with; summary_stale is set when a write changed the series after
+    the summary was computed.
+    """
+    SK: ClassVar[str] = "CORRELATIONS"
+
+    user: str
+    version: int = 0
+    stats_version: int = 0
+    days: dict = field(default_factory=dict)
+    summary: dict = field(default_factory=dict)
+    summary_stale: bool = False
+    updated_at: str = ""
+
+    def _get_pk(self) -> str:
+        return self.user
+
+    def _get_sk(self) -> str:
+        return self.SK
+
+    def _to_dynamo_representation(self) -> dict:
+        return {
+            "user": self._get_pk(),
+            "date": self._get_sk(),
+            "version": self.version,
+            "stats_version": self.stats_version,
+            "days": self.days,
+            "summary": self.summary,
+            "summary_stale": self.summary_stale,
+            "updated_at": self.updated_at
+        }
+
+    @classmethod
+    def _from_dynamo_representation(cls, item: dict) -> "CorrelationsTableObject":
+        return cls(
+            user=item["user"],
+            version=int(item.get("version", 0)),
+            stats_version=int(item.get("stats_version", 0)),
+            days=item.get("days", {}),
+            summary=item.get("summary", {}),
+            summary_stale=bool(item.get("summary_stale", False)),
+            updated_at=item.get("updated_at", "")
+        )
+
+
+@dataclass
+class AnalysisCacheTableObject:
+    """
+    A cached skin analysis result (see utils/analysis_cache.py).
+
+    PK = ANALYSIS_CACHE#<digest of image ETag + prompt context>
+    SK = RESULT
+
+    expires_at (epoch seconds) is the table's TTL attribute.
+    """
+    PK_PREFIX: ClassVar[str] = "ANALYSIS_CACHE#"
+    SK: ClassVar[str] = "RESULT"
+
+    digest: str
+    result: dict = field(default_factory=dict)
+    expires_at: int = 0
+    created_at: str = ""
+
+    @classmethod
+    def key(cls, digest: str) -> str:
+        return f"{cls.PK_PREFIX}{digest}"
+
+    def _get_pk(self) -> str:
+        return self.key(self.digest)
+
+    def _get_sk(self) -> str:
+        return self.SK
+
+    def _to_dynamo_representation(self) -> dict:
+        return {
+            "user": self._get_pk(),
+            "date": self._get_sk(),
+            "result": self.result,
+            "expires_at": self.expires_at,
+            "created_at": self.created_at
+        }
+
+    @classmethod
+    def _from_dynamo_representation(cls, item: dict) -> "AnalysisCacheTableObject":
+        return cls(
+            digest=item["user"][len(cls.PK_PREFIX):],
+            result=item.get("result", {}),
+            expires_at=int(item.get("expires_at", 0)),
+            created_at=item.get("created_at", "")
+        )
+
+
+@dataclass
+class AnalysisJobTableObject:
+    """
+    An asynchronous skin analysis of one upload (see utils/analysis_jobs.py).
+
+    PK = ANALYSIS_JOB#<s3Key>
+    SK = JOB
+
+    status is pending -> processing -> complete | failed. context holds
+    the prompt fields sent with the upload request; skin_sk is the SKIN#
+    record the result is saved to, reserved before saving. updated_at
+    and expires_at (the table's TTL attribute) are epoch seconds.
+    """
+    PK_PREFIX: ClassVar[str] = "ANALYSIS_JOB#"
+    SK: ClassVar[str] = "JOB"
+
+    s3_key: str
+    user: str
+    status: str = "pending"
+    context: dict = field(default_factory=dict)
+    attempts: int = 0
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    skin_sk: Optional[str] = None
+    created_at: str = ""
+    updated_at: int = 0
+    expires_at: int = 0
+
+    @classmethod
+    def key(cls, s3_key: str) -> str:
+        return f"{cls.PK_PREFIX}{s3_key}"
+
+    def _get_pk(self) -> str:
+        return self.key(self.s3_key)
+
+    def _get_sk(self) -> str:
+        return self.SK
+
+    def _to_dynamo_representation(self) -> dict:
+        return {
+            "user": self._get_pk(),
+            "date": self._get_sk(),
+            "owner": self.user,
+            "status": self.status,
+            "context": self.context,
+            "attempts": self.attempts,
+            "result": self.result,
+            "error": self.error,
+            "skin_sk": self.skin_sk,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "expires_at": self.expires_at
+        }
+
+    @classmethod
+    def _from_dynamo_representation(cls, item: dict) -> "AnalysisJobTableObject":
+        return cls(
+            s3_key=item["user"][len(cls.PK_PREFIX):],
+            user=item.get("owner", ""),
+            status=item.get("status", "pending"),
+            context=item.get("context") or {},
+            attempts=int(item.get("attempts", 0)),
+            result=item.get("result"),
+            error=item.get("error"),
+            skin_sk=item.get("skin_sk"),
+            created_at=item.get("created_at", ""),
+            updated_at=int(item.get("updated_at", 0)),
+            expires_at=int(item.get("expires_at", 0))
+        )
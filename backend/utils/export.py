@@ -0,0 +1,239 @@
+"""
+Full data export for one user.
+
+export_user pages through the user's journal, period and skin records
+(table first, S3 archive for archived years), turns each into a flat
+row as it arrives and streams the rows into an S3 object with a
+multipart upload, so memory stays at about one query page plus one
+upload part whatever the size of the history. The result is a
+presigned download URL.
+
+Formats:
+    ndjson  gzip NDJSON, one {"type": ..., ...} object per line
+    csv     one CSV with a "type" column; tags/concerns are ";"-joined and
+            the rest of a skin analysis is a JSON "analysis" column
+
+Journal and period rows use the fields bulk_import accepts, so an
+export can be imported again.
+"""
+import csv
+import gzip
+import io
+import os
+from datetime import datetime
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from boto3.dynamodb.conditions import Key
+
+from journal.types import DayPeriod
+from utils.archive import get_manifest, iter_archived
+from utils.dynamo_helper import (
+    JournalTableObject,
+    PeriodTableObject,
+    SkinAnalysisTableObject,
+)
+from utils.logger import select_powertools_logger
+from utils.repository import GlowCycleRepository
+from utils.s3_helper import S3, ContentType
+from utils.serialization import dumps
+from utils.sort_keys import LEGACY_JOURNAL_UPPER, LEGACY_READS, to_api_date
+
+logger = select_powertools_logger("aws-helpers-export")
+
+EXPORT_BUCKET = os.environ.get("EXPORT_BUCKET_NAME", "")
+EXPORT_URL_EXPIRY = int(os.environ.get("EXPORT_URL_EXPIRY", "3600"))  # seconds
+
+# Items per DynamoDB page while exporting
+EXPORT_PAGE_SIZE = 500
+
+FORMATS = ("ndjson", "csv")
+
+CSV_COLUMNS = [
+    "type", "date", "time", "night", "feeling", "energy", "thoughts", "tags",
+    "cycle_length", "user_age", "created_at",
+    "overall_skin_health", "concerns_detected", "analysis",
+]
+
+s3_helper = S3()
+
+
+# -------------------------
+# Rows
+# -------------------------
+
+def journal_row(journal_obj: JournalTableObject) -> dict:
+    return {
+        "type": "journal",
+        "date": to_api_date(journal_obj.date),
+        "time": journal_obj.date.strftime("%H:%M:%S"),
+        "night": journal_obj.time == DayPeriod.night,
+        "feeling": journal_obj.feeling.value,
+        "energy": journal_obj.energy,
+        "thoughts": journal_obj.thoughts,
+        "tags": journal_obj.tags,
+    }
+
+
+def period_row(period_obj: PeriodTableObject) -> dict:
+    return {
+        "type": "period",
+        "date": to_api_date(period_obj.period_date),
+        "cycle_length": period_obj.cycle_length,
+        "user_age": period_obj.user_age,
+        "created_at": period_obj.created_at,
+    }
+
+
+def skin_row(skin_obj: SkinAnalysisTableObject) -> dict:
+    return {
+        "type": "skin",
+        "date": to_api_date(skin_obj.created_at),
+        "time": skin_obj.created_at.strftime("%H:%M:%S"),
+        **skin_obj.attributes,
+        "created_at": skin_obj.created_at.isoformat(),
+    }
+
+
+def csv_row(row: dict) -> dict:
+    """Flattens a row onto CSV_COLUMNS"""
+    flat = {}
+    analysis = {}
+    for name, value in row.items():
+        if name in ("tags", "concerns_detected") and isinstance(value, list):
+            value = ";".join(str(item) for item in value)
+        if name in CSV_COLUMNS:
+            flat[name] = "" if value is None else value
+        else:
+            analysis[name] = value
+    if analysis:
+        flat["analysis"] = dumps(analysis, separators=(",", ":"))
+    return flat
+
+
+# -------------------------
+# Reading
+# -------------------------
+
+# Exported record types: (record class, row builder)
+EXPORTED_TYPES: Tuple[Tuple[type, Callable[..., dict]], ...] = (
+    (JournalTableObject, journal_row),
+    (PeriodTableObject, period_row),
+    (SkinAnalysisTableObject, skin_row),
+)
+
+
+def _rows(
+    repository: GlowCycleRepository,
+    user: str,
+    record_cls,
+    to_row,
+    horizon: Optional[str],
+) -> Iterator[dict]:
+    """Rows of one record type, oldest first: archive, legacy keys, table"""
+    def convert(items):
+        for item in items:
+            try:
+                yield to_row(record_cls._from_dynamo_representation(item))
+            except Exception as e:
+                logger.warning(
+                    f"Skipping malformed item: {item.get('date', 'unknown')}, "
+                    f"error: {str(e)}"
+                )
+
+    archived = record_cls in (JournalTableObject, SkinAnalysisTableObject)
+    if archived and horizon:
+        # Records below the horizon still in the table (a partly finished
+        # archive run) are exported from the table, not the archive
+        prefix = record_cls.SK_PREFIX
+        below = Key("date").between(prefix, f"{prefix}{horizon}")
+        hot_items = repository.iter_items(
+            user, sort_condition=below, attributes=["date"]
+        )
+        hot_keys = [item["date"] for item in hot_items]
+        old_items = iter_archived(repository, user, record_cls, exclude=hot_keys)
+        yield from convert(old_items)
+
+    if record_cls is JournalTableObject and LEGACY_READS:
+        yield from convert(repository.iter_items(
+            user,
+            sort_condition=Key("date").lt(LEGACY_JOURNAL_UPPER),
+            page_size=EXPORT_PAGE_SIZE,
+            fast=True
+        ))
+
+    yield from convert(repository.iter_items(
+        user,
+        sort_condition=Key("date").begins_with(record_cls.SK_PREFIX),
+        page_size=EXPORT_PAGE_SIZE,
+        fast=True
+    ))
+
+
+def iter_rows(repository: GlowCycleRepository, user: str) -> Iterator[dict]:
+    """Every exported row of the user, one record type after another"""
+    manifest = get_manifest(repository, user)
+    horizon = manifest.horizon if manifest else None
+    for record_cls, to_row in EXPORTED_TYPES:
+        yield from _rows(repository, user, record_cls, to_row, horizon)
+
+
+# -------------------------
+# Export
+# -------------------------
+
+def export_key(user: str, fmt: str, now: datetime) -> str:
+    extension = "ndjson.gz" if fmt == "ndjson" else "csv"
+    return f"exports/{user}/{now.strftime('%Y%m%dT%H%M%S')}.{extension}"
+
+
+def export_user(
+    repository: GlowCycleRepository, user: str, fmt: str = "ndjson"
+) -> dict:
+    """
+    Streams the user's data to S3 and returns the object key, a
+    presigned URL and the number of rows per type.
+    """
+    if not EXPORT_BUCKET:
+        raise ValueError("EXPORT_BUCKET_NAME is not set")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}. Expected ndjson or csv")
+
+    key = export_key(user, fmt, datetime.now())
+    counts: Dict[str, int] = {"journal": 0, "period": 0, "skin": 0}
+    content_type = (
+        ContentType.gzip_content.value
+        if fmt == "ndjson"
+        else ContentType.csv_content.value
+    )
+
+    with s3_helper.open_multipart(EXPORT_BUCKET, key, content_type) as upload:
+        if fmt == "ndjson":
+            with gzip.GzipFile(fileobj=upload, mode="wb") as compressed:
+                for row in iter_rows(repository, user):
+                    line = dumps(row, separators=(",", ":")).encode("utf-8") + b"\n"
+                    compressed.write(line)
+                    counts[row["type"]] += 1
+        else:
+            text = io.TextIOWrapper(
+                upload, encoding="utf-8", newline="", write_through=True
+            )
+            writer = csv.DictWriter(text, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+            writer.writeheader()
+            for row in iter_rows(repository, user):
+                writer.writerow(csv_row(row))
+                counts[row["type"]] += 1
+            text.flush()
+            text.detach()
+        size = upload.size
+
+    logger.info(f"Exported {counts} for {user} to {key} ({size} bytes)")
+    return {
+        "key": key,
+        "format": fmt,
+        "records": counts,
+        "size": size,
+        "url": s3_helper.get_presigned_url(
+            EXPORT_BUCKET, key, expires_in=EXPORT_URL_EXPIRY
+        ),
+        "expires_in": EXPORT_URL_EXPIRY,
+    }
@@ -0,0 +1,320 @@
+"""
+Selfie preprocessing for skin analysis.
+
+Phone photos are several megapixels, while the model only needs the
+face at a moderate resolution. normalise_image turns an upload into a
+small JPEG: rotated upright from its EXIF orientation, cropped to the
+Rekognition face box plus a margin, shrunk to MAX_EDGE on its longest
+side, and re-encoded at JPEG_QUALITY with the metadata stripped.
+
+The result is cached in S3 outside selfies/, so writing it doesn't
+trigger the analysis worker (selfies/<id>.jpg ->
+analysis/<id>-<edge>q<quality>.jpg), and repeat analyses of the same
+upload skip the decode. The key includes
+the settings, so changing them never serves a stale image. The fetch
+(fetch_analysis_source) and the normalising (prepare_analysis_image)
+are separate steps so the download can start before the face box is
+known.
+
+prescreen measures brightness, sharpness and resolution locally so
+photos that are obviously unusable are rejected without a Rekognition
+call. store_thumbnail writes the small image the skin history shows
+(thumbnails/<id>-<edge>.webp).
+"""
+import io
+import math
+import os
+import threading
+from typing import Optional, Tuple
+
+from botocore.exceptions import ClientError
+from PIL import Image, ImageFilter, ImageOps, ImageStat, features
+
+from utils.logger import select_powertools_logger
+from utils.s3_helper import S3, ContentType, S3Location
+
+logger = select_powertools_logger("aws-helpers-image-processing")
+
+MAX_EDGE = int(os.environ.get("ANALYSIS_IMAGE_MAX_EDGE", "1024"))
+JPEG_QUALITY = int(os.environ.get("ANALYSIS_IMAGE_QUALITY", "85"))
+# Margin around the face box on each side, as a fraction of the box size,
+# so forehead, jawline and neck stay in frame
+FACE_MARGIN = float(os.environ.get("ANALYSIS_FACE_MARGIN", "0.35"))
+
+# Pre-screen: obvious failures are rejected before any paid API call.
+# Thresholds are deliberately loose; Rekognition's quality scores still
+# decide the borderline photos.
+PRESCREEN_EDGE = 512
+MIN_IMAGE_EDGE = int(os.environ.get("ANALYSIS_MIN_IMAGE_EDGE", "320"))
+DARK_MEAN_LUMA = float(os.environ.get("ANALYSIS_DARK_MEAN_LUMA", "40"))
+DARK_BRIGHT_LUMA = 80  # ...and 95% of the pixels below this
+BLURRY_LAPLACIAN_VARIANCE = float(
+    os.environ.get("ANALYSIS_BLURRY_LAPLACIAN_VARIANCE", "5")
+)
+
+TOO_SMALL = "too_small"
+TOO_DARK = "too_dark"
+TOO_BLURRY = "too_blurry"
+
+_LAPLACIAN = ImageFilter.Kernel(
+    (3, 3), [0, 1, 0, 1, -4, 1, 0, 1, 0], scale=1, offset=128
+)
+
+NORMALISED_PREFIX = "analysis/"
+
+# History thumbnails, made from the normalised (face-cropped) image. They
+# live outside selfies/, so writing one doesn't trigger the analysis worker.
+THUMBNAIL_PREFIX = "thumbnails/"
+THUMBNAIL_EDGE = int(os.environ.get("ANALYSIS_THUMBNAIL_EDGE", "192"))
+THUMBNAIL_QUALITY = int(os.environ.get("ANALYSIS_THUMBNAIL_QUALITY", "70"))
+# The key includes the settings, so a thumbnail never changes once written
+THUMBNAIL_CACHE_CONTROL = "private, max-age=604800, immutable"
+_THUMBNAIL_WEBP = features.check("webp")
+
+s3_helper = S3()
+
+
+def normalised_key(
+    s3_key: str, max_edge: int = MAX_EDGE, quality: int = JPEG_QUALITY
+) -> str:
+    name = s3_key.rsplit("/", 1)[-1]
+    stem = name.rsplit(".", 1)[0] if "." in name else name
+    return f"{NORMALISED_PREFIX}{stem}-{max_edge}q{quality}.jpg"
+
+
+def is_normalised_key(s3_key: str) -> bool:
+    return s3_key.startswith(NORMALISED_PREFIX)
+
+
+def crop_box(
+    bounding_box: dict, width: int, height: int, margin: float = FACE_MARGIN
+) -> Optional[tuple]:
+    """
+    Pixel (left, top, right, bottom) of a Rekognition BoundingBox (ratios
+    of the upright image) widened by margin, clamped to the image. None
+    if the box is missing or degenerate.
+    """
+    try:
+        left = float(bounding_box["Left"])
+        top = float(bounding_box["Top"])
+        box_width = float(bounding_box["Width"])
+        box_height = float(bounding_box["Height"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if box_width <= 0 or box_height <= 0:
+        return None
+
+    box = (
+        max(0, math.floor((left - box_width * margin) * width)),
+        max(0, math.floor((top - box_height * margin) * height)),
+        min(width, math.ceil((left + box_width * (1 + margin)) * width)),
+        min(height, math.ceil((top + box_height * (1 + margin)) * height)),
+    )
+    if box[2] - box[0] < 2 or box[3] - box[1] < 2:
+        return None
+    return box
+
+
+def normalise_image(
+    image_bytes: bytes,
+    bounding_box: Optional[dict] = None,
+    max_edge: int = MAX_EDGE,
+    quality: int = JPEG_QUALITY,
+) -> bytes:
+    """Upright, face-cropped, downsized JPEG of an uploaded image"""
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        if image.format == "JPEG":
+            # Let the decoder skip detail the output won't keep (DCT scaling)
+            crop_fraction = 1.0
+            if bounding_box:
+                try:
+                    face = max(
+                        float(bounding_box["Width"]), float(bounding_box["Height"])
+                    )
+                    crop_fraction = min(1.0, face * (1 + 2 * FACE_MARGIN))
+                except (KeyError, TypeError, ValueError):
+                    crop_fraction = 1.0
+            scale = max_edge / (max(image.size) * crop_fraction)
+            if scale < 1:
+                size = (math.ceil(image.width * scale), math.ceil(image.height * scale))
+                image.draft("RGB", size)
+
+        # Rekognition reports the face box on the EXIF-corrected image
+        upright = ImageOps.exif_transpose(image)
+        if bounding_box:
+            box = crop_box(bounding_box, upright.width, upright.height)
+            if box:
+                upright = upright.crop(box)
+
+        upright = upright.convert("RGB")
+        upright.thumbnail((max_edge, max_edge), Image.LANCZOS)
+
+        output = io.BytesIO()
+        upright.save(output, format="JPEG", quality=quality, optimize=True)
+        return output.getvalue()
+
+
+def _percentile(histogram: list, fraction: float) -> int:
+    target = fraction * sum(histogram)
+    seen = 0
+    for value, count in enumerate(histogram):
+        seen += count
+        if seen >= target:
+            return value
+    return len(histogram) - 1
+
+
+def prescreen(image_bytes: bytes) -> Tuple[Optional[str], dict]:
+    """
+    (rejection, metrics) for an upload, from a greyscale copy at most
+    PRESCREEN_EDGE on its longest side: its resolution, the mean and
+    95th percentile of the luminance histogram, and the variance of the
+    Laplacian as a sharpness score. rejection is TOO_SMALL, TOO_DARK,
+    TOO_BLURRY or None. Images Pillow can't decode pass, so Rekognition
+    decides on them as before.
+    """
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            width, height = image.size
+            if image.format == "JPEG":
+                image.draft("L", (PRESCREEN_EDGE, PRESCREEN_EDGE))
+            grey = image.convert("L")
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        logger.warning(f"Pre-screen could not decode the image: {str(e)}")
+        return None, {}
+
+    grey.thumbnail((PRESCREEN_EDGE, PRESCREEN_EDGE))
+    histogram = grey.histogram()
+    laplacian = grey.filter(_LAPLACIAN)
+    # The filter leaves the outermost pixels unfiltered
+    laplacian = laplacian.crop(
+        (1, 1, max(laplacian.width - 1, 2), max(laplacian.height - 1, 2))
+    )
+
+    metrics = {
+        "width": width,
+        "height": height,
+        "mean_luma": round(ImageStat.Stat(grey).mean[0], 1),
+        "bright_luma": _percentile(histogram, 0.95),
+        "sharpness": round(ImageStat.Stat(laplacian).var[0], 1),
+    }
+    if min(width, height) < MIN_IMAGE_EDGE:
+        return TOO_SMALL, metrics
+    if (
+        metrics["mean_luma"] < DARK_MEAN_LUMA
+        and metrics["bright_luma"] < DARK_BRIGHT_LUMA
+    ):
+        return TOO_DARK, metrics
+    if metrics["sharpness"] < BLURRY_LAPLACIAN_VARIANCE:
+        return TOO_BLURRY, metrics
+    return None, metrics
+
+
+def _get_object(
+    bucket: str, s3_key: str, cancelled: Optional[threading.Event]
+) -> Optional[bytes]:
+    response = s3_helper.client.get_object(Bucket=bucket, Key=s3_key)
+    if cancelled is not None and cancelled.is_set():
+        # Headers are in; don't download a body nobody will use
+        response["Body"].close()
+        return None
+    return response["Body"].read()
+
+
+def fetch_analysis_source(
+    bucket: str,
+    s3_key: str,
+    cancelled: Optional[threading.Event] = None,
+) -> Optional[Tuple[bytes, bool]]:
+    """
+    (bytes, is_normalised) for an upload: the cached normalised image if
+    there is one, else the original. Needs no face box, so it can run
+    alongside other lookups; returns None once cancelled is set.
+    """
+    if cancelled is not None and cancelled.is_set():
+        return None
+    try:
+        cached = _get_object(bucket, normalised_key(s3_key), cancelled)
+        return None if cached is None else (cached, True)
+    except ClientError as e:
+        if e.response["Error"]["Code"] not in ("NoSuchKey", "404", "AccessDenied"):
+            raise
+
+    if cancelled is not None and cancelled.is_set():
+        return None
+    original = _get_object(bucket, s3_key, cancelled)
+    return None if original is None else (original, False)
+
+
+def prepare_analysis_image(
+    bucket: str,
+    s3_key: str,
+    source: Tuple[bytes, bool],
+    bounding_box: Optional[dict] = None,
+) -> bytes:
+    """
+    The normalised image from fetch_analysis_source's result, made and
+    stored on first use. Falls back to the original bytes if the upload
+    can't be decoded, so the analysis still runs.
+    """
+    image_bytes, is_normalised = source
+    if is_normalised:
+        return image_bytes
+
+    try:
+        normalised = normalise_image(image_bytes, bounding_box)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        logger.warning(f"Could not normalise {s3_key}, sending the original: {str(e)}")
+        return image_bytes
+
+    logger.info(f"Normalised {s3_key}: {len(image_bytes)} -> {len(normalised)} bytes")
+    s3_helper.save_jpg_to_s3(normalised, S3Location(bucket, normalised_key(s3_key)))
+    return normalised
+
+
+def thumbnail_key(s3_key: str, edge: int = THUMBNAIL_EDGE) -> str:
+    name = s3_key.rsplit("/", 1)[-1]
+    stem = name.rsplit(".", 1)[0] if "." in name else name
+    return f"{THUMBNAIL_PREFIX}{stem}-{edge}.{'webp' if _THUMBNAIL_WEBP else 'jpg'}"
+
+
+def make_thumbnail(
+    image_bytes: bytes, edge: int = THUMBNAIL_EDGE, quality: int = THUMBNAIL_QUALITY
+) -> bytes:
+    """WebP (JPEG if Pillow lacks WebP support) at most edge on its longest side"""
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        if image.format == "JPEG":
+            image.draft("RGB", (edge, edge))
+        small = ImageOps.exif_transpose(image).convert("RGB")
+    small.thumbnail((edge, edge), Image.LANCZOS)
+
+    output = io.BytesIO()
+    if _THUMBNAIL_WEBP:
+        small.save(output, format="WEBP", quality=quality, method=4)
+    else:
+        small.save(output, format="JPEG", quality=quality, optimize=True)
+    return output.getvalue()
+
+
+def store_thumbnail(bucket: str, s3_key: str, image_bytes: bytes) -> Optional[str]:
+    """
+    Writes the history thumbnail of an upload from its normalised image.
+    Returns the thumbnail's key, or None if it couldn't be made or saved
+    (the history then shows no picture for this analysis).
+    """
+    key = thumbnail_key(s3_key)
+    try:
+        thumbnail = make_thumbnail(image_bytes)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        logger.warning(f"Could not make a thumbnail of {s3_key}: {str(e)}")
+        return None
+
+    saved = s3_helper.save_image_to_s3(
+        thumbnail,
+        S3Location(bucket, key),
+        content_type=(
+            ContentType.webp_content if _THUMBNAIL_WEBP else ContentType.jpeg_content
+        ),
+        cache_control=THUMBNAIL_CACHE_CONTROL,
+    )
+    return key if saved is not None else None
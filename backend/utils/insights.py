@@ -0,0 +1,237 @@
+"""
+Long-horizon journal statistics, kept in the STATS item ("insights").
+
+Counts are updated by every save_entry inside its write_with_stats
+transaction, so reading them is the GetItem the wellness agent already
+does:
+
+    tags                {tag: entries}
+    feelings            {feeling: entries}
+    tag_feeling         {tag: {feeling: entries}}
+    tag_phase           {tag: {phase: entries}}
+    feeling_phase       {feeling: {phase: entries}}
+    phase_feeling_tag   {phase: {feeling: {tag: entries}}}
+    energy_by_phase     {phase: {"sum": total energy, "count": entries}}
+
+The whole map lives in the STATS item, which every write rewrites under
+its version lock and which DynamoDB caps at 400 KB, so only feelings
+and phases (fixed sets) are unbounded. Tags are free text: at most
+MAX_TAGS of them are tracked, cut to MAX_TAG_LENGTH characters, and a
+tag not tracked yet takes the place of the least used one together
+with its rows in the other maps. That bounds the insights to roughly
+MAX_TAGS x (1 + feelings x (1 + phases) + phases) counters.
+
+An entry's phase is taken when it is written, from the periods STATS
+knows about (the last two plus the cached cycle statistics). A full
+rebuild (rebuild_stats, e.g. after a bulk import) re-derives every
+phase from the complete period history.
+"""
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from utils.cycle_engine import CycleStats, compute_cycle_stats, project_calendar
+from utils.dynamo_helper import JournalTableObject, UserStatsTableObject
+from utils.serialization import to_json_ready
+from utils.sort_keys import DATE_FORMAT
+
+# Bump when the structure changes; STATS items with an older version are rebuilt
+INSIGHTS_VERSION = 2
+
+UNKNOWN_PHASE = "unknown"
+TOP_TAGS = 5
+MAX_TAGS = 50
+MAX_TAG_LENGTH = 40
+
+
+def empty_insights() -> dict:
+    return {
+        "version": INSIGHTS_VERSION,
+        "entries": 0,
+        "tags": {},
+        "feelings": {},
+        "tag_feeling": {},
+        "tag_phase": {},
+        "feeling_phase": {},
+        "phase_feeling_tag": {},
+        "energy_by_phase": {},
+    }
+
+
+def is_current(insights: dict) -> bool:
+    return bool(insights) and insights.get("version") == INSIGHTS_VERSION
+
+
+def _increment(counts: dict, key: str, amount=1) -> None:
+    counts[key] = counts.get(key, 0) + amount
+
+
+def _forget_tag(insights: dict, tag: str) -> None:
+    insights["tags"].pop(tag, None)
+    insights["tag_feeling"].pop(tag, None)
+    insights["tag_phase"].pop(tag, None)
+    for feelings in insights["phase_feeling_tag"].values():
+        for feeling_tags in feelings.values():
+            feeling_tags.pop(tag, None)
+
+
+def _trim_tags(insights: dict, keep: Iterable[str]) -> None:
+    """Drops the least used tags beyond MAX_TAGS, never one of keep if avoidable"""
+    keep = set(keep)
+    while len(insights["tags"]) > MAX_TAGS:
+        candidates = [tag for tag in insights["tags"] if tag not in keep]
+        least_used = min(
+            candidates or insights["tags"],
+            key=lambda tag: (insights["tags"][tag], tag)
+        )
+        _forget_tag(insights, least_used)
+
+
+def count_journal(insights: dict, journal_obj: JournalTableObject, phase: str) -> None:
+    """Adds one entry to the counts"""
+    feeling = journal_obj.feeling.value
+    tags = sorted({tag[:MAX_TAG_LENGTH] for tag in journal_obj.tags or [] if tag})
+
+    insights["entries"] = insights.get("entries", 0) + 1
+    _increment(insights["feelings"], feeling)
+    _increment(insights["feeling_phase"].setdefault(feeling, {}), phase)
+
+    energy = insights["energy_by_phase"].setdefault(phase, {"sum": 0, "count": 0})
+    energy["sum"] += journal_obj.energy
+    energy["count"] += 1
+
+    phase_tags = (
+        insights["phase_feeling_tag"].setdefault(phase, {}).setdefault(feeling, {})
+    )
+    for tag in tags:
+        _increment(insights["tags"], tag)
+        _increment(insights["tag_feeling"].setdefault(tag, {}), feeling)
+        _increment(insights["tag_phase"].setdefault(tag, {}), phase)
+        _increment(phase_tags, tag)
+    _trim_tags(insights, tags)
+
+
+def add_journal(stats: UserStatsTableObject, journal_obj: JournalTableObject) -> None:
+    """
+    write_with_stats mutation for a new entry: the recent-entries
+    summary plus the insight counts. A STATS item without current
+    insights is left for get_insights to rebuild from the history.
+    """
+    stats.add_journal(journal_obj)
+    if not is_current(stats.insights):
+        if stats.journal_count > 1:
+            return
+        stats.insights = empty_insights()
+    count_journal(stats.insights, journal_obj, entry_phase(stats, journal_obj.date))
+
+
+# -------------------------
+# Phases
+# -------------------------
+
+def journal_phases(
+    period_dates: List[datetime], cycle_stats: CycleStats, days: Iterable[datetime]
+) -> Dict[str, str]:
+    """Cycle phase (YYYY-MM-DD -> phase) of each given day, in one calendar pass"""
+    days = list(days)
+    if not days or not period_dates:
+        return {}
+    calendar = project_calendar(period_dates, cycle_stats, min(days), max(days))
+    return {day["date"]: day["cycle_phase"] for day in calendar}
+
+
+def entry_phase(stats: UserStatsTableObject, entry_date: datetime) -> str:
+    """Phase of a new entry's date, from what STATS knows about the cycle"""
+    period_dates = [
+        datetime.strptime(period_date, DATE_FORMAT)
+        for period_date in stats.recent_periods
+    ]
+    cycle_stats = CycleStats.from_dict(stats.cycle) if stats.cycle else CycleStats()
+    phases = journal_phases(period_dates, cycle_stats, [entry_date])
+    return phases.get(entry_date.strftime(DATE_FORMAT), UNKNOWN_PHASE)
+
+
+def build_insights(
+    journal_objs: Iterable[JournalTableObject], period_dates: List[datetime]
+) -> dict:
+    """Insights computed from scratch, for rebuild_stats"""
+    journal_objs = list(journal_objs)
+    phases = journal_phases(
+        period_dates,
+        compute_cycle_stats(period_dates),
+        (journal_obj.date for journal_obj in journal_objs)
+    )
+    insights = empty_insights()
+    for journal_obj in journal_objs:
+        phase = phases.get(journal_obj.date.strftime(DATE_FORMAT), UNKNOWN_PHASE)
+        count_journal(insights, journal_obj, phase)
+    return insights
+
+
+# -------------------------
+# Reading
+# -------------------------
+
+def _top(counts: dict, limit: int = TOP_TAGS) -> List[dict]:
+    return [
+        {"name": name, "count": count}
+        for name, count in Counter(counts).most_common(limit)
+    ]
+
+
+def phase_summary(insights: dict, phase: str) -> dict:
+    """Typical energy, feeling and tags of the user in one phase"""
+    insights = to_json_ready(insights)
+    energy = insights.get("energy_by_phase", {}).get(phase, {})
+    feelings = {
+        feeling: phases[phase]
+        for feeling, phases in insights.get("feeling_phase", {}).items()
+        if phase in phases
+    }
+    tags = Counter()
+    for feeling_tags in insights.get("phase_feeling_tag", {}).get(phase, {}).values():
+        tags.update(feeling_tags)
+    return {
+        "phase": phase,
+        "entries": energy.get("count", 0),
+        "avg_energy": (
+            round(energy["sum"] / energy["count"], 1) if energy.get("count") else None
+        ),
+        "dominant_feeling": (
+            Counter(feelings).most_common(1)[0][0] if feelings else None
+        ),
+        "top_tags": _top(tags),
+    }
+
+
+def summarize(
+    insights: dict, feeling: Optional[str] = None, phase: Optional[str] = None
+) -> dict:
+    """
+    Response shape of GET /journal/insights. With feeling and/or phase,
+    co_occurring_tags are the tags of entries with that feeling in that phase.
+    """
+    insights = to_json_ready(insights)
+    phases = sorted(insights.get("energy_by_phase", {}))
+    result = {
+        "entries": insights.get("entries", 0),
+        "top_tags": _top(insights.get("tags", {})),
+        "feelings": insights.get("feelings", {}),
+        "tag_feeling": insights.get("tag_feeling", {}),
+        "tag_phase": insights.get("tag_phase", {}),
+        "phases": {name: phase_summary(insights, name) for name in phases},
+    }
+    if feeling or phase:
+        tags = Counter()
+        for phase_name, feelings in insights.get("phase_feeling_tag", {}).items():
+            if phase and phase_name != phase:
+                continue
+            for feeling_name, feeling_tags in feelings.items():
+                if not feeling or feeling_name == feeling:
+                    tags.update(feeling_tags)
+        result["co_occurring_tags"] = {
+            "feeling": feeling,
+            "phase": phase,
+            "tags": _top(tags, limit=len(tags)),
+        }
+    return result
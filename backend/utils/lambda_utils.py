@@ -1,15 +1,6 @@
-import json
-from decimal import Decimal
 from botocore.exceptions import ClientError
-
-
-# Custom JSON encoder for Decimal objects
-class DecimalEncoder(json.JSONEncoder):
-    """JSON encoder that converts Decimal to int or float"""
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return int(obj) if obj % 1 == 0 else float(obj)
-        return super(DecimalEncoder, self).default(obj)
+from utils.aws_clients import log_init_timings
+from utils.serialization import dumps
 
 
 class NotFoundError(Exception):
@@ -22,7 +13,7 @@ def handle_error_response(func):
     """
     Decorator for Lambda functions to handle errors and format API responses.
     Includes CORS headers for frontend access.
-    Uses DecimalEncoder to handle DynamoDB Decimal types.
+    Serializes with utils.serialization.dumps, which handles DynamoDB Decimal types.
     """
     def wrapper(event, context):
         headers = {
@@ -37,30 +28,32 @@ def handle_error_response(func):
             return {
                 "statusCode": 200,
                 "headers": headers,
-                "body": json.dumps(response, cls=DecimalEncoder)
+                "body": dumps(response)
             }
         except ClientError as e:
             return {
                 "statusCode": 400,
                 "headers": headers,
-                "body": json.dumps({"error": str(e)}, cls=DecimalEncoder)
+                "body": dumps({"error": str(e)})
             }
         except NotFoundError as e:
             return {
                 "statusCode": 404,
                 "headers": headers,
-                "body": json.dumps({"error": str(e)}, cls=DecimalEncoder)
+                "body": dumps({"error": str(e)})
             }
         except ServerError as e:
             return {
                 "statusCode": 500,
                 "headers": headers,
-                "body": json.dumps({"error": str(e)}, cls=DecimalEncoder)
+                "body": dumps({"error": str(e)})
             }
         except Exception as e:
             return {
                 "statusCode": 500,
                 "headers": headers,
-                "body": json.dumps({"error": str(e)}, cls=DecimalEncoder)
+                "body": dumps({"error": str(e)})
             }
+        finally:
+            log_init_timings()
     return wrapper
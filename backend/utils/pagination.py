@@ -0,0 +1,107 @@
+"""
+Cursor-based pagination for GlowCycleTable queries.
+
+A cursor is the query's LastEvaluatedKey, JSON encoded and base64url
+wrapped so clients treat it as an opaque token. History endpoints accept
+`limit` and `cursor` query parameters and return `next_cursor`, which is
+null once the last page has been served.
+
+Histories with records outside their prefixed keys (legacy keys,
+archived years) list those after the last table page, behind a cursor
+with phase "older" that holds the position of the last record served.
+"""
+import base64
+import binascii
+import json
+from typing import List, Optional, Tuple
+
+MAX_PAGE_SIZE = 100
+OLDER_PHASE = "older"
+
+
+def encode_cursor(last_key: Optional[dict]) -> Optional[str]:
+    if not last_key:
+        return None
+    raw = json.dumps(last_key, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], user: str) -> Optional[dict]:
+    """
+    Turns a cursor back into an ExclusiveStartKey.
+    Rejects cursors that don't belong to the user being queried.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_key = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if (
+        not isinstance(last_key, dict)
+        or last_key.get("user") != user
+        or not isinstance(last_key.get("date"), str)
+    ):
+        raise ValueError("Invalid cursor")
+    return last_key
+
+
+def older_position(cursor: Optional[dict]) -> Optional[Tuple[str, str]]:
+    """
+    The (ISO timestamp, sort key) an "older" cursor continues below, or
+    None to start from the newest older record
+    """
+    if not cursor or cursor.get("phase") != OLDER_PHASE:
+        return None
+    position = (cursor.get("at", ""), cursor["date"])
+    return position if any(position) else None
+
+
+def encode_older_cursor(user: str, position: Tuple[str, str]) -> str:
+    at, sort_key = position
+    return encode_cursor(
+        {"user": user, "phase": OLDER_PHASE, "date": sort_key, "at": at}
+    )
+
+
+def parse_limit(params: dict) -> Optional[int]:
+    """Reads the optional `limit` query parameter, capped at MAX_PAGE_SIZE"""
+    limit = params.get("limit")
+    if limit in (None, ""):
+        return None
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid limit: {limit}")
+    if limit < 1:
+        raise ValueError(f"Invalid limit: {limit}")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def query_page(
+    table, limit: Optional[int] = None, cursor: Optional[dict] = None, **query_kwargs
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Runs a query and returns (items, next_cursor).
+
+    With a limit, a single page of at most `limit` items is read.
+    Without one, every page is followed so results are never cut off
+    at DynamoDB's 1 MB response size; next_cursor is then always None.
+    """
+    if cursor:
+        query_kwargs["ExclusiveStartKey"] = cursor
+
+    if limit:
+        response = table.query(Limit=limit, **query_kwargs)
+        next_cursor = encode_cursor(response.get("LastEvaluatedKey"))
+        return response.get("Items", []), next_cursor
+
+    items = []
+    while True:
+        response = table.query(**query_kwargs)
+        items.extend(response.get("Items", []))
+        last_key = response.get("LastEvaluatedKey")
+        if not last_key:
+            return items, None
+        query_kwargs["ExclusiveStartKey"] = last_key
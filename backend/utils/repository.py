@@ -0,0 +1,464 @@
+"""
+Shared data access for GlowCycleTable.
+
+Handlers go through GlowCycleRepository instead of building their own
+table and query code. Records are the TableObject classes from
+utils/dynamo_helper.py; every read accepts an optional list of
+attributes so list views only fetch what they render.
+"""
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional, Tuple, Type, TypeVar
+
+from boto3.dynamodb.conditions import ConditionExpressionBuilder, Key
+from boto3.dynamodb.types import TypeSerializer
+
+from utils.dynamo_client import get_dynamodb_client
+from utils.dynamo_helper import deserialize_item
+from utils.lambda_utils import ServerError
+from utils.logger import select_powertools_logger
+from utils.pagination import query_page
+from utils.sort_keys import range_bounds
+
+logger = select_powertools_logger("aws-helpers-repository")
+
+DYNAMODB_TABLE_NAME = os.environ.get("DYNAMODB_TABLE_NAME", "GlowCycleTable")
+
+# Kill switch for the low-level read path (query(..., fast=True))
+FAST_READS = os.environ.get("DYNAMO_FAST_READS", "true").lower() == "true"
+
+# Key attributes are always projected so records can be rebuilt
+KEY_ATTRIBUTES = ("user", "date")
+
+# BatchWriteItem limits and retry schedule for UnprocessedItems
+BATCH_WRITE_SIZE = 25
+BATCH_GET_SIZE = 100
+BATCH_MAX_ATTEMPTS = 8
+BATCH_BASE_DELAY = 0.05  # seconds, doubled per attempt
+BATCH_MAX_DELAY = 2.0
+
+Record = TypeVar("Record")
+
+
+def build_projection(attributes: Optional[Iterable[str]]) -> dict:
+    """
+    Returns ProjectionExpression/ExpressionAttributeNames kwargs for the
+    given attribute names, or {} to fetch whole items. Names are always
+    aliased because "user" and "date" are DynamoDB reserved words.
+    """
+    if not attributes:
+        return {}
+    names = list(dict.fromkeys([*KEY_ATTRIBUTES, *attributes]))
+    placeholders = {f"#p{i}": name for i, name in enumerate(names)}
+    return {
+        "ProjectionExpression": ", ".join(placeholders),
+        "ExpressionAttributeNames": placeholders
+    }
+
+
+class LowLevelTable:
+    """
+    Table-like query() over the low-level client, for read-only paths.
+
+    Takes the same arguments as Table.query (boto3 Key conditions, native
+    ExclusiveStartKey) so query_page works unchanged, but decodes items
+    with deserialize_item instead of boto3's TypeDeserializer, and skips
+    attributes outside `attributes`.
+    """
+
+    _serializer = TypeSerializer()
+
+    def __init__(
+        self, client, table_name: str, attributes: Optional[Iterable[str]] = None
+    ) -> None:
+        self.client = client
+        self.name = table_name
+        self.attributes = set(attributes) if attributes else None
+
+    def _wire(self, values: dict) -> dict:
+        return {
+            name: self._serializer.serialize(value) for name, value in values.items()
+        }
+
+    def query(
+        self, KeyConditionExpression, ExclusiveStartKey: Optional[dict] = None, **kwargs
+    ) -> dict:
+        built = ConditionExpressionBuilder().build_expression(
+            KeyConditionExpression, is_key_condition=True
+        )
+        kwargs["ExpressionAttributeNames"] = {
+            **kwargs.get("ExpressionAttributeNames", {}),
+            **built.attribute_name_placeholders,
+        }
+        if ExclusiveStartKey:
+            kwargs["ExclusiveStartKey"] = self._wire(ExclusiveStartKey)
+
+        response = self.client.query(
+            TableName=self.name,
+            KeyConditionExpression=built.condition_expression,
+            ExpressionAttributeValues=self._wire(built.attribute_value_placeholders),
+            **kwargs
+        )
+        result = {
+            "Items": [
+                deserialize_item(item, self.attributes)
+                for item in response.get("Items", [])
+            ]
+        }
+        if response.get("LastEvaluatedKey"):
+            result["LastEvaluatedKey"] = deserialize_item(response["LastEvaluatedKey"])
+        return result
+
+
+class GlowCycleRepository:
+    def __init__(self, table=None, table_name: str = DYNAMODB_TABLE_NAME) -> None:
+        self.table = (
+            table if table is not None else get_dynamodb_client().Table(table_name)
+        )
+        self._local = threading.local()
+
+    def for_current_thread(self) -> "GlowCycleRepository":
+        """
+        boto3 resources are not thread-safe, so worker threads (see
+        utils/concurrency.py) each get their own Table for this repository.
+        """
+        if threading.current_thread() is threading.main_thread():
+            return self
+        repository = getattr(self._local, "repository", None)
+        if repository is None:
+            repository = GlowCycleRepository(table_name=self.table.name)
+            self._local.repository = repository
+        return repository
+
+    # ---------- Writes ----------
+
+    def put(
+        self,
+        record,
+        condition: Optional[str] = None,
+        names: Optional[dict] = None,
+        values: Optional[dict] = None,
+    ) -> dict:
+        """Writes a record, optionally only if condition holds (as in put_op)"""
+        item = record._to_dynamo_representation()
+        kwargs = {}
+        if condition:
+            kwargs["ConditionExpression"] = condition
+        if names:
+            kwargs["ExpressionAttributeNames"] = names
+        if values:
+            kwargs["ExpressionAttributeValues"] = values
+        self.table.put_item(Item=item, **kwargs)
+        return item
+
+    def delete(self, user: str, sk: str) -> None:
+        self.table.delete_item(Key={"user": user, "date": sk})
+
+    def transact(self, operations: List[dict]) -> None:
+        """
+        Runs put/delete operations from put_op/delete_op as one
+        TransactWriteItems call
+        """
+        self.table.meta.client.transact_write_items(TransactItems=operations)
+
+    def put_op(
+        self,
+        item: dict,
+        condition: Optional[str] = None,
+        names: Optional[dict] = None,
+        values: Optional[dict] = None,
+    ) -> dict:
+        put = {"TableName": self.table.name, "Item": item}
+        if condition:
+            put["ConditionExpression"] = condition
+        if names:
+            put["ExpressionAttributeNames"] = names
+        if values:
+            put["ExpressionAttributeValues"] = values
+        return {"Put": put}
+
+    def delete_op(self, user: str, sk: str) -> dict:
+        return {
+            "Delete": {"TableName": self.table.name, "Key": {"user": user, "date": sk}}
+        }
+
+    def batch_write(self, requests: List[dict]) -> List[dict]:
+        """
+        Writes PutRequest/DeleteRequest entries (see put_request/delete_request)
+        with BatchWriteItem, BATCH_WRITE_SIZE at a time. UnprocessedItems are
+        retried with exponential backoff and full jitter; whatever is still
+        unprocessed after BATCH_MAX_ATTEMPTS is returned.
+        A chunk must not contain the same key twice.
+        """
+        failed = []
+        for start in range(0, len(requests), BATCH_WRITE_SIZE):
+            pending = requests[start:start + BATCH_WRITE_SIZE]
+            for attempt in range(BATCH_MAX_ATTEMPTS):
+                if attempt:
+                    delay = min(BATCH_MAX_DELAY, BATCH_BASE_DELAY * 2 ** (attempt - 1))
+                    time.sleep(random.uniform(0, delay))
+                response = self.table.meta.client.batch_write_item(
+                    RequestItems={self.table.name: pending}
+                )
+                pending = response.get("UnprocessedItems", {}).get(self.table.name, [])
+                if not pending:
+                    break
+                logger.info(
+                    f"{len(pending)} unprocessed batch writes, "
+                    f"retrying (attempt {attempt + 1})"
+                )
+            failed.extend(pending)
+        return failed
+
+    @staticmethod
+    def put_request(item: dict) -> dict:
+        return {"PutRequest": {"Item": item}}
+
+    @staticmethod
+    def delete_request(user: str, sk: str) -> dict:
+        return {"DeleteRequest": {"Key": {"user": user, "date": sk}}}
+
+    def update(
+        self,
+        user: str,
+        sk: str,
+        values: dict,
+        condition: Optional[str] = None,
+        names: Optional[dict] = None,
+        condition_values: Optional[dict] = None,
+        increments: Optional[dict] = None,
+    ) -> None:
+        """
+        SET the given attributes on an existing item, optionally only if
+        condition holds (names/condition_values are its placeholders).
+        Keys are attribute names or tuples naming a path into a map
+        (("days", "2024-05-01")). increments adds its amounts to numbers,
+        counting from 0 where the number is missing; the map holding it
+        must exist.
+        """
+        update_names: dict = {}
+
+        def alias(key) -> str:
+            parts = []
+            for name in (key,) if isinstance(key, str) else key:
+                parts.append(f"#u{len(update_names)}")
+                update_names[parts[-1]] = name
+            return ".".join(parts)
+
+        clauses = [f"{alias(key)} = :u{i}" for i, key in enumerate(values)]
+        update_values = {f":u{i}": value for i, value in enumerate(values.values())}
+        for i, (key, amount) in enumerate((increments or {}).items()):
+            path = alias(key)
+            clauses.append(f"{path} = if_not_exists({path}, :u_zero) + :n{i}")
+            update_values[f":n{i}"] = amount
+        if increments:
+            update_values[":u_zero"] = 0
+
+        kwargs = {}
+        if condition:
+            kwargs["ConditionExpression"] = condition
+        self.table.update_item(
+            Key={"user": user, "date": sk},
+            UpdateExpression="SET " + ", ".join(clauses),
+            ExpressionAttributeNames={**update_names, **(names or {})},
+            ExpressionAttributeValues={**update_values, **(condition_values or {})},
+            **kwargs
+        )
+
+    # ---------- Reads ----------
+
+    def get(
+        self,
+        record_cls: Type[Record],
+        user: str,
+        sk: Optional[str] = None,
+        attributes: Optional[Iterable[str]] = None,
+    ) -> Optional[Record]:
+        """
+        Fetches one record. sk defaults to the record's fixed sort key
+        (USER_PROFILE, JUDGE_SETUP).
+        """
+        response = self.table.get_item(
+            Key={"user": user, "date": sk or record_cls.SK},
+            **build_projection(attributes)
+        )
+        item = response.get("Item")
+        return record_cls._from_dynamo_representation(item) if item else None
+
+    def query_items(
+        self,
+        user: str,
+        sort_condition=None,
+        attributes: Optional[Iterable[str]] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[dict] = None,
+        newest_first: bool = True,
+        fast: bool = False,
+    ) -> Tuple[List[dict], Optional[str]]:
+        """
+        Raw query within a user's partition, returns (items, next_cursor).
+        fast reads through LowLevelTable: numbers come back as int/float,
+        so use it only for items that are returned, never written back.
+        """
+        key_condition = Key("user").eq(user)
+        if sort_condition is not None:
+            key_condition = key_condition & sort_condition
+        table = self.table
+        if fast and FAST_READS:
+            table = LowLevelTable(
+                get_dynamodb_client(resource=False), self.table.name, attributes
+            )
+        return query_page(
+            table,
+            limit=limit,
+            cursor=cursor,
+            KeyConditionExpression=key_condition,
+            ScanIndexForward=not newest_first,
+            **build_projection(attributes)
+        )
+
+    def iter_items(
+        self,
+        user: str,
+        sort_condition=None,
+        attributes: Optional[Iterable[str]] = None,
+        page_size: Optional[int] = None,
+        fast: bool = False,
+    ) -> Iterator[dict]:
+        """
+        Yields the items of a query oldest first, one page at a time, so
+        a whole history can be processed without holding it in memory.
+        fast as in query_items.
+        """
+        key_condition = Key("user").eq(user)
+        if sort_condition is not None:
+            key_condition = key_condition & sort_condition
+        table = self.table
+        if fast and FAST_READS:
+            table = LowLevelTable(
+                get_dynamodb_client(resource=False), self.table.name, attributes
+            )
+        query_kwargs = {
+            "KeyConditionExpression": key_condition,
+            **build_projection(attributes),
+        }
+        if page_size:
+            query_kwargs["Limit"] = page_size
+        while True:
+            response = table.query(**query_kwargs)
+            yield from response.get("Items", [])
+            last_key = response.get("LastEvaluatedKey")
+            if not last_key:
+                return
+            query_kwargs["ExclusiveStartKey"] = last_key
+
+    @staticmethod
+    def sort_condition(
+        record_cls: Type[Record],
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ):
+        """Sort-key condition for the records of one type, optionally bounded by date"""
+        if start or end:
+            low, high = range_bounds(record_cls.SK_PREFIX, start, end)
+            return Key("date").between(low, high)
+        return Key("date").begins_with(record_cls.SK_PREFIX)
+
+    def query(
+        self,
+        record_cls: Type[Record],
+        user: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        attributes: Optional[Iterable[str]] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[dict] = None,
+        newest_first: bool = True,
+        fast: bool = False,
+    ) -> Tuple[List[Record], Optional[str]]:
+        """
+        Reads records of one type for a user, optionally bounded by date,
+        and returns (records, next_cursor). Items that fail to parse are
+        logged and skipped.
+        """
+        items, next_cursor = self.query_items(
+            user,
+            sort_condition=self.sort_condition(record_cls, start, end),
+            attributes=attributes,
+            limit=limit,
+            cursor=cursor,
+            newest_first=newest_first,
+            fast=fast,
+        )
+        return self.to_records(record_cls, items), next_cursor
+
+    def batch_get(
+        self, keys: List[dict], attributes: Optional[Iterable[str]] = None
+    ) -> List[dict]:
+        """
+        Fetches items by key with BatchGetItem, BATCH_GET_SIZE at a time,
+        retrying UnprocessedKeys like batch_write. Missing items are left
+        out and the order of the result is not that of keys.
+        """
+        items = []
+        for start in range(0, len(keys), BATCH_GET_SIZE):
+            batch = keys[start:start + BATCH_GET_SIZE]
+            pending = {self.table.name: {"Keys": batch, **build_projection(attributes)}}
+            for attempt in range(BATCH_MAX_ATTEMPTS):
+                if attempt:
+                    delay = min(BATCH_MAX_DELAY, BATCH_BASE_DELAY * 2 ** (attempt - 1))
+                    time.sleep(random.uniform(0, delay))
+                response = self.table.meta.client.batch_get_item(RequestItems=pending)
+                items.extend(response.get("Responses", {}).get(self.table.name, []))
+                pending = response.get("UnprocessedKeys")
+                if not pending:
+                    break
+                logger.info(
+                    f"{len(pending[self.table.name]['Keys'])} unprocessed batch reads, "
+                    f"retrying (attempt {attempt + 1})"
+                )
+            else:
+                raise ServerError(
+                    f"Could not read {len(pending[self.table.name]['Keys'])} items "
+                    f"after {BATCH_MAX_ATTEMPTS} attempts"
+                )
+        return items
+
+    @staticmethod
+    def to_records(record_cls: Type[Record], items: Iterable[dict]) -> List[Record]:
+        records = []
+        for item in items:
+            try:
+                records.append(record_cls._from_dynamo_representation(item))
+            except Exception as e:
+                logger.warning(
+                    f"Skipping malformed item: {item.get('date', 'unknown')}, "
+                    f"error: {str(e)}"
+                )
+        return records
+
+    @staticmethod
+    def to_dicts(record_cls: Type[Record], items: Iterable[dict]) -> List[dict]:
+        """
+        Response dicts of items, like to_dict of to_records but through
+        record_cls.item_to_dict where the record type has one.
+        """
+        to_dict = getattr(record_cls, "item_to_dict", None)
+        if to_dict is None:
+            return [
+                record.to_dict()
+                for record in GlowCycleRepository.to_records(record_cls, items)
+            ]
+        dicts = []
+        for item in items:
+            try:
+                dicts.append(to_dict(item))
+            except Exception as e:
+                logger.warning(
+                    f"Skipping malformed item: {item.get('date', 'unknown')}, "
+                    f"error: {str(e)}"
+                )
+        return dicts
@@ -1,11 +1,20 @@
 from __future__ import annotations
 import boto3
+import gzip
+import io
 import json
-from typing import Optional
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
 from copy import copy
-import os
 from enum import Enum
 
+from botocore.exceptions import ClientError
+
+from utils.aws_clients import get_client, get_resource
+from utils.serialization import dumps
 from utils.logger import select_powertools_logger
 
 logger = select_powertools_logger("aws-helpers-s3")
@@ -14,6 +23,22 @@ logger = select_powertools_logger("aws-helpers-s3")
 class ContentType(str, Enum):
     json_content = "application/json"
     jpeg_content = "image/jpeg"
+    webp_content = "image/webp"
+    ndjson_content = "application/x-ndjson"
+    csv_content = "text/csv"
+    gzip_content = "application/gzip"
+
+
+# Presigned GET URLs by (bucket, key, expires_in), reused until they have
+# less than PRESIGNED_URL_MIN_LIFETIME left. Returning the same URL also
+# lets browsers cache the object across page loads.
+PRESIGNED_URL_CACHE_SIZE = 4096
+PRESIGNED_URL_MIN_LIFETIME = 600  # seconds
+_presigned_urls: "OrderedDict[Tuple[str, str, int], Tuple[str, float]]" = OrderedDict()
+_presigned_urls_lock = threading.Lock()
+
+# S3 parts must be at least 5 MiB, except the last
+MULTIPART_PART_SIZE = 8 * 1024 * 1024
 
 
 class S3Location:
@@ -35,26 +60,105 @@ class S3Location:
         return copy(vars(self))
 
 
-class S3:
-    client: boto3.client
+class MultipartWriter(io.RawIOBase):
+    """
+    Write-only file object streaming to one S3 object with a multipart
+    upload. Bytes are buffered until a part is full, so memory stays at
+    about one part whatever the object size. close() completes the
+    upload; abort() (or an exception inside a with block) cancels it.
+    """
 
+    def __init__(
+        self,
+        client,
+        bucket_name: str,
+        file_name: str,
+        part_size: int = MULTIPART_PART_SIZE,
+        **create_kwargs,
+    ) -> None:
+        super().__init__()
+        self._client = client
+        self.bucket_name = bucket_name
+        self.file_name = file_name
+        self.part_size = part_size
+        self.size = 0
+        self._buffer = bytearray()
+        self._parts: List[dict] = []
+        self._upload_id = client.create_multipart_upload(
+            Bucket=bucket_name, Key=file_name, **create_kwargs
+        )["UploadId"]
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer.extend(data)
+        self.size += len(data)
+        while len(self._buffer) >= self.part_size:
+            self._upload_part(bytes(self._buffer[:self.part_size]))
+            del self._buffer[:self.part_size]
+        return len(data)
+
+    def _upload_part(self, body: bytes) -> None:
+        part_number = len(self._parts) + 1
+        response = self._client.upload_part(
+            Bucket=self.bucket_name,
+            Key=self.file_name,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            Body=body,
+        )
+        self._parts.append({"PartNumber": part_number, "ETag": response["ETag"]})
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        # The last part may be short (or empty, for an empty object)
+        if self._buffer or not self._parts:
+            self._upload_part(bytes(self._buffer))
+            self._buffer.clear()
+        self._client.complete_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=self.file_name,
+            UploadId=self._upload_id,
+            MultipartUpload={"Parts": self._parts},
+        )
+        super().close()
+
+    def abort(self) -> None:
+        if self.closed:
+            return
+        self._client.abort_multipart_upload(
+            Bucket=self.bucket_name, Key=self.file_name, UploadId=self._upload_id
+        )
+        self._buffer.clear()
+        super().close()
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+
+class S3:
     def __init__(
         self,
         client: Optional[boto3.client] = None,
         resource: Optional[boto3.resource] = None,
     ) -> None:
-        region = os.environ.get("AWS_DEFAULT_REGION", "ap-southeast-2")
-        self.client = client if client else self._get_client(region)
-        self.resource = (
-            resource
-            if resource
-            else boto3.resource("s3", region_name=region)
-        )
+        # Defaults come from the shared registry on first use, so creating
+        # an S3 helper at import time costs nothing
+        self._client = client
+        self._resource = resource
 
-    def _get_client(self, region_name=None) -> boto3.client:
-        if region_name is None:
-            region_name = os.environ.get("AWS_DEFAULT_REGION", "ap-southeast-2")
-        return boto3.client("s3", region_name=region_name)
+    @property
+    def client(self) -> boto3.client:
+        return self._client or get_client("s3")
+
+    @property
+    def resource(self) -> boto3.resource:
+        return self._resource or get_resource("s3")
 
     # ---------- JSON ----------
 
@@ -70,6 +174,57 @@ class S3:
         response = self.client.get_object(Bucket=bucket_name, Key=file_name)
         return json.loads(response["Body"].read())
 
+    # ---------- NDJSON (gzip) ----------
+
+    def put_gzip_ndjson(
+        self, bucket_name: str, file_name: str, records: Iterable[dict]
+    ):
+        """
+        Save records as gzip-compressed NDJSON, one record per line.
+        Decimals from DynamoDB are written as plain JSON numbers.
+        """
+        body = "\n".join(dumps(record, separators=(",", ":")) for record in records)
+        return self.client.put_object(
+            Body=gzip.compress(body.encode("utf-8")),
+            Bucket=bucket_name,
+            Key=file_name,
+            ContentType=ContentType.ndjson_content.value,
+            ContentEncoding="gzip",
+        )
+
+    def get_gzip_ndjson(self, bucket_name: str, file_name: str) -> Optional[List[dict]]:
+        """
+        Read records written by put_gzip_ndjson, with numbers as Decimal
+        like DynamoDB returns them. None if the object doesn't exist.
+        """
+        try:
+            response = self.client.get_object(Bucket=bucket_name, Key=file_name)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+                return None
+            raise
+        body = gzip.decompress(response["Body"].read()).decode("utf-8")
+        return [
+            json.loads(line, parse_float=Decimal, parse_int=Decimal)
+            for line in body.splitlines()
+            if line.strip()
+        ]
+
+    # ---------- Multipart ----------
+
+    def open_multipart(
+        self,
+        bucket_name: str,
+        file_name: str,
+        content_type: str,
+        content_encoding: Optional[str] = None,
+    ) -> MultipartWriter:
+        """Streaming writer for a (possibly very large) object, see MultipartWriter"""
+        create_kwargs = {"ContentType": content_type}
+        if content_encoding:
+            create_kwargs["ContentEncoding"] = content_encoding
+        return MultipartWriter(self.client, bucket_name, file_name, **create_kwargs)
+
     # ---------- JPG ----------
 
     def save_jpg_to_s3(self, content: bytes, s3_location: S3Location):
@@ -87,6 +242,29 @@ class S3:
             logger.exception(f"Failed to save jpg to s3 due to {e}")
             return None
 
+    def save_image_to_s3(
+        self,
+        content: bytes,
+        s3_location: S3Location,
+        content_type: ContentType = ContentType.jpeg_content,
+        cache_control: Optional[str] = None,
+    ):
+        """
+        Save image bytes to S3 with the given content type.
+        """
+        kwargs = {"CacheControl": cache_control} if cache_control else {}
+        try:
+            return self.client.put_object(
+                Body=content,
+                Bucket=s3_location.bucket,
+                Key=s3_location.file_name,
+                ContentType=content_type.value,
+                **kwargs,
+            )
+        except Exception as e:
+            logger.exception(f"Failed to save image to s3 due to {e}")
+            return None
+
     def get_jpg_from_s3(self, bucket: str, file_name: str) -> bytes:
         """
         Retrieve JPG bytes from S3.
@@ -123,3 +301,36 @@ class S3:
             },
             ExpiresIn=expires_in,
         )
+
+    def get_presigned_urls(
+        self,
+        bucket_name: str,
+        file_names: Iterable[str],
+        expires_in: int = 3600,
+    ) -> Dict[str, str]:
+        """
+        Presigned GET URLs for many objects, memoized per container until
+        they are close to expiry (see PRESIGNED_URL_MIN_LIFETIME).
+        """
+        now = time.time()
+        urls = {}
+        with _presigned_urls_lock:
+            for file_name in file_names:
+                if file_name in urls:
+                    continue
+                cache_key = (bucket_name, file_name, expires_in)
+                cached = _presigned_urls.get(cache_key)
+                if cached is not None and cached[1] - now > PRESIGNED_URL_MIN_LIFETIME:
+                    _presigned_urls.move_to_end(cache_key)
+                    urls[file_name] = cached[0]
+                    continue
+                # Signing is local (no request), so it can run under the lock
+                url = self.get_presigned_url(
+                    bucket_name, file_name, expires_in=expires_in
+                )
+                _presigned_urls[cache_key] = (url, now + expires_in)
+                _presigned_urls.move_to_end(cache_key)
+                urls[file_name] = url
+            while len(_presigned_urls) > PRESIGNED_URL_CACHE_SIZE:
+                _presigned_urls.popitem(last=False)
+        return urls
@@ -0,0 +1,321 @@
+"""
+Full-text search over journal thoughts and tags.
+
+Every journal entry gets one posting item per distinct token:
+
+    PK = user, SK = SEARCH#<token>#<entry sort key>, positions = [...]
+
+so the postings of a token are one key-range Query, and a search costs
+a Query per query term plus a BatchGetItem for the page of entries it
+returns, however long the history is. Positions make phrase queries
+("slept well") possible; tag tokens are positioned after the thoughts,
+TAG_POSITION_GAP apart per tag, so a phrase never spans two fields.
+
+save_entry and bulk imports index entries after writing them. Postings
+are never removed: archived entries stay searchable (they are read back
+from S3), and every returned entry is re-checked against its own text,
+so postings left by an overwritten entry can't produce false matches.
+History written before the index existed is backfilled by
+migrations/search_index.py; until a user's SEARCH_INDEX marker exists,
+search scans their history instead.
+"""
+import re
+import unicodedata
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from boto3.dynamodb.conditions import Key
+
+from utils.archive import read_archived
+from utils.concurrency import fetch_concurrently
+from utils.dynamo_helper import JournalTableObject, SearchIndexTableObject
+from utils.logger import select_powertools_logger
+from utils.pagination import encode_cursor
+from utils.repository import GlowCycleRepository
+from utils.sort_keys import (
+    LEGACY_JOURNAL_UPPER,
+    LEGACY_READS,
+    parse_journal_sk,
+    search_posting_sk,
+    search_token_prefix,
+)
+
+logger = select_powertools_logger("aws-helpers-search-index")
+
+# Bump when tokenization changes; users are then searched by scan until re-indexed
+INDEX_VERSION = 1
+
+# Attributes a search result renders, as in the journal history view
+RESULT_ATTRIBUTES = ["feeling", "energy", "thoughts", "tags"]
+
+DEFAULT_RESULTS = 20
+MAX_QUERY_TERMS = 8
+# Longer tokens (pasted links etc.) are not indexed; keeps sort keys small
+MAX_TOKEN_LENGTH = 64
+# Distinct tokens indexed per entry, tags first
+MAX_TOKENS_PER_ENTRY = 300
+
+TAG_POSITION_OFFSET = 100_000
+TAG_POSITION_GAP = 100
+
+SEARCH_TIMEOUT = 5.0  # seconds, for the parallel postings queries
+
+_TOKEN = re.compile(r"\w+")
+_QUERY_PART = re.compile(r'"([^"]*)"|(\S+)')
+
+
+# -------------------------
+# Tokenization
+# -------------------------
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased, accent-folded word tokens in order"""
+    folded = unicodedata.normalize("NFKD", text or "")
+    folded = "".join(char for char in folded if not unicodedata.combining(char))
+    folded = folded.casefold()
+    return [token for token in _TOKEN.findall(folded) if len(token) <= MAX_TOKEN_LENGTH]
+
+
+def entry_positions(thoughts: str, tags: Iterable[str]) -> Dict[str, List[int]]:
+    """Token -> positions for one entry's thoughts and tags"""
+    positions: Dict[str, List[int]] = defaultdict(list)
+    for tag_index, tag in enumerate(tags or []):
+        base = TAG_POSITION_OFFSET + tag_index * TAG_POSITION_GAP
+        for offset, token in enumerate(tokenize(str(tag))[:TAG_POSITION_GAP - 1]):
+            positions[token].append(base + offset)
+    for position, token in enumerate(tokenize(thoughts)):
+        if token in positions or len(positions) < MAX_TOKENS_PER_ENTRY:
+            positions[token].append(position)
+    return dict(positions)
+
+
+def parse_query(query: str) -> List[List[str]]:
+    """
+    Splits a query into phrases, each a list of tokens. Quoted text is
+    one phrase; every other word is its own (a word like "don't" that
+    tokenizes into several tokens is matched as a phrase).
+    """
+    phrases = []
+    for quoted, word in _QUERY_PART.findall(query or ""):
+        tokens = tokenize(quoted or word)
+        if tokens:
+            phrases.append(tokens)
+    return phrases
+
+
+def matches(phrases: List[List[str]], positions: Dict[str, Iterable[int]]) -> bool:
+    """True if every phrase occurs, its tokens at consecutive positions"""
+    for phrase in phrases:
+        starts = positions.get(phrase[0])
+        if not starts:
+            return False
+        following = [set(positions.get(token, ())) for token in phrase[1:]]
+        if not any(
+            all(start + offset in found for offset, found in enumerate(following, 1))
+            for start in starts
+        ):
+            return False
+    return True
+
+
+# -------------------------
+# Indexing
+# -------------------------
+
+def index_requests(journal_obj: JournalTableObject) -> List[dict]:
+    """BatchWriteItem put requests for an entry's postings"""
+    entry_sk = journal_obj._get_sk()
+    positions_by_token = entry_positions(journal_obj.thoughts, journal_obj.tags)
+    return [
+        GlowCycleRepository.put_request({
+            "user": journal_obj.user,
+            "date": search_posting_sk(token, entry_sk),
+            "positions": positions
+        })
+        for token, positions in positions_by_token.items()
+    ]
+
+
+def index_entries(
+    repository: GlowCycleRepository, journal_objs: Iterable[JournalTableObject]
+) -> int:
+    """
+    Writes the postings of the given entries. Returns the number of
+    postings that could not be written; those entries stay unsearchable
+    for the missing tokens until the user is re-indexed.
+    """
+    requests = [
+        request
+        for journal_obj in journal_objs
+        for request in index_requests(journal_obj)
+    ]
+    failed = repository.batch_write(requests)
+    if failed:
+        logger.warning(
+            f"{len(failed)} of {len(requests)} search postings could not be written"
+        )
+    return len(failed)
+
+
+def is_indexed(repository: GlowCycleRepository, user: str) -> bool:
+    marker = repository.get(SearchIndexTableObject, user)
+    return marker is not None and marker.version >= INDEX_VERSION
+
+
+def mark_indexed(repository: GlowCycleRepository, user: str, entry_count: int) -> None:
+    repository.put(SearchIndexTableObject(
+        user=user,
+        version=INDEX_VERSION,
+        entry_count=entry_count,
+        updated_at=datetime.now().isoformat()
+    ))
+
+
+def journal_history(
+    repository: GlowCycleRepository, user: str
+) -> List[JournalTableObject]:
+    """Every journal entry of the user: prefixed, legacy and archived"""
+    journal_objs, _ = repository.query(
+        JournalTableObject, user, attributes=RESULT_ATTRIBUTES
+    )
+    if LEGACY_READS:
+        legacy_items, _ = repository.query_items(
+            user,
+            sort_condition=Key("date").lt(LEGACY_JOURNAL_UPPER),
+            attributes=RESULT_ATTRIBUTES
+        )
+        journal_objs += repository.to_records(JournalTableObject, legacy_items)
+    journal_objs += read_archived(
+        repository,
+        user,
+        JournalTableObject,
+        exclude=[journal_obj._get_sk() for journal_obj in journal_objs]
+    )
+    return journal_objs
+
+
+def rebuild_index(repository: GlowCycleRepository, user: str) -> int:
+    """
+    Indexes the user's whole journal history and marks the index
+    complete if every posting was written. Returns the entry count.
+    """
+    journal_objs = journal_history(repository, user)
+    failed = index_entries(repository, journal_objs)
+    if failed:
+        raise RuntimeError(f"{failed} search postings for {user} could not be written")
+    mark_indexed(repository, user, len(journal_objs))
+    logger.info(f"Indexed {len(journal_objs)} journal entries for {user}")
+    return len(journal_objs)
+
+
+# -------------------------
+# Search
+# -------------------------
+
+def _postings(
+    repository: GlowCycleRepository, user: str, token: str
+) -> Dict[str, List[int]]:
+    """Entry sort key -> positions, for every entry containing token"""
+    prefix = search_token_prefix(token)
+    items, _ = repository.query_items(
+        user,
+        sort_condition=Key("date").begins_with(prefix),
+        attributes=["positions"],
+        fast=True
+    )
+    return {item["date"][len(prefix):]: item.get("positions", []) for item in items}
+
+
+def _indexed_candidates(
+    repository: GlowCycleRepository, user: str, phrases: List[List[str]]
+) -> List[str]:
+    terms = sorted({token for phrase in phrases for token in phrase})
+    calls = {
+        term: (lambda term=term: _postings(repository.for_current_thread(), user, term))
+        for term in terms
+    }
+    postings = fetch_concurrently(calls, timeout=SEARCH_TIMEOUT)
+    entry_sks = set.intersection(*(set(postings[term]) for term in terms))
+    return [
+        entry_sk for entry_sk in entry_sks
+        if matches(phrases, {term: postings[term][entry_sk] for term in terms})
+    ]
+
+
+def _load_entries(
+    repository: GlowCycleRepository, user: str, entry_sks: List[str]
+) -> Dict[str, JournalTableObject]:
+    """Reads entries by sort key, from S3 for those no longer in the table"""
+    items = repository.batch_get(
+        [{"user": user, "date": entry_sk} for entry_sk in entry_sks],
+        attributes=RESULT_ATTRIBUTES,
+    )
+    found = {
+        journal_obj._get_sk(): journal_obj
+        for journal_obj in repository.to_records(JournalTableObject, items)
+    }
+
+    missing = [entry_sk for entry_sk in entry_sks if entry_sk not in found]
+    if missing:
+        dates = [parse_journal_sk(entry_sk)[0] for entry_sk in missing]
+        wanted = set(missing)
+        archived = read_archived(
+            repository, user, JournalTableObject, start=min(dates), end=max(dates)
+        )
+        for journal_obj in archived:
+            if journal_obj._get_sk() in wanted:
+                found[journal_obj._get_sk()] = journal_obj
+    return found
+
+
+def search(
+    repository: GlowCycleRepository,
+    user: str,
+    query: str,
+    limit: Optional[int] = None,
+    cursor: Optional[dict] = None,
+) -> Tuple[List[JournalTableObject], Optional[str], int]:
+    """
+    Journal entries matching every word and quoted phrase of query,
+    newest first. Returns (entries, next_cursor, total matches).
+    """
+    phrases = parse_query(query)
+    if not phrases:
+        raise ValueError("Search query has no words")
+    if len({token for phrase in phrases for token in phrase}) > MAX_QUERY_TERMS:
+        raise ValueError(f"Search query is limited to {MAX_QUERY_TERMS} words")
+    limit = limit or DEFAULT_RESULTS
+
+    known: Dict[str, JournalTableObject] = {}
+    if is_indexed(repository, user):
+        candidates = _indexed_candidates(repository, user, phrases)
+    else:
+        logger.info(f"No search index for {user} yet, scanning history")
+        known = {
+            journal_obj._get_sk(): journal_obj
+            for journal_obj in journal_history(repository, user)
+            if matches(phrases, entry_positions(journal_obj.thoughts, journal_obj.tags))
+        }
+        candidates = list(known)
+
+    candidates.sort(reverse=True)
+    total = len(candidates)
+    if cursor:
+        candidates = [entry_sk for entry_sk in candidates if entry_sk < cursor["date"]]
+    page = candidates[:limit]
+    next_cursor = None
+    if len(candidates) > limit:
+        next_cursor = encode_cursor({"user": user, "date": page[-1]})
+
+    missing = [entry_sk for entry_sk in page if entry_sk not in known]
+    if missing:
+        known.update(_load_entries(repository, user, missing))
+
+    # Postings are never deleted, so check each entry against its current text
+    results = [
+        journal_obj
+        for journal_obj in (known[entry_sk] for entry_sk in page if entry_sk in known)
+        if matches(phrases, entry_positions(journal_obj.thoughts, journal_obj.tags))
+    ]
+    return results, next_cursor, total
@@ -0,0 +1,74 @@
+"""
+JSON serialization for DynamoDB data.
+
+Reads: DynamoDB returns every number as Decimal. dumps() hands them to
+the C JSON encoder through a default hook, so a response is converted
+while it is encoded, in one pass, instead of being walked by a separate
+convert step first. Integral values become ints, the rest floats.
+
+Writes: boto3 rejects floats, so to_dynamo() turns them into Decimals
+(through str, so 0.1 stays 0.1) in a single recursive pass.
+"""
+import json
+import math
+from decimal import Decimal
+from typing import Any
+
+# Largest integer a float holds exactly
+MAX_EXACT_FLOAT_INT = 2 ** 53
+
+
+def decimal_to_number(value: Decimal):
+    as_float = float(value)
+    if as_float.is_integer():
+        if -MAX_EXACT_FLOAT_INT <= as_float <= MAX_EXACT_FLOAT_INT:
+            return int(as_float)
+        if value == value.to_integral_value():
+            return int(value)
+    return as_float
+
+
+def _default(value: Any):
+    if isinstance(value, Decimal):
+        return decimal_to_number(value)
+    if isinstance(value, (set, frozenset)):
+        # String/number sets come back from DynamoDB as Python sets
+        return sorted(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any, **kwargs) -> str:
+    """json.dumps that understands Decimals and sets"""
+    return json.dumps(obj, default=_default, **kwargs)
+
+
+def to_json_ready(value: Any) -> Any:
+    """
+    Plain Python copy of a DynamoDB value (Decimals to numbers, sets to
+    lists), for code that needs the values rather than a JSON string.
+    """
+    value_type = type(value)
+    if value_type is dict:
+        return {key: to_json_ready(item) for key, item in value.items()}
+    if value_type is list:
+        return [to_json_ready(item) for item in value]
+    if value_type is Decimal:
+        return decimal_to_number(value)
+    if value_type is set or value_type is frozenset:
+        return sorted(to_json_ready(item) for item in value)
+    return value
+
+
+def to_dynamo(value: Any) -> Any:
+    """Copy of value with floats converted to Decimal for writing to DynamoDB"""
+    value_type = type(value)
+    if value_type is dict:
+        return {key: to_dynamo(item) for key, item in value.items()}
+    if value_type is list or value_type is tuple:
+        return [to_dynamo(item) for item in value]
+    if value_type is float:
+        if not math.isfinite(value):
+            raise ValueError(f"Cannot store non-finite number: {value}")
+        return Decimal(str(value))
+    return value
+
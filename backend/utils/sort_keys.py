@@ -0,0 +1,206 @@
+"""
+Sort-key encoding for GlowCycleTable.
+
+Every record in the table lives under PK = user. The sort key ("date")
+encodes the record type and its timestamp. Version 3 of the encoding
+gives every dated record type its own prefix and uses ISO-8601 style
+dates so that keys sort chronologically within a type:
+
+    JOURNAL#YYYY-MM-DDTHH:MM:SS#morning
+    PERIOD#YYYY-MM-DD
+    SKIN#YYYY-MM-DDTHH:MM:SS
+
+Journal search postings (utils/search_index.py) sort by token, then entry:
+
+    SEARCH#<token>#JOURNAL#YYYY-MM-DDTHH:MM:SS#morning
+
+Older keys (v1: DD-MM-YYYY based, v2: unprefixed ISO journal keys) are
+still understood by the parsers so handlers keep working while
+migrations/sort_keys.py rewrites old items.
+"""
+import os
+import re
+from datetime import datetime
+from typing import Optional, Tuple
+
+SORT_KEY_VERSION = 3
+SORT_KEY_VERSION_ATTRIBUTE = "sk_version"
+
+JOURNAL_PREFIX = "JOURNAL#"
+PERIOD_PREFIX = "PERIOD#"
+SKIN_PREFIX = "SKIN#"
+SEARCH_PREFIX = "SEARCH#"
+
+DATE_FORMAT = "%Y-%m-%d"
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+# Upper bound suffix for range queries; sorts after any timestamp suffix
+RANGE_END_SUFFIX = "~"
+
+# Unprefixed (pre-v3) journal keys start with a digit, so they all sort
+# below this bound and below every prefixed record type
+LEGACY_JOURNAL_UPPER = "A"
+
+# Read unprefixed journal keys too until the migration has finished
+LEGACY_READS = os.environ.get("SORT_KEY_LEGACY_READS", "true").lower() == "true"
+
+_LEGACY_PERIOD = re.compile(r"^PERIOD#(\d{2})-(\d{2})-(\d{4})$")
+_LEGACY_SKIN = re.compile(r"^SKIN#(\d{2})-(\d{2})-(\d{4})#(\d{2})-(\d{2})-(\d{2})$")
+_LEGACY_JOURNAL = re.compile(
+    r"^(\d{2})-(\d{2})-(\d{4})(?:-(\d{2})-(\d{2})-(\d{2}))?#(\w+)$"
+)
+_UNPREFIXED_JOURNAL = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}#\w+$")
+
+
+# -------------------------
+# API date strings
+# -------------------------
+def parse_api_date(value: str) -> datetime:
+    """Parse a DD-MM-YYYY date as sent by the frontend"""
+    try:
+        day, month, year = value.split("-")
+        return datetime(int(year), int(month), int(day))
+    except (AttributeError, ValueError):
+        raise ValueError(f"Invalid date format: {value}. Expected DD-MM-YYYY")
+
+
+def to_api_date(value: datetime) -> str:
+    """Format a datetime as DD-MM-YYYY for API responses"""
+    return f"{value.day:02d}-{value.month:02d}-{value.year:04d}"
+
+
+def to_api_time(value: datetime) -> str:
+    """Format the time of a datetime as HH:MM:SS"""
+    return f"{value.hour:02d}:{value.minute:02d}:{value.second:02d}"
+
+
+def parse_timestamp(text: str) -> datetime:
+    """
+    YYYY-MM-DDTHH:MM:SS -> datetime. Sort keys always have this fixed
+    width, so the fields are sliced out directly; strptime (several
+    times slower) only sees malformed input, to raise its usual error.
+    """
+    if (
+        len(text) == 19
+        and text[4] == "-" and text[7] == "-" and text[10] == "T"
+        and text[13] == ":" and text[16] == ":"
+        and (
+            text[:4] + text[5:7] + text[8:10] + text[11:13] + text[14:16] + text[17:]
+        ).isdigit()
+    ):
+        return datetime(
+            int(text[:4]), int(text[5:7]), int(text[8:10]),
+            int(text[11:13]), int(text[14:16]), int(text[17:])
+        )
+    return datetime.strptime(text, TIMESTAMP_FORMAT)
+
+
+# -------------------------
+# Builders
+# -------------------------
+def period_sk(period_date: datetime) -> str:
+    return f"{PERIOD_PREFIX}{period_date.strftime(DATE_FORMAT)}"
+
+
+def skin_sk(created_at: datetime) -> str:
+    return f"{SKIN_PREFIX}{created_at.strftime(TIMESTAMP_FORMAT)}"
+
+
+def journal_sk(entry_date: datetime, time_of_day: str) -> str:
+    return f"{JOURNAL_PREFIX}{entry_date.strftime(TIMESTAMP_FORMAT)}#{time_of_day}"
+
+
+def search_token_prefix(token: str) -> str:
+    """Sort-key prefix of every search posting for a token"""
+    return f"{SEARCH_PREFIX}{token}#"
+
+
+def search_posting_sk(token: str, entry_sk: str) -> str:
+    """Search index posting of a token in one journal entry (utils/search_index.py)"""
+    return f"{search_token_prefix(token)}{entry_sk}"
+
+
+# -------------------------
+# Parsers (accept every version)
+# -------------------------
+def parse_period_sk(sk: str) -> datetime:
+    legacy = _LEGACY_PERIOD.match(sk)
+    if legacy:
+        day, month, year = legacy.groups()
+        return datetime(int(year), int(month), int(day))
+    return datetime.strptime(sk[len(PERIOD_PREFIX):], DATE_FORMAT)
+
+
+def parse_skin_sk(sk: str) -> datetime:
+    legacy = _LEGACY_SKIN.match(sk)
+    if legacy:
+        day, month, year, hour, minute, second = legacy.groups()
+        return datetime(
+            int(year), int(month), int(day), int(hour), int(minute), int(second)
+        )
+    return parse_timestamp(sk[len(SKIN_PREFIX):])
+
+
+def parse_journal_sk(sk: str) -> Tuple[datetime, str]:
+    """Returns (timestamp, time of day) for a journal sort key"""
+    if sk.startswith(JOURNAL_PREFIX):
+        timestamp, time_of_day = sk[len(JOURNAL_PREFIX):].rsplit("#", 1)
+        return parse_timestamp(timestamp), time_of_day
+    legacy = _LEGACY_JOURNAL.match(sk)
+    if legacy:
+        day, month, year, hour, minute, second, time_of_day = legacy.groups()
+        return (
+            datetime(
+                int(year),
+                int(month),
+                int(day),
+                int(hour or 0),
+                int(minute or 0),
+                int(second or 0),
+            ),
+            time_of_day,
+        )
+    timestamp, time_of_day = sk.rsplit("#", 1)
+    return parse_timestamp(timestamp), time_of_day
+
+
+# -------------------------
+# Migration
+# -------------------------
+def upgrade_sk(sk: str) -> Optional[str]:
+    """
+    Returns the current-version sort key for a legacy key,
+    or None if the key is already current (or not a dated record).
+    """
+    if _LEGACY_PERIOD.match(sk):
+        return period_sk(parse_period_sk(sk))
+    if _LEGACY_SKIN.match(sk):
+        return skin_sk(parse_skin_sk(sk))
+    if _LEGACY_JOURNAL.match(sk) or _UNPREFIXED_JOURNAL.match(sk):
+        timestamp, time_of_day = parse_journal_sk(sk)
+        return journal_sk(timestamp, time_of_day)
+    return None
+
+
+def legacy_period_sk(period_date: datetime) -> str:
+    """v1 key for a period date, used to clean up items written before v2"""
+    return f"{PERIOD_PREFIX}{period_date.strftime('%d-%m-%Y')}"
+
+
+# -------------------------
+# Range queries
+# -------------------------
+def range_bounds(
+    prefix: str, start: Optional[datetime], end: Optional[datetime]
+) -> Tuple[str, str]:
+    """
+    Inclusive (low, high) sort-key bounds covering every record under prefix
+    between the start and end dates, for use with Key("date").between().
+    """
+    low = f"{prefix}{start.strftime(DATE_FORMAT)}" if start else prefix
+    high = (
+        f"{prefix}{end.strftime(DATE_FORMAT)}{RANGE_END_SUFFIX}"
+        if end
+        else f"{prefix}{RANGE_END_SUFFIX}"
+    )
+    return low, high
@@ -0,0 +1,243 @@
+"""
+Per-user STATS item maintenance.
+
+Writes that change what the wellness agent needs (journal entries,
+periods, skin analyses) go through write_with_stats, which commits the
+record change and the updated STATS item in one TransactWriteItems call.
+The STATS item carries a version number; if another write got there
+first the transaction is cancelled and the update is retried on the
+fresh aggregate.
+"""
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from botocore.exceptions import ClientError
+from boto3.dynamodb.conditions import Key
+
+from utils.archive import read_archived
+from utils.concurrency import fetch_concurrently
+from utils.dynamo_helper import (
+    JournalTableObject,
+    PeriodTableObject,
+    SkinAnalysisTableObject,
+    UserStatsTableObject,
+)
+from utils.insights import build_insights, empty_insights, is_current
+from utils.lambda_utils import ServerError
+from utils.logger import select_powertools_logger
+from utils.repository import GlowCycleRepository
+from utils.sort_keys import LEGACY_JOURNAL_UPPER, LEGACY_READS
+
+logger = select_powertools_logger("aws-helpers-user-stats")
+
+MAX_ATTEMPTS = 5
+
+JOURNAL_STATS_ATTRIBUTES = ["feeling", "energy", "thoughts", "tags"]
+
+# Full-history reads on first use; generous, but well inside the API Gateway limit
+REBUILD_TIMEOUT = 10.0  # seconds
+
+
+class StatsConflictError(ServerError):
+    pass
+
+
+def write_with_stats(
+    repository: GlowCycleRepository,
+    user: str,
+    operations: List[dict],
+    mutate: Callable[[UserStatsTableObject], None],
+) -> UserStatsTableObject:
+    """
+    Commits the given put/delete operations together with the user's
+    STATS item after applying mutate to it.
+    """
+    for attempt in range(MAX_ATTEMPTS):
+        stats = repository.get(UserStatsTableObject, user)
+        if stats is None:
+            stats = rebuild_stats(repository, user)
+        expected_version = stats.version
+        mutate(stats)
+        stats.version = expected_version + 1
+        stats.updated_at = datetime.now().isoformat()
+
+        if expected_version == 0:
+            stats_op = repository.put_op(
+                stats._to_dynamo_representation(),
+                condition="attribute_not_exists(#sk)",
+                names={"#sk": "date"}
+            )
+        else:
+            stats_op = repository.put_op(
+                stats._to_dynamo_representation(),
+                condition="#version = :expected",
+                names={"#version": "version"},
+                values={":expected": expected_version}
+            )
+
+        try:
+            repository.transact([*operations, stats_op])
+            return stats
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "TransactionCanceledException":
+                raise
+            reasons = [
+                reason.get("Code")
+                for reason in e.response.get("CancellationReasons", [])
+            ]
+            if (
+                len(reasons) <= len(operations)
+                or reasons[len(operations)] != "ConditionalCheckFailed"
+            ):
+                raise
+            logger.info(
+                f"STATS for {user} changed concurrently, "
+                f"retrying (attempt {attempt + 1})"
+            )
+
+    raise StatsConflictError(
+        f"Could not update STATS for {user} after {MAX_ATTEMPTS} attempts"
+    )
+
+
+def rebuild_stats(repository: GlowCycleRepository, user: str) -> UserStatsTableObject:
+    """
+    Builds the aggregate from the user's records, archived ones included,
+    for users whose data predates the STATS item. Returned with version 0
+    (not yet stored).
+    """
+    stats = UserStatsTableObject(user=user)
+
+    def journals():
+        journal_objs, _ = repository.for_current_thread().query(
+            JournalTableObject,
+            user,
+            attributes=JOURNAL_STATS_ATTRIBUTES
+        )
+        return journal_objs
+
+    def legacy_journals():
+        if not LEGACY_READS:
+            return []
+        thread_repository = repository.for_current_thread()
+        legacy_items, _ = thread_repository.query_items(
+            user,
+            sort_condition=Key("date").lt(LEGACY_JOURNAL_UPPER),
+            attributes=JOURNAL_STATS_ATTRIBUTES
+        )
+        return thread_repository.to_records(JournalTableObject, legacy_items)
+
+    def periods():
+        period_objs, _ = repository.for_current_thread().query(
+            PeriodTableObject, user, attributes=["period_date"]
+        )
+        return period_objs
+
+    def latest_skin():
+        skin_objs, _ = repository.for_current_thread().query(
+            SkinAnalysisTableObject,
+            user,
+            attributes=[
+                "created_at",
+                "skin_analysis",
+                "overall_skin_health",
+                "concerns_detected",
+            ],
+            limit=1,
+        )
+        return skin_objs
+
+    def archived_journals():
+        return read_archived(repository.for_current_thread(), user, JournalTableObject)
+
+    # Independent type-scoped queries, issued in parallel
+    results = fetch_concurrently({
+        "journals": journals,
+        "legacy_journals": legacy_journals,
+        "archived_journals": archived_journals,
+        "periods": periods,
+        "latest_skin": latest_skin,
+    }, timeout=REBUILD_TIMEOUT)
+
+    journal_objs = results["journals"] + results["legacy_journals"]
+    # A partly finished archive run leaves records in both places
+    hot_keys = {journal_obj._get_sk() for journal_obj in journal_objs}
+    journal_objs += [
+        journal_obj for journal_obj in results["archived_journals"]
+        if journal_obj._get_sk() not in hot_keys
+    ]
+    period_dates = [period_obj.period_date for period_obj in results["periods"]]
+    for journal_obj in journal_objs:
+        stats.add_journal(journal_obj)
+    stats.set_periods(period_dates)
+    stats.insights = build_insights(journal_objs, period_dates)
+    # Only a user with no recent analysis needs the archive's latest
+    skin_objs = results["latest_skin"] or read_archived(
+        repository, user, SkinAnalysisTableObject
+    )
+    if skin_objs:
+        stats.set_latest_skin(skin_objs[0])
+
+    logger.info(
+        f"Rebuilt STATS for {user}: {stats.journal_count} journals, "
+        f"{len(stats.recent_periods)} periods"
+    )
+    return stats
+
+
+def refresh_stats(repository: GlowCycleRepository, user: str) -> UserStatsTableObject:
+    """
+    Recomputes STATS from the user's records, for writes that can't go
+    through write_with_stats (batch imports).
+    """
+    def replace(stats: UserStatsTableObject) -> None:
+        if stats.version == 0:
+            return  # write_with_stats just rebuilt it
+        rebuilt = rebuild_stats(repository, user)
+        stats.journal_count = rebuilt.journal_count
+        stats.recent_journals = rebuilt.recent_journals
+        stats.recent_periods = rebuilt.recent_periods
+        stats.latest_skin = rebuilt.latest_skin
+        stats.cycle = {}
+        stats.period_version += 1
+        stats.insights = rebuilt.insights
+
+    return write_with_stats(repository, user, [], replace)
+
+
+def get_stats(repository: GlowCycleRepository, user: str) -> UserStatsTableObject:
+    """Reads the STATS item, building and storing it on first use"""
+    stats = repository.get(UserStatsTableObject, user)
+    if stats is not None:
+        return stats
+    return write_with_stats(repository, user, [], lambda stats: None)
+
+
+def get_insights(
+    repository: GlowCycleRepository,
+    user: str,
+    stats: Optional[UserStatsTableObject] = None,
+) -> dict:
+    """
+    The user's journal insights (utils/insights.py), rebuilding STATS
+    once for items written before insights were kept
+    """
+    stats = stats or get_stats(repository, user)
+    if not is_current(stats.insights) and stats.journal_count:
+        stats = refresh_stats(repository, user)
+    return stats.insights if is_current(stats.insights) else empty_insights()
+
+
+def latest_periods(
+    repository: GlowCycleRepository, user: str, excluding: Optional[datetime] = None
+) -> List[datetime]:
+    """Most recent period dates, for recomputing STATS after a delete"""
+    limit = UserStatsTableObject.RECENT_PERIODS + 1
+    period_objs, _ = repository.query(
+        PeriodTableObject, user, attributes=["period_date"], limit=limit
+    )
+    return [
+        period_obj.period_date
+        for period_obj in period_objs
+        if period_obj.period_date != excluding
+    ]
@@ -1,29 +1,16 @@
 import json
-from datetime import datetime, timedelta
-from boto3.dynamodb.conditions import Key
-from utils.dynamo_client import get_dynamodb_client
 from utils.bedrock_client import generate_wellness_support
+from utils.correlations import get_correlations, highlights
+from utils.cycle_engine import get_cycle_stats
+from utils.insights import phase_summary
 from utils.lambda_utils import handle_error_response
 from utils.logger import select_powertools_logger
-import os
+from utils.repository import GlowCycleRepository
+from utils.user_stats import get_insights, get_stats
 
 logger = select_powertools_logger("wellness-lambda")
 
-DYNAMODB_TABLE_NAME = os.environ.get("DYNAMODB_TABLE_NAME", "GlowCycleTable")
-dynamodb = get_dynamodb_client()
-table = dynamodb.Table(DYNAMODB_TABLE_NAME)
-
-
-def calculate_cycle_phase(cycle_day: int, cycle_length: int = 28) -> str:
-    """Calculate current cycle phase based on day"""
-    if cycle_day <= 5:
-        return "menstrual"
-    elif cycle_day <= int(cycle_length * 0.43):
-        return "follicular"
-    elif cycle_day <= int(cycle_length * 0.57):
-        return "ovulation"
-    else:
-        return "luteal"
+repository = GlowCycleRepository()
 
 
 def get_user_context(user: str, user_name: str = None) -> dict:
@@ -36,64 +23,56 @@ def get_user_context(user: str, user_name: str = None) -> dict:
         user_name: Display name for the user (for welcome message)
     """
     try:
-        # Query all user data
-        response = table.query(
-            KeyConditionExpression=Key("user").eq(user),
-            ScanIndexForward=False,
-            Limit=20  # Get recent data
-        )
-        
-        items = response.get("Items", [])
-        
-        # Separate data types
-        periods = [item for item in items if item.get("date", "").startswith("PERIOD#")]
-        journals = [item for item in items if item.get("feeling") and not item.get("date", "").startswith("PERIOD#")]
-        skin_data = [item for item in items if item.get("skin_analysis")]
+        # Single GetItem of the incrementally maintained STATS aggregate
+        stats = get_stats(repository, user)
+
+        journals = stats.recent_journals
+        skin_data = [stats.latest_skin] if stats.latest_skin else []
         
         # Check if user has ANY meaningful data at all
         # CRITICAL: Only count as "has data" if they have journal entries
         # Period data alone doesn't count (could be from onboarding)
-        has_any_data = len(journals) > 0
+        has_any_data = stats.journal_count > 0
         
-        logger.info(f"User {user} data check: journals={len(journals)}, periods={len(periods)}, skin={len(skin_data)}, has_any_data={has_any_data}")
+        logger.info(
+            f"User {user} data check: journals={stats.journal_count}, "
+            f"periods={len(stats.recent_periods)}, skin={len(skin_data)}, "
+            f"has_any_data={has_any_data}"
+        )
         
-        # Calculate cycle info
+        # Cycle info from the full period history, cached in STATS
         cycle_phase = "unknown"
         cycle_day = 0  # 0 means no cycle data
         cycle_length = 28
         
-        if periods and len(periods) > 0:
+        try:
+            cycle = get_cycle_stats(repository, user, stats).predict()
+            cycle_phase = cycle["cycle_phase"]
+            cycle_day = cycle["cycle_day"]
+            cycle_length = cycle["cycle_length"]
+        except Exception as e:
+            logger.warning(f"Error calculating cycle info: {str(e)}")
+        
+        # How this user usually feels in the current phase, from the insight counts
+        phase_patterns = {}
+        if cycle_phase != "unknown":
             try:
-                # Get most recent period
-                latest_period = periods[0]
-                period_date_str = latest_period.get("period_date", "")
-                
-                if period_date_str:
-                    # Parse DD-MM-YYYY
-                    day, month, year = period_date_str.split('-')
-                    period_date = datetime(int(year), int(month), int(day))
-                    today = datetime.now()
-                    
-                    days_since = (today - period_date).days
-                    
-                    # Get cycle length if available
-                    if len(periods) >= 2:
-                        try:
-                            prev_period = periods[1]
-                            prev_date_str = prev_period.get("period_date", "")
-                            if prev_date_str:
-                                p_day, p_month, p_year = prev_date_str.split('-')
-                                prev_date = datetime(int(p_year), int(p_month), int(p_day))
-                                cycle_length = (period_date - prev_date).days
-                                if cycle_length < 21 or cycle_length > 40:
-                                    cycle_length = 28  # Reset to default if unrealistic
-                        except:
-                            pass
-                    
-                    cycle_day = (days_since % cycle_length) + 1
-                    cycle_phase = calculate_cycle_phase(cycle_day, cycle_length)
+                phase_patterns = phase_summary(
+                    get_insights(repository, user, stats), cycle_phase
+                )
             except Exception as e:
-                logger.warning(f"Error calculating cycle info: {str(e)}")
+                logger.warning(f"Error reading insights: {str(e)}")
+        
+        # Strongest links between mood/energy and skin metrics over the last year;
+        # a summary made stale by a write is recomputed here
+        skin_correlations = []
+        if stats.journal_count and stats.latest_skin:
+            try:
+                skin_correlations = highlights(
+                    get_correlations(repository, user, stats)
+                )
+            except Exception as e:
+                logger.warning(f"Error reading correlations: {str(e)}")
         
         # Get most recent journal entry
         latest_journal = journals[0] if journals else {}
@@ -144,7 +123,9 @@ def get_user_context(user: str, user_name: str = None) -> dict:
                 "dominant_feeling_7d": dominant_feeling,
                 "top_concerns": [tag[0] for tag in top_tags],
                 "entries_count": len(recent_journals)
-            }
+            },
+            "phase_patterns": phase_patterns,
+            "skin_correlations": skin_correlations
         }
     
     except Exception as e:
@@ -168,7 +149,9 @@ def get_user_context(user: str, user_name: str = None) -> dict:
                 "dominant_feeling_7d": "calm",
                 "top_concerns": [],
                 "entries_count": 0
-            }
+            },
+            "phase_patterns": {},
+            "skin_correlations": []
         }
 
 
@@ -217,6 +200,34 @@ def generate_support(event):
         raise
 
 
+def get_correlations_summary(event):
+    """
+    Per-phase means, trends and mood/energy vs skin metric correlations
+    GET /wellness/correlations?user=username
+    """
+    try:
+        params = event.get("queryStringParameters") or {}
+        user = params.get("user")
+        
+        if not user:
+            raise ValueError("Missing user parameter")
+        
+        logger.info(f"Fetching correlations for user: {user}")
+        return get_correlations(repository, user)
+    
+    except ValueError as e:
+        logger.error(f"Validation error: {str(e)}")
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching correlations: {str(e)}")
+        raise
+
+
+def is_correlations_request(event) -> bool:
+    path = event.get("resource") or event.get("path") or ""
+    return path.rstrip("/").endswith("/correlations")
+
+
 @handle_error_response
 def lambda_handler(event, context):
     """
@@ -229,6 +240,9 @@ def lambda_handler(event, context):
         if method == "OPTIONS":
             return {"status": "ok", "message": "CORS preflight"}
         
+        if method == "GET" and is_correlations_request(event):
+            return get_correlations_summary(event)
+        
         if method == "GET":
             return generate_support(event)
         
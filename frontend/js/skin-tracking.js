@@ -1240,6 +1240,7 @@ async function loadScanHistory() {
         console.log('Received history data:', data);
 
         const scans = (data.analyses || []).map(entry => ({
+            sk: entry.date,
             date: entry.created_at,
             overallScore: entry.overall_skin_health || 0,
             cycleDay: entry.cycle_day || entry.cycleDay || 0,
@@ -1263,6 +1264,7 @@ async function loadScanHistory() {
             concerns_detected: entry.concerns_detected || [],
             disclaimer: entry.disclaimer || 'This analysis is for informational purposes only.',
             s3ImageKey: entry.s3_image_key || entry.s3ImageKey || null,
+            thumbnailUrl: entry.thumbnail_url || null,
             face_data: entry.face_data || null
         }));
 
@@ -1349,6 +1351,7 @@ function createHistoryCard(scan, index) {
         </div>
         
         <div class="history-info">
+            ${scan.thumbnailUrl ? `<img class="history-thumb" src="${scan.thumbnailUrl}" alt="" loading="lazy" width="56" height="56">` : ''}
             <div class="history-date">${dateStr}</div>
             <div class="history-cycle">
                 <span>${phaseEmoji}</span>
@@ -1420,6 +1423,22 @@ function viewScanReport(scanIndex) {
  * Load scan data into the results view
  */
 async function loadScanIntoResultsView(scan) {
+    // History list omits face landmarks; fetch them for the opened scan
+    if (!scan.face_data && scan.sk) {
+        try {
+            const apiConfig = typeof API_CONFIG !== "undefined" ? API_CONFIG : window.API_CONFIG;
+            const userName = (localStorage.getItem('userName') || '').toLowerCase();
+            const url = `${apiConfig.BASE_URL}/skin/history?user=${encodeURIComponent(userName)}&date=${encodeURIComponent(scan.sk)}`;
+            const resp = await fetch(url);
+            if (resp.ok) {
+                const data = await resp.json();
+                scan.face_data = data.analysis?.face_data || null;
+            }
+        } catch (error) {
+            console.error('Error loading scan details:', error);
+        }
+    }
+
     // Simulate the result structure that renderSkinAnalysisResult expects
     window.__skinAnalysisResult = {
         overall_skin_health: scan.overallScore,
@@ -7,6 +7,8 @@ import * as s3 from 'aws-cdk-lib/aws-s3';
 import * as s3n from 'aws-cdk-lib/aws-s3-notifications';
 import * as iam from 'aws-cdk-lib/aws-iam';
 import * as secretsmanager from 'aws-cdk-lib/aws-secretsmanager';
+import * as events from 'aws-cdk-lib/aws-events';
+import * as targets from 'aws-cdk-lib/aws-events-targets';
 
 export class GlowCycleStack extends cdk.Stack {
   constructor(scope: Construct, id: string, props?: cdk.StackProps) {
@@ -33,6 +35,32 @@ export class GlowCycleStack extends cdk.Stack {
       ],
     });
 
+    // Private cold storage for archived journal and skin records
+    const archiveBucket = new s3.Bucket(this, 'GlowCycleArchive', {
+      removalPolicy: cdk.RemovalPolicy.DESTROY,
+      autoDeleteObjects: true,
+      blockPublicAccess: s3.BlockPublicAccess.BLOCK_ALL,
+      encryption: s3.BucketEncryption.S3_MANAGED,
+      lifecycleRules: [
+        {
+          transitions: [
+            { storageClass: s3.StorageClass.INFREQUENT_ACCESS, transitionAfter: cdk.Duration.days(30) },
+          ],
+        },
+      ],
+    });
+
+    // Private, short-lived user data exports (downloaded via presigned URL)
+    const exportBucket = new s3.Bucket(this, 'GlowCycleExports', {
+      removalPolicy: cdk.RemovalPolicy.DESTROY,
+      autoDeleteObjects: true,
+      blockPublicAccess: s3.BlockPublicAccess.BLOCK_ALL,
+      encryption: s3.BucketEncryption.S3_MANAGED,
+      lifecycleRules: [
+        { expiration: cdk.Duration.days(7), abortIncompleteMultipartUploadAfter: cdk.Duration.days(1) },
+      ],
+    });
+
     // -------------------------
     // DynamoDB Table
     // -------------------------
@@ -41,6 +69,7 @@ export class GlowCycleStack extends cdk.Stack {
       sortKey: { name: 'date', type: dynamodb.AttributeType.STRING },
       removalPolicy: cdk.RemovalPolicy.DESTROY,
       tableName: 'GlowCycleTable',
+      timeToLiveAttribute: 'expires_at', // Cached skin analysis results
     });
 
     // -------------------------
@@ -49,22 +78,27 @@ export class GlowCycleStack extends cdk.Stack {
     const skinUploadUrlLambda = new lambda.Function(this, "SkinUploadUrlLambda", {
       runtime: lambda.Runtime.PYTHON_3_11,
       handler: "skin/upload_url.lambda_handler",
-      code: lambda.Code.fromAsset("../backend", { exclude: ["journal/", "period/"] }),
+      code: lambda.Code.fromAsset("../backend", { exclude: ["period/"] }), // utils/dynamo_helper imports journal.types
       environment: {
         BUCKET_NAME: assetsBucket.bucketName,
+        DYNAMODB_TABLE_NAME: table.tableName, // Creates jobs for asynchronous analyses
       },
     });
 
     const skinAnalyzeLambda = new lambda.Function(this, "SkinAnalyzeLambda", {
       runtime: lambda.Runtime.PYTHON_3_11,
       handler: "skin/analyze.lambda_handler",
-      code: lambda.Code.fromAsset("../backend", { exclude: ["journal/", "period/"] }),
+      code: lambda.Code.fromAsset("../backend", { exclude: ["period/"] }), // utils/dynamo_helper imports journal.types
       timeout: cdk.Duration.seconds(30),
       memorySize: 512,
       environment: {
       BUCKET_NAME: assetsBucket.bucketName,
+      DYNAMODB_TABLE_NAME: table.tableName, // Analysis result cache
       // Put the Claude Sonnet 4.5 v1 model id here (copy from Bedrock model catalog "API details")
       BEDROCK_MODEL_ID: "global.anthropic.claude-sonnet-4-5-20250929-v1:0",
+      // Selfies are sent to Bedrock cropped to the face and at most this size
+      ANALYSIS_IMAGE_MAX_EDGE: "1024",
+      ANALYSIS_IMAGE_QUALITY: "85",
       },
     });
 
@@ -89,6 +123,7 @@ export class GlowCycleStack extends cdk.Stack {
       code: lambda.Code.fromAsset('../backend'),
       environment: {
         DYNAMODB_TABLE_NAME: table.tableName,
+        ARCHIVE_BUCKET_NAME: archiveBucket.bucketName,
       },
     });
 
@@ -98,6 +133,7 @@ export class GlowCycleStack extends cdk.Stack {
       code: lambda.Code.fromAsset('../backend'),
       environment: {
         DYNAMODB_TABLE_NAME: table.tableName,
+        ARCHIVE_BUCKET_NAME: archiveBucket.bucketName, // History rebuilds read archived years
       },
     });
 
@@ -107,25 +143,27 @@ export class GlowCycleStack extends cdk.Stack {
       code: lambda.Code.fromAsset('../backend'),
       environment: {
         DYNAMODB_TABLE_NAME: table.tableName,
+        ARCHIVE_BUCKET_NAME: archiveBucket.bucketName, // Correlation rebuilds read archived years
       },
       timeout: cdk.Duration.seconds(30), // Bedrock calls may take longer
     });
-    journalLambda.addToRolePolicy(new iam.PolicyStatement({
-      actions: ["dynamodb:DescribeLimits"],
-      resources: ["*"],  // Dynamo calls DescribeLimits on the account level
-    }));
     // -------------------------
     // Permissions
     // -------------------------
     table.grantReadWriteData(journalLambda);
     table.grantReadWriteData(periodLambda);
-    table.grantReadData(wellnessLambda); // Wellness only needs read access
+    table.grantReadWriteData(wellnessLambda); // Writes the STATS item on a user's first visit
     glowCycleSecret.grantRead(journalLambda);
     glowCycleSecret.grantRead(periodLambda);
     glowCycleSecret.grantRead(wellnessLambda);
+    archiveBucket.grantRead(wellnessLambda);
+    archiveBucket.grantRead(periodLambda);
     assetsBucket.grantWrite(skinUploadUrlLambda);
-    assetsBucket.grantRead(skinAnalyzeLambda);
+    assetsBucket.grantReadWrite(skinAnalyzeLambda); // Caches the normalised selfie under analysis/
+    table.grantReadWriteData(skinAnalyzeLambda); // Analysis result cache
+    table.grantReadWriteData(skinUploadUrlLambda); // Analysis jobs
     assetsBucket.grantPut(skinUploadUrlLambda);
+    archiveBucket.grantRead(journalLambda);
 
     journalLambda.addToRolePolicy(
       new iam.PolicyStatement({
@@ -164,11 +202,6 @@ export class GlowCycleStack extends cdk.Stack {
       resources: ['*'],
     }));
 
-    wellnessLambda.addToRolePolicy(new iam.PolicyStatement({
-      actions: ["dynamodb:DescribeLimits"],
-      resources: ["*"],
-    }));
-
     // -------------------------
     // API Gateway
     // -------------------------
@@ -183,7 +216,8 @@ export class GlowCycleStack extends cdk.Stack {
           'Authorization',
           'X-Api-Key',
           'X-Amz-Security-Token',
-          'X-Requested-With'
+          'X-Requested-With',
+          'If-None-Match'
         ],
       },
     });
@@ -210,14 +244,73 @@ export class GlowCycleStack extends cdk.Stack {
       runtime: lambda.Runtime.PYTHON_3_11,
       handler: 'skin/history.lambda_handler',
       code: lambda.Code.fromAsset('../backend'),
-      environment: { DYNAMODB_TABLE_NAME: table.tableName },
+      environment: {
+        DYNAMODB_TABLE_NAME: table.tableName,
+        ARCHIVE_BUCKET_NAME: archiveBucket.bucketName,
+        BUCKET_NAME: assetsBucket.bucketName, // Presigned thumbnail URLs
+      },
     });
     table.grantReadWriteData(skinHistoryLambda);
+    archiveBucket.grantRead(skinHistoryLambda);
+    assetsBucket.grantRead(skinHistoryLambda, 'thumbnails/*'); // URLs are signed with this role
 
     const skinHistory = api.root.getResource('skin')!.addResource('history');
     skinHistory.addMethod('POST', new apigateway.LambdaIntegration(skinHistoryLambda));
     skinHistory.addMethod('GET', new apigateway.LambdaIntegration(skinHistoryLambda));
 
+    // Asynchronous analysis: uploading a selfie with a job (upload-url with
+    // "async": true) runs the worker; clients poll analysis-status
+    const skinAnalysisWorkerLambda = new lambda.Function(this, 'SkinAnalysisWorkerLambda', {
+      runtime: lambda.Runtime.PYTHON_3_11,
+      handler: 'skin/worker.lambda_handler',
+      code: lambda.Code.fromAsset('../backend'),
+      timeout: cdk.Duration.minutes(2),
+      memorySize: 512,
+      reservedConcurrentExecutions: 5, // Caps parallel Rekognition/Bedrock calls, separately from the API
+      retryAttempts: 2,
+      environment: {
+        BUCKET_NAME: assetsBucket.bucketName,
+        DYNAMODB_TABLE_NAME: table.tableName,
+        ARCHIVE_BUCKET_NAME: archiveBucket.bucketName,
+        BEDROCK_MODEL_ID: "global.anthropic.claude-sonnet-4-5-20250929-v1:0",
+        ANALYSIS_IMAGE_MAX_EDGE: "1024",
+        ANALYSIS_IMAGE_QUALITY: "85",
+      },
+    });
+    assetsBucket.grantReadWrite(skinAnalysisWorkerLambda);
+    table.grantReadWriteData(skinAnalysisWorkerLambda);
+    archiveBucket.grantRead(skinAnalysisWorkerLambda);
+    skinAnalysisWorkerLambda.addToRolePolicy(new iam.PolicyStatement({
+      actions: ['rekognition:DetectFaces'],
+      resources: ['*'],
+    }));
+    skinAnalysisWorkerLambda.addToRolePolicy(new iam.PolicyStatement({
+      actions: ['bedrock:InvokeModel'],
+      resources: [
+        'arn:aws:bedrock:*::foundation-model/anthropic.claude-sonnet-4-5-20250929-v1:0',
+        'arn:aws:bedrock:*:*:inference-profile/global.anthropic.claude-sonnet-4-5-20250929-v1:0',
+      ],
+    }));
+    assetsBucket.addEventNotification(
+      s3.EventType.OBJECT_CREATED,
+      new s3n.LambdaDestination(skinAnalysisWorkerLambda),
+      { prefix: 'selfies/', suffix: '.jpg' },
+    );
+
+    const skinAnalysisStatusLambda = new lambda.Function(this, 'SkinAnalysisStatusLambda', {
+      runtime: lambda.Runtime.PYTHON_3_11,
+      handler: 'skin/status.lambda_handler',
+      code: lambda.Code.fromAsset('../backend'),
+      timeout: cdk.Duration.seconds(29), // Long polls wait up to 20 s
+      environment: {
+        DYNAMODB_TABLE_NAME: table.tableName,
+      },
+    });
+    table.grantReadData(skinAnalysisStatusLambda);
+
+    const skinAnalysisStatus = api.root.getResource('skin')!.addResource('analysis-status');
+    skinAnalysisStatus.addMethod('GET', new apigateway.LambdaIntegration(skinAnalysisStatusLambda));
+
     // Journal (ONE resource, multiple methods)
     const journalResource = api.root.addResource('journal');
 
@@ -231,6 +324,14 @@ export class GlowCycleStack extends cdk.Stack {
       new apigateway.LambdaIntegration(journalLambda)
     );
 
+    // Full-text search over journal entries
+    const journalSearchResource = journalResource.addResource('search');
+    journalSearchResource.addMethod('GET', new apigateway.LambdaIntegration(journalLambda));
+
+    // Tag / feeling / cycle-phase co-occurrence statistics
+    const journalInsightsResource = journalResource.addResource('insights');
+    journalInsightsResource.addMethod('GET', new apigateway.LambdaIntegration(journalLambda));
+
     // Period tracking (multiple methods)
     const periodResource = api.root.addResource('period');
     
@@ -249,7 +350,75 @@ export class GlowCycleStack extends cdk.Stack {
       new apigateway.LambdaIntegration(periodLambda)
     );
 
-    // Wellness AI endpoint
+    // Daily cycle phases for a date range (ETag-cached)
+    const periodCalendarResource = periodResource.addResource('calendar');
+    periodCalendarResource.addMethod('GET', new apigateway.LambdaIntegration(periodLambda));
+
+    // Bulk history import (journal + period records as NDJSON or CSV)
+    const bulkImportLambda = new lambda.Function(this, 'BulkImportLambda', {
+      runtime: lambda.Runtime.PYTHON_3_11,
+      handler: 'bulk_import.handler.lambda_handler',
+      code: lambda.Code.fromAsset('../backend'),
+      environment: {
+        DYNAMODB_TABLE_NAME: table.tableName,
+        ARCHIVE_BUCKET_NAME: archiveBucket.bucketName, // STATS rebuilds read archived years
+      },
+      timeout: cdk.Duration.seconds(29), // API Gateway's limit; MAX_IMPORT_ROWS keeps imports within it
+      memorySize: 512,
+    });
+    table.grantReadWriteData(bulkImportLambda);
+    archiveBucket.grantRead(bulkImportLambda);
+
+    const importResource = api.root.addResource('import');
+    importResource.addMethod(
+      'POST',
+      new apigateway.LambdaIntegration(bulkImportLambda)
+    );
+
+    // Full history export (NDJSON or CSV), streamed to S3
+    const exportLambda = new lambda.Function(this, 'ExportLambda', {
+      runtime: lambda.Runtime.PYTHON_3_11,
+      handler: 'export.handler.lambda_handler',
+      code: lambda.Code.fromAsset('../backend'),
+      environment: {
+        DYNAMODB_TABLE_NAME: table.tableName,
+        EXPORT_BUCKET_NAME: exportBucket.bucketName,
+        ARCHIVE_BUCKET_NAME: archiveBucket.bucketName,
+      },
+      timeout: cdk.Duration.minutes(5),
+      memorySize: 512,
+    });
+    table.grantReadData(exportLambda);
+    exportBucket.grantReadWrite(exportLambda);
+    archiveBucket.grantRead(exportLambda);
+
+    const exportResource = api.root.addResource('export');
+    exportResource.addMethod(
+      'POST',
+      new apigateway.LambdaIntegration(exportLambda)
+    );
+
+    // Weekly archiving of old journal and skin records to S3
+    const archiveLambda = new lambda.Function(this, 'ArchiveLambda', {
+      runtime: lambda.Runtime.PYTHON_3_11,
+      handler: 'archive.handler.lambda_handler',
+      code: lambda.Code.fromAsset('../backend'),
+      environment: {
+        DYNAMODB_TABLE_NAME: table.tableName,
+        ARCHIVE_BUCKET_NAME: archiveBucket.bucketName,
+        ARCHIVE_HORIZON_DAYS: '365',
+      },
+      timeout: cdk.Duration.minutes(15),
+      memorySize: 1024,
+    });
+    table.grantReadWriteData(archiveLambda);
+    archiveBucket.grantReadWrite(archiveLambda);
+
+    new events.Rule(this, 'ArchiveSchedule', {
+      schedule: events.Schedule.cron({ weekDay: 'SUN', hour: '3', minute: '0' }),
+      targets: [new targets.LambdaFunction(archiveLambda)],
+    });
+
     const wellnessResource = api.root.addResource('wellness');
     
     wellnessResource.addMethod(
@@ -257,6 +426,10 @@ export class GlowCycleStack extends cdk.Stack {
       new apigateway.LambdaIntegration(wellnessLambda)
     );
 
+    // Mood/energy vs cycle phase vs skin metric correlations (cached per user)
+    const wellnessCorrelationsResource = wellnessResource.addResource('correlations');
+    wellnessCorrelationsResource.addMethod('GET', new apigateway.LambdaIntegration(wellnessLambda));
+
     // Judge setup endpoint
     const judgeSetupLambda = new lambda.Function(this, 'JudgeSetupLambda', {
       runtime: lambda.Runtime.PYTHON_3_11,
@@ -287,12 +460,6 @@ export class GlowCycleStack extends cdk.Stack {
       environment: { DYNAMODB_TABLE_NAME: table.tableName },
     });
     table.grantReadWriteData(userLambda);
-    
-    // Grant additional DynamoDB permissions for describe operations
-    userLambda.addToRolePolicy(new iam.PolicyStatement({
-      actions: ['dynamodb:DescribeLimits'],
-      resources: ['*']
-    }));
 
     const userResource = api.root.addResource('user');
     
@@ -0,0 +1,183 @@
+"""
+Offline latency benchmark of the skin analysis pipeline (skin/analyze.py).
+
+Runs analyze() against fake S3, Rekognition and Bedrock clients that
+sleep for the given latencies. Times fresh photos, which the result
+cache can't answer, and new uploads of a photo the table cache already
+holds, which are answered without downloading it. Also times dark
+uploads, which the local pre-screen rejects before any Rekognition call.
+
+    python tests/backend/bench_analyze.py
+    python tests/backend/bench_analyze.py --s3-ms 120 --dynamo-ms 20 --iterations 20
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import uuid
+
+BACKEND_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "backend")
+)
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault("DYNAMODB_TABLE_NAME", "GlowCycleTable")
+os.environ.setdefault("BUCKET_NAME", "glowcycle-assets")
+os.environ.setdefault("BEDROCK_MODEL_ID", "bench-model")
+
+from botocore.exceptions import ClientError  # noqa: E402
+from PIL import Image, ImageDraw  # noqa: E402
+
+from dynamo_emulator import install_emulator  # noqa: E402
+from utils.aws_clients import set_override  # noqa: E402
+from utils.image_processing import NORMALISED_PREFIX  # noqa: E402
+
+emulator = install_emulator()
+
+import skin.analyze as analyze_module  # noqa: E402
+
+
+class FakeS3:
+    def __init__(self, latency: float, image: bytes) -> None:
+        self.latency = latency
+        self.image = image
+        self.good_image = image
+        self.bytes_read = 0
+        self.etag = None  # per key unless set
+        self._lock = threading.Lock()
+
+    def head_object(self, Bucket, Key):
+        time.sleep(self.latency / 4)
+        return {"ETag": f'"{self.etag or Key}"'}
+
+    def get_object(self, Bucket, Key):
+        time.sleep(self.latency)
+        if Key.startswith(NORMALISED_PREFIX):
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        return {"Body": _Body(self)}
+
+    def put_object(self, **kwargs):
+        time.sleep(self.latency / 2)
+
+
+class _Body:
+    def __init__(self, s3: FakeS3) -> None:
+        self._s3 = s3
+
+    def read(self):
+        with self._s3._lock:
+            self._s3.bytes_read += len(self._s3.image)
+        return self._s3.image
+
+    def close(self):
+        pass
+
+
+class FakeRekognition:
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.calls = 0
+
+    def detect_faces(self, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        return {"FaceDetails": [{
+            "Confidence": 99,
+            "Quality": {"Brightness": 80, "Sharpness": 80},
+            "BoundingBox": {"Left": 0.25, "Top": 0.2, "Width": 0.5, "Height": 0.6},
+        }]}
+
+
+class FakeBedrock:
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+
+    def invoke_model(self, **kwargs):
+        time.sleep(self.latency)
+        text = json.dumps(
+            {
+                "summary": "Balanced",
+                "metrics": {"radiance": 70},
+                "overall_skin_health": 72,
+            }
+        )
+        return {"body": io.BytesIO(json.dumps({"content": [{"text": text}]}).encode())}
+
+
+def selfie(brightness: float = 1.0) -> bytes:
+    """A textured 1600x1200 JPEG, so it passes the sharpness pre-screen"""
+    random.seed(7)
+    background = tuple(int(value * brightness) for value in (200, 160, 140))
+    image = Image.new("RGB", (1600, 1200), background)
+    draw = ImageDraw.Draw(image)
+    for _ in range(3000):
+        x, y = random.randrange(1600), random.randrange(1200)
+        size = random.randrange(2, 12)
+        colour = tuple(int(random.randrange(80, 230) * brightness) for _ in range(3))
+        draw.ellipse((x, y, x + size, y + size), fill=colour)
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=90)
+    return output.getvalue()
+
+
+def run(iterations: int) -> list:
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            response = analyze_module.analyze(
+                {"s3Key": f"selfies/{uuid.uuid4()}.jpg", "timeOfDay": "morning"}
+            )
+        latencies.append((time.perf_counter() - started) * 1000)
+        assert response["statusCode"] in (200, 400), response
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the skin analysis pipeline")
+    parser.add_argument("--s3-ms", type=float, default=80)
+    parser.add_argument("--rekognition-ms", type=float, default=300)
+    parser.add_argument("--bedrock-ms", type=float, default=200)
+    parser.add_argument(
+        "--dynamo-ms", type=float, default=10, help="Latency added to every table call"
+    )
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+
+    emulator.latency_ms = args.dynamo_ms
+    s3 = FakeS3(args.s3_ms / 1000, selfie())
+    rekognition = FakeRekognition(args.rekognition_ms / 1000)
+    set_override("s3", s3, kind="client")
+    set_override("rekognition", rekognition, kind="client")
+    set_override("bedrock-runtime", FakeBedrock(args.bedrock_ms / 1000), kind="client")
+
+    print(f"{'request':<24}{'p50 ms':>10}{'mean ms':>10}{'bytes read':>12}")
+    for name, etag in [("fresh photo", None), ("table cache hit", "same-photo")]:
+        s3.etag = etag
+        if etag:
+            run(1)  # stores the entry the other uploads of the photo hit
+        s3.bytes_read = 0
+        latencies = run(args.iterations)
+        print(
+            f"{name:<24}{statistics.median(latencies):>10.1f}"
+            f"{statistics.mean(latencies):>10.1f}{s3.bytes_read:>12}"
+        )
+    s3.etag = None
+
+    s3.image = selfie(brightness=0.12)
+    rekognition.calls = 0
+    latencies = run(args.iterations)
+    print(
+        f"dark uploads: p50 {statistics.median(latencies):.1f} ms, "
+        f"Rekognition calls {rekognition.calls}/{args.iterations}"
+    )
+    s3.image = s3.good_image
+
+
+if __name__ == "__main__":
+    main()
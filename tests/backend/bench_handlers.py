@@ -0,0 +1,256 @@
+"""
+Offline throughput/latency benchmarks for the GlowCycleTable handlers.
+
+Runs the journal, period, skin history, user and wellness handlers
+against the in-memory table emulator (tests/backend/dynamo_emulator.py)
+for users with different history sizes, and prints latency percentiles
+and throughput per operation. Numbers are reproducible for a given seed
+and latency setting.
+
+    python tests/backend/bench_handlers.py
+    python tests/backend/bench_handlers.py --history 100 10000 --latency-ms 4
+"""
+import argparse
+import contextlib
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+BACKEND_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "backend")
+)
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault("DYNAMODB_TABLE_NAME", "GlowCycleTable")
+
+from dynamo_emulator import install_emulator  # noqa: E402
+
+FEELINGS = ["amazing", "happy", "okay", "tired", "sad"]
+TAGS = ["work", "fitness", "friends", "sleep", "family"]
+
+DEVNULL = open(os.devnull, "w")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Benchmark handlers against the in-memory GlowCycleTable"
+    )
+    parser.add_argument("--history", type=int, nargs="+", default=[100, 1000, 10000],
+                        help="Journal entries per benchmark user")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=0.0,
+        help="Latency added to every table call",
+    )
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=None,
+        help="Items per query page (stands in for the 1 MB limit)",
+    )
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args()
+
+
+def seed_user(table, user: str, journals: int) -> None:
+    """Writes a history directly, bypassing the handlers (and the STATS item)"""
+    from journal.types import DayPeriod, FeelingType
+    from user.handler import hash_password
+    from utils.dynamo_helper import (
+        JournalTableObject,
+        PeriodTableObject,
+        SkinAnalysisTableObject,
+        UserProfileTableObject,
+    )
+
+    start = datetime(2020, 1, 1, 8, 0, 0)
+    for i in range(journals):
+        table.put_item(Item=JournalTableObject(
+            user=user,
+            feeling=FeelingType(FEELINGS[i % len(FEELINGS)]),
+            energy=(i * 7) % 100,
+            thoughts=f"Entry {i}: slept ok, busy day at work",
+            tags=[TAGS[i % len(TAGS)], TAGS[(i + 2) % len(TAGS)]],
+            date=start + timedelta(hours=12 * i),
+            time=DayPeriod.from_bool(i % 2 == 1)
+        )._to_dynamo_representation())
+
+    for i in range(max(1, journals // 56)):
+        table.put_item(Item=PeriodTableObject(
+            user=user,
+            period_date=start + timedelta(days=28 * i),
+            created_at=start.isoformat(),
+            user_age=28,
+            cycle_length=28
+        )._to_dynamo_representation())
+
+    for i in range(max(1, journals // 14)):
+        table.put_item(
+            Item=SkinAnalysisTableObject(
+                user=user,
+                created_at=start + timedelta(days=7 * i),
+                attributes={
+                    "overall_skin_health": Decimal("7.5"),
+                    "concerns_detected": ["dryness"],
+                    "skin_analysis": {
+                        "hydration": Decimal("0.6"),
+                        "redness": Decimal("0.2"),
+                    },
+                    "face_data": {"landmarks": [Decimal(j) for j in range(64)]},
+                },
+            )._to_dynamo_representation()
+        )
+
+    table.put_item(Item=UserProfileTableObject(
+        user=user,
+        display_name=user.title(),
+        password_hash=hash_password("password"),
+        setup_completed=True
+    )._to_dynamo_representation())
+
+
+def get_event(params: dict) -> dict:
+    return {"httpMethod": "GET", "queryStringParameters": params}
+
+
+def post_event(body: dict, resource: str = "") -> dict:
+    return {"httpMethod": "POST", "resource": resource, "body": json.dumps(body)}
+
+
+def measure(name: str, call, iterations: int) -> dict:
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    for i in range(iterations):
+        call_started = time.perf_counter()
+        try:
+            # Handlers that print() would otherwise dominate the timings
+            with contextlib.redirect_stdout(DEVNULL):
+                response = call(i)
+            if isinstance(response, dict) and response.get("statusCode", 200) >= 400:
+                errors += 1
+        except Exception:
+            errors += 1
+        latencies.append((time.perf_counter() - call_started) * 1000)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "name": name,
+        "p50": statistics.median(latencies),
+        "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "mean": statistics.fmean(latencies),
+        "throughput": iterations / elapsed if elapsed else float("inf"),
+        "errors": errors,
+    }
+
+
+def run_scenario(emulator, history: int, iterations: int) -> list:
+    from journal.handler import lambda_handler as journal_handler
+    from period.handler import lambda_handler as period_handler
+    from skin.history import lambda_handler as skin_history_handler
+    from user.lambda_handler import lambda_handler as user_handler
+    from utils.repository import DYNAMODB_TABLE_NAME
+    from wellness.handler import get_user_context
+
+    user = f"bench-{history}"
+    seed_user(emulator.Table(DYNAMODB_TABLE_NAME), user, history)
+
+    def journal_post(i):
+        day = datetime(2030, 1, 1) + timedelta(days=i)
+        return journal_handler(post_event({
+            "user": user, "feeling": "happy", "energy": 60, "thoughts": "benchmark",
+            "tags": ["work"], "date": day.strftime("%d-%m-%Y"), "night": False
+        }), None)
+
+    def period_post(i):
+        day = datetime(2030, 1, 1) + timedelta(days=28 * i)
+        return period_handler(
+            post_event(
+                {
+                    "user": user,
+                    "period_date": day.strftime("%d-%m-%Y"),
+                    "cycle_length": 28,
+                }
+            ),
+            None,
+        )
+
+    # The first wellness read backfills STATS; measure steady state
+    get_user_context(user)
+
+    return [
+        measure(
+            "journal GET (full history)",
+            lambda i: journal_handler(get_event({"user": user}), None),
+            iterations,
+        ),
+        measure(
+            "journal GET (limit=20)",
+            lambda i: journal_handler(get_event({"user": user, "limit": "20"}), None),
+            iterations,
+        ),
+        measure("journal POST", journal_post, iterations),
+        measure(
+            "period GET",
+            lambda i: period_handler(get_event({"user": user}), None),
+            iterations,
+        ),
+        measure("period POST", period_post, iterations),
+        measure(
+            "skin history GET",
+            lambda i: skin_history_handler(get_event({"user": user}), None),
+            iterations,
+        ),
+        measure(
+            "user authenticate",
+            lambda i: user_handler(
+                post_event(
+                    {"username": user, "password": "password"}, "/user/authenticate"
+                ),
+                None,
+            ),
+            iterations,
+        ),
+        measure("wellness context", lambda i: get_user_context(user), iterations),
+    ]
+
+
+def main():
+    args = parse_args()
+    emulator = install_emulator(
+        latency_ms=args.latency_ms,
+        throttle_rate=args.throttle_rate,
+        page_size=args.page_size,
+        seed=args.seed
+    )
+
+    print(
+        f"latency={args.latency_ms}ms throttle_rate={args.throttle_rate} "
+        f"page_size={args.page_size} iterations={args.iterations}"
+    )
+    for history in args.history:
+        emulator.reset_calls()
+        results = run_scenario(emulator, history, args.iterations)
+        print(f"\n== {history} journal entries ==")
+        print(
+            f"{'operation':<30}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}"
+            f"{'ops/s':>10}{'errors':>8}"
+        )
+        for result in results:
+            print(
+                f"{result['name']:<30}{result['p50']:>10.2f}{result['p95']:>10.2f}"
+                f"{result['mean']:>10.2f}"
+                f"{result['throughput']:>10.1f}{result['errors']:>8}"
+            )
+        print(f"table calls: {emulator.calls}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark of the resource read path against the low-level client path
+(GlowCycleRepository.query_items(..., fast=True)) on large partitions.
+
+Both run against the in-memory emulator, which keeps items in wire
+format: the resource path decodes them with boto3's TypeDeserializer
+(Decimals), the fast path with dynamo_helper.deserialize_item. Times
+include serializing the response, since that is where the Decimals end.
+
+    python tests/backend/bench_reads.py --sizes 1000 10000 50000
+"""
+import argparse
+import os
+import sys
+import timeit
+from decimal import Decimal
+
+BACKEND_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "backend")
+)
+sys.path.insert(0, BACKEND_DIR)
+
+from dynamo_emulator import install_emulator  # noqa: E402
+
+
+def seed(table, user: str, size: int) -> None:
+    for i in range(size):
+        table.put_item(
+            Item={
+                "user": user,
+                "date": f"SKIN#2020-01-01T00:00:{i:08d}",
+                "created_at": "2020-01-01T00:00:00",
+                "overall_skin_health": Decimal("7.5"),
+                "metrics": {
+                    "hydration": Decimal("0.61"),
+                    "redness": Decimal("0.2"),
+                    "oiliness": Decimal(3),
+                },
+                "concerns_detected": ["dryness", "redness"],
+                "face_data": {
+                    "landmarks": [
+                        {"x": Decimal("0.512"), "y": Decimal("0.431")}
+                        for _ in range(16)
+                    ]
+                },
+                "sk_version": Decimal(3),
+            }
+        )
+        table.put_item(Item={
+            "user": user,
+            "date": f"JOURNAL#2020-01-01T00:00:{i:08d}#morning",
+            "feeling": "happy",
+            "energy": Decimal(i % 100),
+            "thoughts": "Slept well, busy day at work",
+            "tags": ["work", "fitness"],
+            "sk_version": Decimal(3),
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare resource and low-level client read paths"
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--number", type=int, default=3)
+    args = parser.parse_args()
+
+    emulator = install_emulator()
+    from boto3.dynamodb.conditions import Key
+    from utils.repository import DYNAMODB_TABLE_NAME, GlowCycleRepository
+    from utils.serialization import dumps
+
+    repository = GlowCycleRepository()
+    table = emulator.Table(DYNAMODB_TABLE_NAME)
+
+    cases = [
+        ("journal list", "JOURNAL#", ["feeling", "energy", "thoughts", "tags"]),
+        (
+            "skin list (projected)",
+            "SKIN#",
+            ["created_at", "overall_skin_health", "metrics", "concerns_detected"],
+        ),
+        ("skin full items", "SKIN#", None),
+    ]
+
+    print(
+        f"{'case':<24}{'items':>8}{'resource ms':>14}{'client ms':>12}"
+        f"{'speedup':>10}"
+    )
+    timing = {"number": args.number, "repeat": 3}
+    for size in args.sizes:
+        user = f"bench-{size}"
+        seed(table, user, size)
+        for name, prefix, attributes in cases:
+            def read(fast):
+                items, _ = repository.query_items(
+                    user,
+                    sort_condition=Key("date").begins_with(prefix),
+                    attributes=attributes,
+                    fast=fast,
+                )
+                return dumps({"items": items})
+
+            assert read(False) == read(True)
+            resource_runs = timeit.repeat(lambda: read(False), **timing)
+            client_runs = timeit.repeat(lambda: read(True), **timing)
+            resource_time = min(resource_runs) / args.number
+            client_time = min(client_runs) / args.number
+            print(
+                f"{name:<24}{size:>8}"
+                f"{resource_time * 1000:>14.1f}{client_time * 1000:>12.1f}"
+                f"{resource_time / client_time:>9.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
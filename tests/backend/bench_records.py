@@ -0,0 +1,189 @@
+"""
+Micro-benchmark of journal item decoding on large histories.
+
+Compares the previous JournalTableObject path (regex match, then
+strptime on every sort key, Enum(value) lookups, strftime in to_dict,
+a regular dataclass) with the current one: the fixed-width timestamp
+parser and cached enum maps behind _from_dynamo_representation, and
+JournalTableObject.item_to_dict, which renders list responses straight
+from the items. Also reports the memory of the decoded records.
+
+    python tests/backend/bench_records.py --items 50000
+"""
+import argparse
+import os
+import re
+import sys
+import timeit
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List
+
+BACKEND_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "backend")
+)
+sys.path.insert(0, BACKEND_DIR)
+
+from journal.types import DayPeriod, FeelingType  # noqa: E402
+from utils.dynamo_helper import JournalTableObject  # noqa: E402
+from utils.repository import GlowCycleRepository  # noqa: E402
+
+
+# -------------------------
+# Previous implementation, for comparison
+# -------------------------
+
+_LEGACY_JOURNAL = re.compile(
+    r"^(\d{2})-(\d{2})-(\d{4})(?:-(\d{2})-(\d{2})-(\d{2}))?#(\w+)$"
+)
+
+
+def legacy_parse_journal_sk(sk: str):
+    legacy = _LEGACY_JOURNAL.match(sk)
+    if legacy:
+        day, month, year, hour, minute, second, time_of_day = legacy.groups()
+        return (
+            datetime(
+                int(year),
+                int(month),
+                int(day),
+                int(hour or 0),
+                int(minute or 0),
+                int(second or 0),
+            ),
+            time_of_day,
+        )
+    if sk.startswith("JOURNAL#"):
+        sk = sk[len("JOURNAL#"):]
+    timestamp, time_of_day = sk.rsplit("#", 1)
+    return datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S"), time_of_day
+
+
+@dataclass
+class LegacyJournal:
+    user: str
+    feeling: FeelingType
+    energy: int
+    thoughts: str
+    tags: List[str]
+    date: datetime
+    time: DayPeriod
+
+    @classmethod
+    def _from_dynamo_representation(cls, item: dict) -> "LegacyJournal":
+        date_obj, period_part = legacy_parse_journal_sk(item["date"])
+        return cls(
+            user=item["user"],
+            feeling=FeelingType(item["feeling"]),
+            energy=int(item["energy"]),
+            thoughts=item["thoughts"],
+            tags=item["tags"],
+            date=date_obj,
+            time=DayPeriod(period_part)
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "user": self.user,
+            "feeling": self.feeling.value,
+            "energy": self.energy,
+            "thoughts": self.thoughts,
+            "tags": self.tags,
+            "date": self.date.strftime("%d-%m-%Y"),
+            "time": self.time.value,
+            "timestamp": self.date.strftime("%H:%M:%S")
+        }
+
+
+# -------------------------
+# Fixtures
+# -------------------------
+
+def journal_sk(i: int) -> str:
+    day = f"{2000 + i // 8760:04d}-{i // 720 % 12 + 1:02d}-{i // 24 % 28 + 1:02d}"
+    time = f"{i % 24:02d}:{i % 60:02d}:{i * 7 % 60:02d}"
+    return f"JOURNAL#{day}T{time}#{'evening' if i % 2 else 'morning'}"
+
+
+def journal_items(count: int) -> list:
+    """Items as the fast read path returns them (plain ints)"""
+    feelings = [feeling.value for feeling in FeelingType]
+    return [
+        {
+            "user": "sophia",
+            "date": journal_sk(i),
+            "feeling": feelings[i % len(feelings)],
+            "energy": i % 10,
+            "thoughts": "Slept well, busy day at work",
+            "tags": ["work", "fitness"],
+        }
+        for i in range(count)
+    ]
+
+
+def records_memory(build) -> int:
+    tracemalloc.start()
+    records = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark journal item decoding")
+    parser.add_argument("--items", type=int, default=50000)
+    parser.add_argument("--number", type=int, default=3)
+    args = parser.parse_args()
+
+    items = journal_items(args.items)
+
+    def legacy():
+        return [
+            LegacyJournal._from_dynamo_representation(item).to_dict() for item in items
+        ]
+
+    def records():
+        return [
+            record.to_dict()
+            for record in GlowCycleRepository.to_records(JournalTableObject, items)
+        ]
+
+    def direct():
+        return GlowCycleRepository.to_dicts(JournalTableObject, items)
+
+    assert legacy() == records() == direct()
+
+    cases = [
+        ("previous: dataclass + strptime", legacy),
+        ("records: slots + fixed-width", records),
+        ("item_to_dict", direct),
+    ]
+    baseline = None
+    print(
+        f"{'path (' + str(args.items) + ' items)':<34}"
+        f"{'total ms':>10}{'us/item':>10}{'speedup':>10}"
+    )
+    for name, run in cases:
+        seconds = min(timeit.repeat(run, number=args.number, repeat=3)) / args.number
+        baseline = baseline or seconds
+        print(
+            f"{name:<34}{seconds * 1000:>10.1f}{seconds / args.items * 1e6:>10.2f}"
+            f"{baseline / seconds:>9.2f}x"
+        )
+
+    legacy_memory = records_memory(
+        lambda: [LegacyJournal._from_dynamo_representation(item) for item in items]
+    )
+    slots_memory = records_memory(
+        lambda: GlowCycleRepository.to_records(JournalTableObject, items)
+    )
+    print(
+        f"decoded records: {legacy_memory / args.items:.0f} B/item before, "
+        f"{slots_memory / args.items:.0f} B/item with __slots__"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Micro-benchmark of response serialization on large histories.
+
+Compares the previous two-pass approach (a recursive convert_decimals
+over every item, then json.dumps with a DecimalEncoder) with
+utils.serialization.dumps, and float -> Decimal conversion through a
+per-call closure with to_dynamo.
+
+    python tests/backend/bench_serialization.py --items 10000
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+from decimal import Decimal
+
+BACKEND_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "backend")
+)
+sys.path.insert(0, BACKEND_DIR)
+
+from utils.serialization import dumps, to_dynamo  # noqa: E402
+
+
+# -------------------------
+# Previous implementations, for comparison
+# -------------------------
+
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return int(obj) if obj % 1 == 0 else float(obj)
+        return super(DecimalEncoder, self).default(obj)
+
+
+def convert_decimals(obj):
+    if isinstance(obj, list):
+        return [convert_decimals(i) for i in obj]
+    elif isinstance(obj, dict):
+        return {k: convert_decimals(v) for k, v in obj.items()}
+    elif isinstance(obj, Decimal):
+        return int(obj) if obj % 1 == 0 else float(obj)
+    return obj
+
+
+def legacy_convert_floats(analysis):
+    def convert_floats(obj):
+        if isinstance(obj, float):
+            return Decimal(str(obj))
+        elif isinstance(obj, dict):
+            return {k: convert_floats(v) for k, v in obj.items()}
+        elif isinstance(obj, list):
+            return [convert_floats(item) for item in obj]
+        return obj
+    return convert_floats(analysis)
+
+
+# -------------------------
+# Fixtures
+# -------------------------
+
+def journal_items(count: int) -> list:
+    return [
+        {
+            "user": "sophia",
+            "date": f"JOURNAL#2024-01-01T08:{i % 60:02d}:00#morning",
+            "feeling": "happy",
+            "energy": Decimal(i % 100),
+            "thoughts": "Slept well, busy day at work",
+            "tags": ["work", "fitness"],
+            "sk_version": Decimal(3),
+        }
+        for i in range(count)
+    ]
+
+
+def skin_items(count: int) -> list:
+    return [
+        {
+            "user": "sophia",
+            "date": f"SKIN#2024-01-01T08:{i % 60:02d}:00",
+            "overall_skin_health": Decimal("7.5"),
+            "metrics": {
+                "hydration": Decimal("0.61"),
+                "redness": Decimal("0.2"),
+                "oiliness": Decimal("0.35"),
+            },
+            "face_data": {
+                "landmarks": [
+                    {"x": Decimal("0.512"), "y": Decimal("0.431")} for _ in range(8)
+                ]
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def analysis_payload() -> dict:
+    return {
+        "overall_skin_health": 7.5,
+        "metrics": {"hydration": 0.61, "redness": 0.2, "oiliness": 0.35},
+        "face_data": {"landmarks": [{"x": 0.512, "y": 0.431} for _ in range(64)]},
+    }
+
+
+def report(name: str, legacy, current, number: int, unit: int) -> None:
+    legacy_time = min(timeit.repeat(legacy, number=number, repeat=3)) / number
+    current_time = min(timeit.repeat(current, number=number, repeat=3)) / number
+    print(f"{name:<34}{legacy_time * 1000:>12.2f}{current_time * 1000:>12.2f}"
+          f"{unit / current_time:>14,.0f}{legacy_time / current_time:>9.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark Decimal-aware serialization"
+    )
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--number", type=int, default=5)
+    args = parser.parse_args()
+
+    journals = {"entries": journal_items(args.items)}
+    skins = {"analyses": skin_items(args.items)}
+    analysis = analysis_payload()
+
+    legacy_response = json.dumps(convert_decimals(journals), cls=DecimalEncoder)
+    assert json.loads(legacy_response) == json.loads(dumps(journals))
+    assert legacy_convert_floats(analysis) == to_dynamo(analysis)
+
+    print(
+        f"{'operation':<34}{'before ms':>12}{'after ms':>12}"
+        f"{'items/s':>14}{'speedup':>10}"
+    )
+    report(f"journal response ({args.items})",
+           lambda: json.dumps(convert_decimals(journals), cls=DecimalEncoder),
+           lambda: dumps(journals), args.number, args.items)
+    report(f"skin history response ({args.items})",
+           lambda: json.dumps(convert_decimals(skins), cls=DecimalEncoder),
+           lambda: dumps(skins), args.number, args.items)
+    report("skin analysis float -> Decimal",
+           lambda: legacy_convert_floats(analysis),
+           lambda: to_dynamo(analysis), args.number * 200, 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Shared setup for the backend tests.
+
+The handlers build their repository at import time, so the DynamoDB
+emulator (dynamo_emulator.py) is installed here, before any test
+module imports one. S3 is replaced by FakeS3, which keeps objects in a
+dict. Both are emptied before every test.
+"""
+import hashlib
+import io
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "backend")
+)
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault("DYNAMODB_TABLE_NAME", "GlowCycleTable")
+os.environ.setdefault("ARCHIVE_BUCKET_NAME", "glowcycle-archive")
+os.environ.setdefault("BUCKET_NAME", "glowcycle-assets")
+os.environ.setdefault("BEDROCK_MODEL_ID", "test-model")
+
+from botocore.exceptions import ClientError  # noqa: E402
+
+from dynamo_emulator import install_emulator  # noqa: E402
+from utils.aws_clients import set_override  # noqa: E402
+
+TABLE_NAME = os.environ["DYNAMODB_TABLE_NAME"]
+
+
+class FakeS3:
+    """
+    The S3 client calls the handlers make, on objects kept in a dict.
+    calls records (operation, key) for every request.
+    """
+
+    def __init__(self) -> None:
+        self.objects = {}
+        self.calls = []
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.calls.append(("PutObject", Key))
+        self.objects[(Bucket, Key)] = Body if isinstance(Body, bytes) else Body.encode()
+        return {}
+
+    def head_object(self, Bucket, Key):
+        self.calls.append(("HeadObject", Key))
+        body = self._body(Bucket, Key, "HeadObject")
+        return {"ETag": f'"{hashlib.md5(body).hexdigest()}"'}
+
+    def get_object(self, Bucket, Key):
+        self.calls.append(("GetObject", Key))
+        return {"Body": io.BytesIO(self._body(Bucket, Key, "GetObject"))}
+
+    def delete_object(self, Bucket, Key):
+        self.calls.append(("DeleteObject", Key))
+        self.objects.pop((Bucket, Key), None)
+        return {}
+
+    def generate_presigned_url(self, ClientMethod, Params, ExpiresIn):
+        return f"https://{Params['Bucket']}.s3/{Params['Key']}?expires={ExpiresIn}"
+
+    def reset(self) -> None:
+        self.objects.clear()
+        self.calls = []
+
+    def _body(self, bucket, key, operation):
+        if (bucket, key) not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, operation)
+        return self.objects[(bucket, key)]
+
+
+_emulator = install_emulator()
+_s3 = FakeS3()
+set_override("s3", _s3, kind="client")
+
+
+@pytest.fixture(autouse=True)
+def emulator():
+    _emulator.reset()
+    return _emulator
+
+
+@pytest.fixture(autouse=True)
+def s3():
+    _s3.reset()
+    return _s3
+
+
+@pytest.fixture
+def table(emulator):
+    return emulator.Table(TABLE_NAME)
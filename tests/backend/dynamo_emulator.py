@@ -0,0 +1,901 @@
+"""
+In-memory stand-in for GlowCycleTable.
+
+Implements the part of the boto3 DynamoDB resource API the handlers use:
+Table.put_item / get_item / update_item / delete_item / query / scan
+(with boto3 Key/Attr conditions, Limit, ExclusiveStartKey,
+ScanIndexForward and ProjectionExpression), and meta.client
+.transact_write_items / batch_write_item / batch_get_item. Items are
+kept in DynamoDB's wire format and deserialized on every read, like the
+real resource, so numbers come back as Decimal and floats are rejected.
+
+Latency and throttling can be injected for benchmarks. Test-only: it
+lives with the tests so it never ships in a Lambda asset. Install it
+into the client factory before importing a handler (with backend/ on
+sys.path):
+
+    from dynamo_emulator import install_emulator
+    emulator = install_emulator(latency_ms=5)
+    from journal.handler import lambda_handler
+
+Not a full DynamoDB: no 1 MB page limit (use page_size to force paging),
+no capacity accounting, and string expressions only support the forms
+the handlers write: conditions made of attribute_exists/
+attribute_not_exists and comparisons joined by AND, and SET updates
+whose targets may be paths into maps (days.#d.energy) and whose values
+are a placeholder, a path, if_not_exists(path, :v) or a sum/difference
+of two of those.
+"""
+import bisect
+import random
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.exceptions import ClientError
+
+from utils.aws_clients import set_override
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+MAX_TRANSACT_ITEMS = 100
+BATCH_WRITE_ITEMS = 25
+BATCH_GET_ITEMS = 100
+
+
+def _client_error(code: str, message: str, operation: str, **extra) -> ClientError:
+    return ClientError(
+        {"Error": {"Code": code, "Message": message}, **extra}, operation
+    )
+
+
+def _serialize(item: dict) -> dict:
+    return {name: _serializer.serialize(value) for name, value in item.items()}
+
+
+def _deserialize(item: dict) -> dict:
+    return {name: _deserializer.deserialize(value) for name, value in item.items()}
+
+
+# -------------------------
+# Conditions
+# -------------------------
+
+def _attribute_name(attribute) -> str:
+    return attribute.name
+
+
+def _evaluate(condition, item: dict) -> bool:
+    """Evaluates a boto3 Key/Attr condition against a deserialized item"""
+    expression = condition.get_expression()
+    operator, values = expression["operator"], expression["values"]
+
+    if operator == "AND":
+        return _evaluate(values[0], item) and _evaluate(values[1], item)
+    if operator == "OR":
+        return _evaluate(values[0], item) or _evaluate(values[1], item)
+    if operator == "NOT":
+        return not _evaluate(values[0], item)
+
+    name = _attribute_name(values[0])
+    if operator == "attribute_exists":
+        return name in item
+    if operator == "attribute_not_exists":
+        return name not in item
+    if name not in item:
+        return False
+
+    actual = item[name]
+    if operator == "=":
+        return actual == values[1]
+    if operator == "<>":
+        return actual != values[1]
+    if operator == "<":
+        return actual < values[1]
+    if operator == "<=":
+        return actual <= values[1]
+    if operator == ">":
+        return actual > values[1]
+    if operator == ">=":
+        return actual >= values[1]
+    if operator == "BETWEEN":
+        return values[1] <= actual <= values[2]
+    if operator == "begins_with":
+        return isinstance(actual, str) and actual.startswith(values[1])
+    if operator == "contains":
+        return values[1] in actual
+    if operator == "IN":
+        return actual in values[1]
+    raise NotImplementedError(
+        f"Condition operator not supported by the emulator: {operator}"
+    )
+
+
+_COMPARISON = re.compile(r"^\s*([#:\w]+)\s*(=|<>|<=|>=|<|>)\s*([#:\w]+)\s*$")
+_FUNCTION = re.compile(
+    r"^\s*(attribute_exists|attribute_not_exists)\s*\(\s*([#\w.]+)\s*\)\s*$"
+)
+_IF_NOT_EXISTS = re.compile(r"^if_not_exists\s*\(\s*([#\w.]+)\s*,\s*(:\w+)\s*\)$")
+_ARITHMETIC = re.compile(r"^(.+?)\s*([+-])\s*(.+)$")
+_MISSING = object()
+
+
+def _path(expression: str, names: dict) -> List[str]:
+    """The attribute names along a document path such as days.#d.energy"""
+    return [names.get(part, part) for part in expression.strip().split(".")]
+
+
+def _lookup(item: dict, path: List[str]):
+    value = item
+    for name in path:
+        if not isinstance(value, dict) or name not in value:
+            return _MISSING
+        value = value[name]
+    return value
+
+
+def _evaluate_expression(
+    expression: str, item: Optional[dict], names: dict, values: dict
+) -> bool:
+    """Evaluates a string ConditionExpression (native values) against an item"""
+    item = item or {}
+
+    def operand(token: str):
+        if token.startswith(":"):
+            return True, values[token]
+        return False, names.get(token, token)
+
+    for clause in re.split(r"\s+AND\s+", expression, flags=re.IGNORECASE):
+        function = _FUNCTION.match(clause)
+        if function:
+            exists = _lookup(item, _path(function.group(2), names)) is not _MISSING
+            if exists != (function.group(1) == "attribute_exists"):
+                return False
+            continue
+
+        comparison = _COMPARISON.match(clause)
+        if not comparison:
+            raise NotImplementedError(
+                f"Condition expression not supported by the emulator: {clause}"
+            )
+        sides = []
+        for token in (comparison.group(1), comparison.group(3)):
+            is_value, resolved = operand(token)
+            if not is_value and resolved not in item:
+                return False
+            sides.append(resolved if is_value else item[resolved])
+        left, right = sides
+        operator = comparison.group(2)
+        if not {
+            "=": left == right,
+            "<>": left != right,
+            "<": left < right,
+            "<=": left <= right,
+            ">": left > right,
+            ">=": left >= right,
+        }[operator]:
+            return False
+    return True
+
+
+def _split_clauses(expression: str) -> List[str]:
+    """Splits on the commas between clauses, not those inside function calls"""
+    clauses, depth, start = [], 0, 0
+    for index, char in enumerate(expression):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            clauses.append(expression[start:index])
+            start = index + 1
+    clauses.append(expression[start:])
+    return clauses
+
+
+def _project(item: dict, projection: Optional[str], names: Optional[dict]) -> dict:
+    if not projection:
+        return item
+    names = names or {}
+    wanted = [
+        names.get(token.strip(), token.strip()) for token in projection.split(",")
+    ]
+    return {name: item[name] for name in wanted if name in item}
+
+
+# -------------------------
+# Table
+# -------------------------
+
+class InMemoryTable:
+    """
+    One table, keyed by a string partition key and a string sort key.
+    Each partition keeps its sort keys in order, so key-condition queries
+    cost a bisect plus the items returned.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        emulator: "InMemoryDynamoDB",
+        hash_key: str = "user",
+        range_key: str = "date",
+    ) -> None:
+        self.name = name
+        self.table_name = name
+        self.hash_key = hash_key
+        self.range_key = range_key
+        self.meta = emulator.meta
+        self._emulator = emulator
+        self._partitions: Dict[str, Tuple[List[str], Dict[str, dict]]] = {}
+
+    # ---------- Storage ----------
+
+    def _partition(self, pk: str, create: bool = False):
+        partition = self._partitions.get(pk)
+        if partition is None and create:
+            partition = ([], {})
+            self._partitions[pk] = partition
+        return partition
+
+    def _read(self, key: dict) -> Optional[dict]:
+        partition = self._partition(key[self.hash_key])
+        if partition is None:
+            return None
+        stored = partition[1].get(key[self.range_key])
+        return _deserialize(stored) if stored is not None else None
+
+    def _write(self, item: dict) -> None:
+        stored = _serialize(item)
+        sort_keys, items = self._partition(item[self.hash_key], create=True)
+        sk = item[self.range_key]
+        if sk not in items:
+            bisect.insort(sort_keys, sk)
+        items[sk] = stored
+
+    def _remove(self, key: dict) -> None:
+        partition = self._partition(key[self.hash_key])
+        if partition is None:
+            return
+        sort_keys, items = partition
+        if items.pop(key[self.range_key], None) is not None:
+            sort_keys.pop(bisect.bisect_left(sort_keys, key[self.range_key]))
+
+    def _key_of(self, item: dict) -> dict:
+        return {
+            self.hash_key: item[self.hash_key],
+            self.range_key: item[self.range_key],
+        }
+
+    def _check(self, operation: str, current: Optional[dict], kwargs: dict) -> None:
+        expression = kwargs.get("ConditionExpression")
+        if expression is None:
+            return
+        if isinstance(expression, str):
+            passed = _evaluate_expression(
+                expression,
+                current,
+                kwargs.get("ExpressionAttributeNames", {}),
+                kwargs.get("ExpressionAttributeValues", {})
+            )
+        else:
+            passed = _evaluate(expression, current or {})
+        if not passed:
+            raise _client_error(
+                "ConditionalCheckFailedException",
+                "The conditional request failed",
+                operation,
+            )
+
+    # ---------- Item API ----------
+
+    def put_item(self, Item: dict, **kwargs) -> dict:
+        self._emulator._before_call("PutItem")
+        with self._emulator._lock:
+            self._check("PutItem", self._read(self._key_of(Item)), kwargs)
+            self._write(Item)
+        return {}
+
+    def get_item(
+        self,
+        Key: dict,
+        ProjectionExpression: Optional[str] = None,
+        ExpressionAttributeNames: Optional[dict] = None,
+        **kwargs,
+    ) -> dict:
+        self._emulator._before_call("GetItem")
+        item = self._read(Key)
+        if item is None:
+            return {}
+        return {"Item": _project(item, ProjectionExpression, ExpressionAttributeNames)}
+
+    def delete_item(self, Key: dict, **kwargs) -> dict:
+        self._emulator._before_call("DeleteItem")
+        with self._emulator._lock:
+            self._check("DeleteItem", self._read(Key), kwargs)
+            self._remove(Key)
+        return {}
+
+    def update_item(
+        self,
+        Key: dict,
+        UpdateExpression: str,
+        ExpressionAttributeNames: Optional[dict] = None,
+        ExpressionAttributeValues: Optional[dict] = None,
+        **kwargs,
+    ) -> dict:
+        """Supports SET clauses (see the module docstring)"""
+        self._emulator._before_call("UpdateItem")
+        names = ExpressionAttributeNames or {}
+        values = ExpressionAttributeValues or {}
+        if not UpdateExpression.strip().upper().startswith("SET "):
+            raise NotImplementedError(
+                f"Update expression not supported by the emulator: {UpdateExpression}"
+            )
+
+        with self._emulator._lock:
+            current = self._read(Key)
+            self._check(
+                "UpdateItem",
+                current,
+                {
+                    **kwargs,
+                    "ExpressionAttributeNames": names,
+                    "ExpressionAttributeValues": values,
+                },
+            )
+            item = current or dict(Key)
+            # Every value is read from the item as it was before the update
+            clauses = _split_clauses(UpdateExpression.strip()[4:])
+            assignments = [
+                (_path(target, names), self._update_value(source, item, names, values))
+                for target, source in (clause.split("=", 1) for clause in clauses)
+            ]
+            for path, value in assignments:
+                parent = _lookup(item, path[:-1])
+                if not isinstance(parent, dict):
+                    raise _client_error(
+                        "ValidationException",
+                        "The document path provided in the update expression is "
+                        "invalid for update",
+                        "UpdateItem"
+                    )
+                parent[path[-1]] = value
+            self._write(item)
+        return {}
+
+    @staticmethod
+    def _update_value(source: str, item: dict, names: dict, values: dict):
+        source = source.strip()
+        arithmetic = _ARITHMETIC.match(source)
+        if arithmetic and not _IF_NOT_EXISTS.match(source):
+            left, right = (
+                InMemoryTable._update_value(operand, item, names, values)
+                for operand in (arithmetic.group(1), arithmetic.group(3))
+            )
+            return left + right if arithmetic.group(2) == "+" else left - right
+        if source.startswith(":"):
+            return values[source]
+        default = _IF_NOT_EXISTS.match(source)
+        value = _lookup(item, _path(default.group(1) if default else source, names))
+        if value is not _MISSING:
+            return value
+        if default:
+            return values[default.group(2)]
+        raise _client_error(
+            "ValidationException",
+            "The provided expression refers to an attribute that does not exist "
+            "in the item",
+            "UpdateItem"
+        )
+
+    # ---------- Query / Scan ----------
+
+    def _split_key_condition(self, condition) -> Tuple[str, Optional[object]]:
+        expression = condition.get_expression()
+        if expression["operator"] == "AND":
+            hash_condition, sort_condition = expression["values"]
+        else:
+            hash_condition, sort_condition = condition, None
+        hash_expression = hash_condition.get_expression()
+        if (
+            hash_expression["operator"] != "="
+            or _attribute_name(hash_expression["values"][0]) != self.hash_key
+        ):
+            raise _client_error(
+                "ValidationException",
+                "Query condition missed key schema element",
+                "Query",
+            )
+        return hash_expression["values"][1], sort_condition
+
+    @staticmethod
+    def _sort_key_range(sort_keys: List[str], sort_condition) -> Tuple[int, int]:
+        """Index range of sort keys matching the condition"""
+        if sort_condition is None:
+            return 0, len(sort_keys)
+        expression = sort_condition.get_expression()
+        operator, values = expression["operator"], expression["values"]
+        if operator == "=":
+            low = bisect.bisect_left(sort_keys, values[1])
+            return low, bisect.bisect_right(sort_keys, values[1])
+        if operator == "<":
+            return 0, bisect.bisect_left(sort_keys, values[1])
+        if operator == "<=":
+            return 0, bisect.bisect_right(sort_keys, values[1])
+        if operator == ">":
+            return bisect.bisect_right(sort_keys, values[1]), len(sort_keys)
+        if operator == ">=":
+            return bisect.bisect_left(sort_keys, values[1]), len(sort_keys)
+        if operator == "BETWEEN":
+            low = bisect.bisect_left(sort_keys, values[1])
+            return low, bisect.bisect_right(sort_keys, values[2])
+        if operator == "begins_with":
+            low = bisect.bisect_left(sort_keys, values[1])
+            high = low
+            while high < len(sort_keys) and sort_keys[high].startswith(values[1]):
+                high += 1
+            return low, high
+        raise _client_error(
+            "ValidationException",
+            f"Unsupported key condition operator: {operator}",
+            "Query",
+        )
+
+    def _page(
+        self,
+        candidates: List[Tuple[str, str]],
+        limit: Optional[int],
+        filter_condition,
+        projection,
+        names,
+        decode: bool = True,
+    ):
+        """
+        Reads up to limit candidates (DynamoDB applies Limit before the
+        filter) and returns (items, last_evaluated_key). Without decode,
+        items stay in wire format, as the low-level client returns them.
+        """
+        page_size = self._emulator.page_size
+        cap = min(filter(None, (limit, page_size)), default=None)
+        evaluated = candidates[:cap] if cap else candidates
+
+        items = []
+        for pk, sk in evaluated:
+            item = self._partitions[pk][1][sk]
+            if decode and filter_condition is not None:
+                item = _deserialize(item)
+                if not _evaluate(filter_condition, item):
+                    continue
+                items.append(_project(item, projection, names))
+                continue
+            # Like DynamoDB, only projected attributes are sent (and decoded)
+            item = _project(item, projection, names)
+            items.append(_deserialize(item) if decode else item)
+
+        last_key = None
+        if cap and len(candidates) > cap:
+            pk, sk = evaluated[-1]
+            last_key = {self.hash_key: pk, self.range_key: sk}
+        return items, last_key
+
+    def query(
+        self,
+        KeyConditionExpression,
+        ScanIndexForward: bool = True,
+        Limit: Optional[int] = None,
+        ExclusiveStartKey: Optional[dict] = None,
+        FilterExpression=None,
+        ProjectionExpression: Optional[str] = None,
+        ExpressionAttributeNames: Optional[dict] = None,
+        **kwargs,
+    ) -> dict:
+        self._emulator._before_call("Query")
+        pk, sort_condition = self._split_key_condition(KeyConditionExpression)
+        return self._query(
+            pk,
+            sort_condition,
+            ScanIndexForward,
+            Limit,
+            ExclusiveStartKey,
+            FilterExpression,
+            ProjectionExpression,
+            ExpressionAttributeNames,
+        )
+
+    def _query(
+        self,
+        pk: str,
+        sort_condition,
+        forward: bool,
+        limit: Optional[int],
+        start_key: Optional[dict],
+        filter_condition=None,
+        projection: Optional[str] = None,
+        names: Optional[dict] = None,
+        decode: bool = True,
+    ) -> dict:
+        with self._emulator._lock:
+            partition = self._partition(pk)
+            sort_keys = partition[0] if partition else []
+            low, high = self._sort_key_range(sort_keys, sort_condition)
+            if start_key:
+                start = start_key[self.range_key]
+                if forward:
+                    low = max(low, bisect.bisect_right(sort_keys, start))
+                else:
+                    high = min(high, bisect.bisect_left(sort_keys, start))
+            selected = sort_keys[low:high] if high > low else []
+            if not forward:
+                selected = selected[::-1]
+            items, last_key = self._page(
+                [(pk, sk) for sk in selected],
+                limit,
+                filter_condition,
+                projection,
+                names,
+                decode,
+            )
+
+        response = {"Items": items, "Count": len(items)}
+        if last_key:
+            response["LastEvaluatedKey"] = last_key
+        return response
+
+    def scan(
+        self,
+        Limit: Optional[int] = None,
+        ExclusiveStartKey: Optional[dict] = None,
+        FilterExpression=None,
+        Segment: int = 0,
+        TotalSegments: int = 1,
+        ProjectionExpression: Optional[str] = None,
+        ExpressionAttributeNames: Optional[dict] = None,
+        **kwargs,
+    ) -> dict:
+        """Scans partitions in key order; segments split partitions round-robin"""
+        self._emulator._before_call("Scan")
+        with self._emulator._lock:
+            candidates = [
+                (pk, sk)
+                for index, pk in enumerate(sorted(self._partitions))
+                if index % TotalSegments == Segment
+                for sk in self._partitions[pk][0]
+            ]
+            if ExclusiveStartKey:
+                start = (
+                    ExclusiveStartKey[self.hash_key],
+                    ExclusiveStartKey[self.range_key],
+                )
+                candidates = candidates[bisect.bisect_right(candidates, start):]
+            items, last_key = self._page(
+                candidates,
+                Limit,
+                FilterExpression,
+                ProjectionExpression,
+                ExpressionAttributeNames,
+            )
+
+        response = {"Items": items, "Count": len(items)}
+        if last_key:
+            response["LastEvaluatedKey"] = last_key
+        return response
+
+    def item_count(self) -> int:
+        return sum(len(sort_keys) for sort_keys, _ in self._partitions.values())
+
+
+# -------------------------
+# Resource / client
+# -------------------------
+
+class _EmulatorClient:
+    """The low-level operations reached through table.meta.client"""
+
+    def __init__(self, emulator: "InMemoryDynamoDB") -> None:
+        self._emulator = emulator
+
+    def transact_write_items(self, TransactItems: List[dict], **kwargs) -> dict:
+        emulator = self._emulator
+        emulator._before_call("TransactWriteItems")
+        if len(TransactItems) > MAX_TRANSACT_ITEMS:
+            raise _client_error(
+                "ValidationException",
+                f"Member must have length less than or equal to {MAX_TRANSACT_ITEMS}",
+                "TransactWriteItems",
+            )
+
+        with emulator._lock:
+            reasons, failed = [], False
+            for operation in TransactItems:
+                kind, spec = next(iter(operation.items()))
+                table = emulator.Table(spec["TableName"])
+                key = table._key_of(spec["Item"]) if kind == "Put" else spec["Key"]
+                try:
+                    table._check("TransactWriteItems", table._read(key), spec)
+                    reasons.append({"Code": "None"})
+                except ClientError:
+                    reasons.append(
+                        {
+                            "Code": "ConditionalCheckFailed",
+                            "Message": "The conditional request failed",
+                        }
+                    )
+                    failed = True
+            if failed:
+                raise _client_error(
+                    "TransactionCanceledException",
+                    "Transaction cancelled, please refer cancellation reasons "
+                    "for specific reasons",
+                    "TransactWriteItems",
+                    CancellationReasons=reasons
+                )
+
+            for operation in TransactItems:
+                kind, spec = next(iter(operation.items()))
+                table = emulator.Table(spec["TableName"])
+                if kind == "Put":
+                    table._write(spec["Item"])
+                elif kind == "Delete":
+                    table._remove(spec["Key"])
+                else:
+                    raise NotImplementedError(
+                        f"Transaction operation not supported by the emulator: {kind}"
+                    )
+        return {}
+
+
+    def batch_write_item(self, RequestItems: Dict[str, List[dict]], **kwargs) -> dict:
+        """
+        Throttling applies per request here: with throttle_rate set, that
+        fraction of requests comes back in UnprocessedItems, as DynamoDB
+        does under load, instead of failing the call.
+        """
+        emulator = self._emulator
+        emulator._before_call("BatchWriteItem", throttle=False)
+        if sum(len(requests) for requests in RequestItems.values()) > BATCH_WRITE_ITEMS:
+            raise _client_error(
+                "ValidationException",
+                f"Member must have length less than or equal to {BATCH_WRITE_ITEMS}",
+                "BatchWriteItem",
+            )
+
+        unprocessed: Dict[str, List[dict]] = {}
+        with emulator._lock:
+            for table_name, requests in RequestItems.items():
+                table = emulator.Table(table_name)
+                keys = [
+                    (
+                        table._key_of(request["PutRequest"]["Item"])
+                        if "PutRequest" in request
+                        else request["DeleteRequest"]["Key"]
+                    )
+                    for request in requests
+                ]
+                unique = {(key[table.hash_key], key[table.range_key]) for key in keys}
+                if len(unique) != len(keys):
+                    raise _client_error(
+                        "ValidationException",
+                        "Provided list of item keys contains duplicates",
+                        "BatchWriteItem",
+                    )
+
+                for request, key in zip(requests, keys):
+                    if (
+                        emulator.throttle_rate
+                        and emulator._random.random() < emulator.throttle_rate
+                    ):
+                        unprocessed.setdefault(table_name, []).append(request)
+                    elif "PutRequest" in request:
+                        table._write(request["PutRequest"]["Item"])
+                    else:
+                        table._remove(key)
+        return {"UnprocessedItems": unprocessed}
+
+    def batch_get_item(self, RequestItems: Dict[str, dict], **kwargs) -> dict:
+        """Throttled keys come back in UnprocessedKeys, like batch_write_item"""
+        emulator = self._emulator
+        emulator._before_call("BatchGetItem", throttle=False)
+        requested = sum(len(request["Keys"]) for request in RequestItems.values())
+        if requested > BATCH_GET_ITEMS:
+            raise _client_error(
+                "ValidationException",
+                f"Member must have length less than or equal to {BATCH_GET_ITEMS}",
+                "BatchGetItem",
+            )
+
+        responses: Dict[str, List[dict]] = {}
+        unprocessed: Dict[str, dict] = {}
+        for table_name, request in RequestItems.items():
+            table = emulator.Table(table_name)
+            found = responses.setdefault(table_name, [])
+            for key in request["Keys"]:
+                if (
+                    emulator.throttle_rate
+                    and emulator._random.random() < emulator.throttle_rate
+                ):
+                    pending = unprocessed.setdefault(
+                        table_name, {**request, "Keys": []}
+                    )
+                    pending["Keys"].append(key)
+                    continue
+                item = table._read(key)
+                if item is not None:
+                    projection = request.get("ProjectionExpression")
+                    names = request.get("ExpressionAttributeNames")
+                    found.append(_project(item, projection, names))
+        return {"Responses": responses, "UnprocessedKeys": unprocessed}
+
+
+_KEY_CONDITION = re.compile(r"^\(?\s*([#\w]+)\s*=\s*(:\w+)\s*(?:AND\s+(.+?))?\s*\)?$")
+_SORT_BETWEEN = re.compile(r"^([#\w]+)\s+BETWEEN\s+(:\w+)\s+AND\s+(:\w+)$")
+_SORT_BEGINS_WITH = re.compile(r"^begins_with\(\s*([#\w]+)\s*,\s*(:\w+)\s*\)$")
+_SORT_COMPARISON = re.compile(r"^([#\w]+)\s*(=|<=|>=|<|>)\s*(:\w+)$")
+
+
+class _LowLevelClient:
+    """
+    The plain (non-resource) client: string key conditions and wire-format
+    values in, wire-format items out. Only query is implemented.
+    """
+
+    def __init__(self, emulator: "InMemoryDynamoDB") -> None:
+        self._emulator = emulator
+
+    def query(
+        self,
+        TableName: str,
+        KeyConditionExpression: str,
+        ExpressionAttributeValues: dict,
+        ExpressionAttributeNames: Optional[dict] = None,
+        ScanIndexForward: bool = True,
+        Limit: Optional[int] = None,
+        ExclusiveStartKey: Optional[dict] = None,
+        ProjectionExpression: Optional[str] = None,
+        **kwargs,
+    ) -> dict:
+        self._emulator._before_call("Query")
+        table = self._emulator.Table(TableName)
+        names = ExpressionAttributeNames or {}
+        values = {
+            placeholder: _deserializer.deserialize(value)
+            for placeholder, value in ExpressionAttributeValues.items()
+        }
+
+        match = _KEY_CONDITION.match(KeyConditionExpression.strip())
+        if not match or names.get(match.group(1), match.group(1)) != table.hash_key:
+            raise _client_error(
+                "ValidationException",
+                f"Unsupported key condition: {KeyConditionExpression}",
+                "Query",
+            )
+        pk = values[match.group(2)]
+
+        sort_condition = None
+        sort_expression = match.group(3)
+        if sort_expression:
+            between = _SORT_BETWEEN.match(sort_expression)
+            begins_with = _SORT_BEGINS_WITH.match(sort_expression)
+            comparison = _SORT_COMPARISON.match(sort_expression)
+            if between:
+                sort_condition = Key(table.range_key).between(
+                    values[between.group(2)], values[between.group(3)]
+                )
+            elif begins_with:
+                sort_condition = Key(table.range_key).begins_with(
+                    values[begins_with.group(2)]
+                )
+            elif comparison:
+                operators = {"=": "eq", "<": "lt", "<=": "lte", ">": "gt", ">=": "gte"}
+                operator = operators[comparison.group(2)]
+                sort_condition = getattr(Key(table.range_key), operator)(
+                    values[comparison.group(3)]
+                )
+            else:
+                raise _client_error(
+                    "ValidationException",
+                    f"Unsupported sort key condition: {sort_expression}",
+                    "Query",
+                )
+
+        start_key = _deserialize(ExclusiveStartKey) if ExclusiveStartKey else None
+        response = table._query(
+            pk,
+            sort_condition,
+            ScanIndexForward,
+            Limit,
+            start_key,
+            projection=ProjectionExpression,
+            names=names,
+            decode=False,
+        )
+        if "LastEvaluatedKey" in response:
+            response["LastEvaluatedKey"] = _serialize(response["LastEvaluatedKey"])
+        return response
+
+
+class _Meta:
+    def __init__(self, client: _EmulatorClient) -> None:
+        self.client = client
+
+
+class InMemoryDynamoDB:
+    """
+    Drop-in for the boto3 DynamoDB resource.
+
+    latency_ms is added to every call (a number, or a callable returning
+    one, e.g. for jitter). throttle_rate is the fraction of calls that fail
+    with ProvisionedThroughputExceededException, as they would once the
+    SDK's retries are exhausted. seed makes both reproducible.
+    page_size caps items per query/scan page, standing in for the 1 MB limit.
+    """
+
+    def __init__(
+        self,
+        latency_ms: Union[float, Callable[[], float]] = 0,
+        throttle_rate: float = 0.0,
+        page_size: Optional[int] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.latency_ms = latency_ms
+        self.throttle_rate = throttle_rate
+        self.page_size = page_size
+        self.meta = _Meta(_EmulatorClient(self))
+        self.client = _LowLevelClient(self)
+        self.calls: Dict[str, int] = {}
+        self._random = random.Random(seed)
+        self._tables: Dict[str, InMemoryTable] = {}
+        self._lock = threading.RLock()
+
+    def Table(self, name: str) -> InMemoryTable:
+        table = self._tables.get(name)
+        if table is None:
+            with self._lock:
+                table = self._tables.setdefault(name, InMemoryTable(name, self))
+        return table
+
+    def _before_call(self, operation: str, throttle: bool = True) -> None:
+        with self._lock:
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+            throttled = (
+                throttle
+                and self.throttle_rate
+                and self._random.random() < self.throttle_rate
+            )
+        latency = self.latency_ms() if callable(self.latency_ms) else self.latency_ms
+        if latency:
+            time.sleep(latency / 1000)
+        if throttled:
+            raise _client_error(
+                "ProvisionedThroughputExceededException",
+                "The level of configured provisioned throughput for the table "
+                "was exceeded",
+                operation
+            )
+
+    def reset_calls(self) -> None:
+        with self._lock:
+            self.calls = {}
+
+    def reset(self) -> None:
+        """Empties every table and the call counts (between tests)"""
+        with self._lock:
+            for table in self._tables.values():
+                table._partitions.clear()
+            self.calls = {}
+
+
+def install_emulator(**options) -> InMemoryDynamoDB:
+    """
+    Creates an emulator and routes get_dynamodb_client() (resource and
+    client mode) to it. Must run before handler modules are imported, since they build
+    their repository at import time.
+    """
+    emulator = InMemoryDynamoDB(**options)
+    set_override("dynamodb", emulator)
+    set_override("dynamodb", emulator.client, kind="client")
+    return emulator
@@ -0,0 +1,142 @@
+import io
+import json
+import os
+import random
+import uuid
+
+import pytest
+from PIL import Image, ImageDraw
+
+import skin.analyze as analyze_module
+from utils.aws_clients import set_override
+
+BUCKET = os.environ["BUCKET_NAME"]
+
+FACE = {
+    "Confidence": 99,
+    "Quality": {"Brightness": 80, "Sharpness": 80},
+    "BoundingBox": {"Left": 0.25, "Top": 0.2, "Width": 0.5, "Height": 0.6},
+}
+
+
+class FakeRekognition:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.faces = [FACE]
+
+    def detect_faces(self, **kwargs):
+        self.calls += 1
+        return {"FaceDetails": self.faces}
+
+
+class FakeBedrock:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def invoke_model(self, **kwargs):
+        self.calls += 1
+        text = json.dumps({"summary": "Balanced", "metrics": {"radiance": 70}})
+        body = json.dumps({"content": [{"text": text}]}).encode()
+        return {"body": io.BytesIO(body)}
+
+
+@pytest.fixture
+def rekognition():
+    client = FakeRekognition()
+    set_override("rekognition", client, kind="client")
+    return client
+
+
+@pytest.fixture
+def bedrock():
+    client = FakeBedrock()
+    set_override("bedrock-runtime", client, kind="client")
+    return client
+
+
+def _selfie(brightness=1.0):
+    """A textured JPEG, so it passes the sharpness pre-screen"""
+    rng = random.Random(7)
+    background = tuple(int(value * brightness) for value in (200, 160, 140))
+    image = Image.new("RGB", (800, 600), background)
+    draw = ImageDraw.Draw(image)
+    for _ in range(1500):
+        x, y = rng.randrange(800), rng.randrange(600)
+        size = rng.randrange(2, 12)
+        colour = tuple(int(rng.randrange(80, 230) * brightness) for _ in range(3))
+        draw.ellipse((x, y, x + size, y + size), fill=colour)
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=90)
+    return output.getvalue()
+
+
+def _upload(s3, image_bytes):
+    key = f"selfies/{uuid.uuid4()}.jpg"
+    s3.put_object(Bucket=BUCKET, Key=key, Body=image_bytes)
+    s3.calls = []
+    return key
+
+
+def _analyze(s3_key, **fields):
+    body = {"s3Key": s3_key, "timeOfDay": "morning", **fields}
+    response = analyze_module.analyze(body)
+    return response["statusCode"], json.loads(response["body"])
+
+
+def test_analysis(s3, rekognition, bedrock):
+    s3_key = _upload(s3, _selfie())
+
+    status, body = _analyze(s3_key)
+
+    assert status == 200
+    assert body["summary"] == "Balanced"
+    assert body["s3ImageKey"] == s3_key
+    assert body["thumbnail_key"].startswith("thumbnails/")
+    assert (rekognition.calls, bedrock.calls) == (1, 1)
+
+
+def test_dark_upload_makes_no_rekognition_call(s3, rekognition, bedrock):
+    s3_key = _upload(s3, _selfie(brightness=0.12))
+
+    status, body = _analyze(s3_key)
+
+    assert status == 400
+    assert body["error"] == analyze_module.TOO_DARK_MESSAGE
+    assert (rekognition.calls, bedrock.calls) == (0, 0)
+
+
+def test_blurry_upload_makes_no_rekognition_call(s3, rekognition, bedrock):
+    flat = io.BytesIO()
+    Image.new("RGB", (800, 600), (200, 160, 140)).save(flat, format="JPEG")
+    s3_key = _upload(s3, flat.getvalue())
+
+    status, body = _analyze(s3_key)
+
+    assert status == 400
+    assert body["error"] == analyze_module.TOO_BLURRY_MESSAGE
+    assert rekognition.calls == 0
+
+
+def test_no_face(s3, rekognition, bedrock):
+    rekognition.faces = []
+    s3_key = _upload(s3, _selfie())
+
+    status, body = _analyze(s3_key)
+
+    assert status == 400
+    assert body["error"] == analyze_module.NO_FACE_MESSAGE
+    assert bedrock.calls == 0
+
+
+def test_table_hit_reads_no_image(s3, rekognition, bedrock):
+    photo = _selfie()
+    first = _analyze(_upload(s3, photo))[1]
+    s3_key = _upload(s3, photo)
+
+    status, body = _analyze(s3_key)
+
+    assert status == 200
+    assert body["s3ImageKey"] == s3_key
+    assert body["thumbnail_key"] == first["thumbnail_key"]
+    assert (rekognition.calls, bedrock.calls) == (1, 1)
+    assert s3.calls == [("HeadObject", s3_key)]
@@ -0,0 +1,220 @@
+import gzip
+import json
+from datetime import datetime
+
+import pytest
+
+from journal import handler as journal
+from skin import history as skin_history
+from utils import archive
+from utils.archive import archive_key, archive_user, get_archived, get_manifest
+from utils.dynamo_helper import JournalTableObject, SkinAnalysisTableObject
+from utils.sort_keys import to_api_date
+
+OLD_DATES = ["01-02-2023", "02-02-2023", "03-03-2024"]
+
+
+def _save(date, thoughts=None):
+    body = {
+        "user": "sophia",
+        "feeling": "happy",
+        "energy": 4,
+        "thoughts": thoughts or f"entry of {date}",
+        "tags": [],
+        "date": date,
+        "night": False,
+    }
+    response = journal.lambda_handler(
+        {"httpMethod": "POST", "body": json.dumps(body)}, None
+    )
+    assert response["statusCode"] == 200, response
+    return json.loads(response["body"])["date"]
+
+
+def _entries(**params):
+    response = journal.lambda_handler({
+        "httpMethod": "GET",
+        "queryStringParameters": {"user": "sophia", **params},
+    }, None)
+    assert response["statusCode"] == 200, response
+    return json.loads(response["body"])
+
+
+def _analyses(**params):
+    response = skin_history.lambda_handler({
+        "httpMethod": "GET",
+        "queryStringParameters": {"user": "sophia", **params},
+    }, None)
+    assert response["statusCode"] == 200, response
+    return json.loads(response["body"])
+
+
+def _hot_keys(table):
+    items = table.scan()["Items"]
+    return sorted(
+        item["date"]
+        for item in items
+        if item["user"] == "sophia" and item["date"].startswith("JOURNAL#")
+    )
+
+
+def _archived_rows(s3, year):
+    body = s3.objects[(archive.ARCHIVE_BUCKET, archive_key("sophia", "journal", year))]
+    return [json.loads(line) for line in gzip.decompress(body).splitlines()]
+
+
+@pytest.fixture
+def history():
+    old_sks = [_save(date) for date in OLD_DATES]
+    recent_sk = _save(to_api_date(datetime.now()), "today")
+    return old_sks, recent_sk
+
+
+def test_old_records_move_to_s3(history, table, s3):
+    old_sks, recent_sk = history
+
+    assert archive_user(journal.repository, "sophia") == {"journal": 3, "skin": 0}
+
+    assert _hot_keys(table) == [recent_sk]
+    assert [row["date"] for row in _archived_rows(s3, 2023)] == old_sks[:2]
+    assert [row["date"] for row in _archived_rows(s3, 2024)] == old_sks[2:]
+    manifest = get_manifest(journal.repository, "sophia")
+    assert manifest.years("journal") == [2023, 2024]
+    assert manifest.horizon > "2025-01-01"
+
+
+def test_archived_records_are_still_read(history):
+    old_sks, _ = history
+    archive_user(journal.repository, "sophia")
+
+    ranged = _entries(**{"from": "01-01-2023", "to": "31-12-2023"})
+    assert ranged["count"] == 2
+    assert ranged["next_cursor"] is None
+
+    journal_obj = get_archived(
+        journal.repository, "sophia", JournalTableObject, old_sks[0]
+    )
+    assert journal_obj.thoughts == "entry of 01-02-2023"
+
+    response = journal.lambda_handler({
+        "httpMethod": "GET",
+        "path": "/journal/search",
+        "queryStringParameters": {"user": "sophia", "q": "entry"},
+    }, None)
+    assert json.loads(response["body"])["total"] == 3
+
+
+def test_default_load_reads_no_archive(history, s3):
+    archive_user(journal.repository, "sophia")
+    s3.calls = []
+
+    body = _entries()
+
+    assert [entry["thoughts"] for entry in body["entries"]] == ["today"]
+    assert s3.calls == []
+    # Without a limit, each following page is one archived year
+    older = _entries(cursor=body["next_cursor"])
+    assert [entry["thoughts"] for entry in older["entries"]] == ["entry of 03-03-2024"]
+    assert s3.calls == [("GetObject", archive_key("sophia", "journal", 2024))]
+    oldest = _entries(cursor=older["next_cursor"])
+    assert oldest["count"] == 2
+    assert oldest["next_cursor"] is None
+
+
+def test_pages_run_from_table_into_archive(history):
+    archive_user(journal.repository, "sophia")
+
+    seen, params = [], {"limit": "1"}
+    while True:
+        body = _entries(**params)
+        seen += [entry["thoughts"] for entry in body["entries"]]
+        if not body["next_cursor"]:
+            break
+        params["cursor"] = body["next_cursor"]
+
+    assert seen == ["today", *(f"entry of {date}" for date in reversed(OLD_DATES))]
+
+
+def test_older_pages_read_only_the_years_they_need(history, s3):
+    archive_user(journal.repository, "sophia")
+    s3.calls = []
+
+    first = _entries(limit="2")
+
+    assert [entry["thoughts"] for entry in first["entries"]] == [
+        "today", "entry of 03-03-2024"
+    ]
+    assert s3.calls == [("GetObject", archive_key("sophia", "journal", 2024))]
+    s3.calls = []
+    second = _entries(limit="2", cursor=first["next_cursor"])
+    assert [entry["thoughts"] for entry in second["entries"]] == [
+        "entry of 02-02-2023", "entry of 01-02-2023"
+    ]
+    assert s3.calls == [("GetObject", archive_key("sophia", "journal", 2023))]
+    assert second["next_cursor"] is None
+
+
+def test_skin_history_pages_archived_analyses(s3):
+    for day in range(1, 8):
+        skin_history.repository.put(SkinAnalysisTableObject(
+            user="sophia",
+            created_at=datetime(2023, 3, day, 8),
+            attributes={"summary": f"day {day}", "thumbnail_key": f"thumbnails/{day}"}
+        ))
+    archive_user(skin_history.repository, "sophia")
+
+    seen, params, pages = [], {"limit": "3"}, 0
+    while True:
+        body = _analyses(**params)
+        assert len(body["analyses"]) <= 3
+        assert all(analysis["thumbnail_url"] for analysis in body["analyses"])
+        seen += [analysis["summary"] for analysis in body["analyses"]]
+        pages += 1
+        if not body["next_cursor"]:
+            break
+        params["cursor"] = body["next_cursor"]
+
+    assert seen == [f"day {day}" for day in range(7, 0, -1)]
+    assert pages == 3
+
+
+def test_second_run_merges_into_existing_objects(history, s3):
+    archive_user(journal.repository, "sophia")
+    late_sk = _save("15-06-2023", "imported late")
+
+    assert archive_user(journal.repository, "sophia")["journal"] == 1
+
+    assert [row["date"] for row in _archived_rows(s3, 2023)][-1] == late_sk
+    manifest = get_manifest(journal.repository, "sophia")
+    assert manifest.objects["journal"]["2023"]["count"] == 3
+
+
+def test_records_left_in_table_are_not_read_twice(history, table, monkeypatch):
+    old_sks, recent_sk = history
+    # The run stops after the copy and manifest, before the deletes
+    monkeypatch.setattr(
+        journal.repository, "batch_write", lambda requests: list(requests)
+    )
+
+    archive_user(journal.repository, "sophia")
+
+    assert _hot_keys(table) == sorted([*old_sks, recent_sk])
+    assert _entries(**{"from": "01-01-2023"})["count"] == 4
+    assert _entries(limit="10")["count"] == 4
+
+
+def test_dry_run_changes_nothing(history, table, s3):
+    old_sks, recent_sk = history
+
+    assert archive_user(journal.repository, "sophia", dry_run=True)["journal"] == 3
+
+    assert _hot_keys(table) == sorted([*old_sks, recent_sk])
+    assert s3.objects == {}
+    assert get_manifest(journal.repository, "sophia") is None
+
+
+def test_archiving_needs_a_bucket(history, monkeypatch):
+    monkeypatch.setattr(archive, "ARCHIVE_BUCKET", "")
+
+    with pytest.raises(ValueError):
+        archive_user(journal.repository, "sophia")
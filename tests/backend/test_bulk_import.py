@@ -0,0 +1,145 @@
+import base64
+import json
+
+from bulk_import.handler import MAX_IMPORT_ROWS, lambda_handler
+from journal import handler as journal
+from utils.user_stats import get_stats
+
+
+def _import(body, fmt=None, user="sophia", encode=False):
+    params = {"user": user}
+    if fmt:
+        params["format"] = fmt
+    event = {"httpMethod": "POST", "queryStringParameters": params, "body": body}
+    if encode:
+        event["body"] = base64.b64encode(body.encode()).decode()
+        event["isBase64Encoded"] = True
+    response = lambda_handler(event, None)
+    return response["statusCode"], json.loads(response["body"])
+
+
+def _ndjson(*records):
+    return "\n".join(json.dumps(record) for record in records)
+
+
+def _journal(date, thoughts, **fields):
+    return {
+        "type": "journal",
+        "date": date,
+        "feeling": "happy",
+        "energy": 3,
+        "thoughts": thoughts,
+        **fields,
+    }
+
+
+def _entries(user="sophia"):
+    response = journal.lambda_handler(
+        {"httpMethod": "GET", "queryStringParameters": {"user": user}}, None
+    )
+    return json.loads(response["body"])["entries"]
+
+
+def test_valid_rows_are_imported_despite_bad_ones():
+    status, body = _import(_ndjson(
+        _journal("01-02-2025", "a", time="08:00"),
+        {"type": "period", "date": "03-02-2025", "cycle_length": 28},
+        _journal("02-02-2025", "bad feeling", feeling="furious"),
+        {"type": "workout", "date": "02-02-2025"},
+        _journal("31-02-2025", "bad date"),
+    ) + "\n{not json")
+
+    assert status == 200
+    assert body["status"] == "partial"
+    assert body["imported"] == {"journal": 1, "period": 1}
+    assert [error["row"] for error in body["errors"]] == [3, 4, 5, 6]
+    assert "workout" in body["errors"][1]["error"]
+    assert [entry["thoughts"] for entry in _entries()] == ["a"]
+    assert get_stats(journal.repository, "sophia").journal_count == 1
+
+
+def test_duplicate_rows_are_reported():
+    status, body = _import(_ndjson(
+        _journal("01-02-2025", "first", time="08:00"),
+        _journal("01-02-2025", "second", time="08:00"),
+        {"type": "period", "date": "03-02-2025"},
+        {"type": "period", "date": "03-02-2025"},
+    ))
+
+    assert status == 200
+    assert body["errors"] == [
+        {"row": 2, "error": "Duplicate of row 1"},
+        {"row": 4, "error": "Duplicate of row 3"},
+    ]
+    assert [entry["thoughts"] for entry in _entries()] == ["first"]
+
+
+def test_untimed_entries_get_distinct_times():
+    status, body = _import(_ndjson(
+        _journal("01-02-2025", "a"),
+        _journal("01-02-2025", "b"),
+        _journal("01-02-2025", "c", time="08:00:01"),
+        _journal("01-02-2025", "d", night=True),
+    ))
+
+    assert status == 200
+    assert body["status"] == "success"
+    assert body["imported"]["journal"] == 4
+    assert len({entry["timestamp"] for entry in _entries()}) == 4
+
+
+def test_timed_row_overwrites_existing_entry():
+    _import(_ndjson(_journal("01-02-2025", "old", time="08:00")))
+
+    status, body = _import(_ndjson(
+        _journal("01-02-2025", "new", time="08:00"),
+        _journal("01-02-2025", "untimed"),
+    ))
+
+    assert status == 200
+    assert body["overwritten"] == [1]
+    assert sorted(entry["thoughts"] for entry in _entries()) == ["new", "untimed"]
+
+
+def test_csv_import():
+    csv_body = (
+        "type,date,feeling,energy,thoughts,tags,night,cycle_length\n"
+        "journal,01-02-2025,happy,4,Good day,work;friends,false,\n"
+        "period,03-02-2025,,,,,,29\n"
+        "journal,02-02-2025,happy,not a number,x,,false,\n"
+    )
+
+    status, body = _import(csv_body, fmt="csv", encode=True)
+
+    assert status == 200
+    assert body["imported"] == {"journal": 1, "period": 1}
+    assert [error["row"] for error in body["errors"]] == [4]
+    assert _entries()[0]["tags"] == ["work", "friends"]
+
+
+def test_too_many_rows_is_refused():
+    rows = [_journal("01-02-2025", str(row)) for row in range(MAX_IMPORT_ROWS + 1)]
+
+    status, body = _import(_ndjson(*rows))
+
+    assert status != 200
+    assert "Too many rows" in body["error"]
+    assert _entries() == []
+
+
+def test_values_of_the_wrong_type_are_row_errors():
+    status, body = _import(_ndjson(
+        _journal("01-02-2025", "a", time=830),
+        _journal("02-02-2025", "b", time=None),
+        _journal("03-02-2025", ["not", "text"]),
+        _journal("04-02-2025", "c", tags=["work", 3]),
+        _journal("05-02-2025", "d", energy=True),
+        _journal(20250206, "e"),
+        _journal("07-02-2025", "f", feeling=None),
+        _journal("08-02-2025", "g", energy=4.0),
+    ))
+
+    assert status == 200
+    assert body["imported"] == {"journal": 2, "period": 0}
+    assert [error["row"] for error in body["errors"]] == [1, 3, 4, 5, 6, 7]
+    assert "Expected a string" in body["errors"][0]["error"]
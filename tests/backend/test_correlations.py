@@ -0,0 +1,68 @@
+import json
+from datetime import datetime, timedelta
+
+from journal import handler as journal
+from skin.history import store_analysis
+from utils.correlations import get_correlations
+from utils.dynamo_helper import CorrelationsTableObject
+from utils.sort_keys import to_api_date
+from utils.user_stats import get_stats
+from wellness.handler import get_user_context
+
+
+def _save(day, energy):
+    body = {
+        "user": "sophia",
+        "feeling": "happy" if energy > 2 else "sad",
+        "energy": energy,
+        "thoughts": "",
+        "tags": [],
+        "date": to_api_date(day),
+        "night": False,
+    }
+    response = journal.lambda_handler(
+        {"httpMethod": "POST", "body": json.dumps(body)}, None
+    )
+    assert response["statusCode"] == 200, response
+
+
+def _history(days=10):
+    today = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0)
+    for offset in range(days):
+        day = today - timedelta(days=offset + 1)
+        energy = offset % 5 + 1
+        _save(day, energy)
+        store_analysis(
+            "sophia",
+            {"summary": "", "metrics": {"radiance": 40 + 10 * energy}},
+            created_at=day
+        )
+
+
+def _record():
+    return journal.repository.get(CorrelationsTableObject, "sophia")
+
+
+def test_summary_is_stored_when_read():
+    _history()
+
+    summary = get_correlations(journal.repository, "sophia")
+
+    record = _record()
+    assert record.summary and not record.summary_stale
+    assert record.stats_version == get_stats(journal.repository, "sophia").version
+    assert get_correlations(journal.repository, "sophia") == summary
+
+
+def test_wellness_context_recomputes_a_stale_summary():
+    _history()
+    get_correlations(journal.repository, "sophia")
+    _save(datetime.now(), 5)
+    assert _record().summary_stale
+
+    get_user_context("sophia")
+
+    # Recomputed before the call returned, not after the response
+    record = _record()
+    assert not record.summary_stale
+    assert record.stats_version == get_stats(journal.repository, "sophia").version
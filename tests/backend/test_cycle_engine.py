@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta
+
+from utils.cycle_engine import (
+    DEFAULT_CYCLE_LENGTH,
+    CycleStats,
+    compute_cycle_stats,
+    project_calendar,
+)
+
+
+def _starts(first, lengths):
+    """Period start dates, each the given number of days after the previous one"""
+    dates = [first]
+    for length in lengths:
+        dates.append(dates[-1] + timedelta(days=length))
+    return dates
+
+
+def test_no_history():
+    stats = compute_cycle_stats([])
+
+    assert stats.period_count == 0
+    assert stats.predicted_length == DEFAULT_CYCLE_LENGTH
+    assert stats.confidence == "none"
+
+
+def test_reported_length_is_used_until_a_cycle_is_logged():
+    assert compute_cycle_stats([datetime(2025, 1, 1)], 32).predicted_length == 32
+    # Outside the range a user could plausibly report
+    assert compute_cycle_stats([datetime(2025, 1, 1)], 60).predicted_length == 28
+
+
+def test_regular_cycles():
+    stats = compute_cycle_stats(_starts(datetime(2025, 1, 1), [29] * 6))
+
+    assert stats.cycle_count == 6
+    assert stats.outlier_count == 0
+    assert stats.predicted_length == 29
+    assert stats.std_dev == 0
+    assert stats.confidence == "high"
+    assert stats.last_period == "2025-06-24"
+
+
+def test_missed_log_is_rejected_as_an_outlier():
+    # A forgotten period shows up as one double-length cycle
+    stats = compute_cycle_stats(_starts(datetime(2025, 1, 1), [28, 29, 57, 28, 30]))
+
+    assert stats.cycle_count == 4
+    assert stats.outlier_count == 1
+    assert stats.max_length == 30
+    assert stats.predicted_length == 28
+
+
+def test_implausible_gaps_and_duplicates_are_ignored():
+    dates = [
+        datetime(2025, 1, 1, 9, 30),
+        datetime(2025, 1, 1),
+        datetime(2025, 1, 4),
+        datetime(2025, 1, 29),
+    ]
+
+    stats = compute_cycle_stats(dates)
+
+    assert stats.period_count == 3
+    assert stats.cycle_count == 1
+    assert stats.predicted_length == 25
+
+
+def test_from_dict_ignores_unknown_fields():
+    stats = compute_cycle_stats(_starts(datetime(2025, 1, 1), [28, 30]))
+
+    restored = CycleStats.from_dict({**stats.to_dict(), "retired_field": 1})
+
+    assert restored == stats
+
+
+def test_predict_projects_past_an_unlogged_period():
+    stats = CycleStats(last_period="2025-01-01", predicted_length=28)
+
+    prediction = stats.predict(today=datetime(2025, 2, 3))
+
+    assert prediction["cycle_day"] == 6
+    assert prediction["next_period"] == "2025-02-26"
+
+
+def test_calendar_before_first_period_is_unknown():
+    starts = [datetime(2025, 1, 10)]
+    stats = compute_cycle_stats(starts)
+
+    days = project_calendar(starts, stats, datetime(2025, 1, 8), datetime(2025, 1, 11))
+
+    assert [day["cycle_phase"] for day in days[:2]] == ["unknown", "unknown"]
+    assert [day["cycle_day"] for day in days] == [0, 0, 1, 2]
+    assert days[2]["period"] and not days[2]["predicted_period"]
+
+
+def test_calendar_follows_logged_cycles():
+    starts = _starts(datetime(2025, 1, 1), [26, 31])
+    stats = compute_cycle_stats(starts)
+
+    days = project_calendar(starts, stats, starts[0], starts[-1])
+    by_date = {day["date"]: day for day in days}
+
+    assert len(days) == 26 + 31 + 1
+    assert by_date["2025-01-26"]["cycle_day"] == 26
+    assert by_date["2025-01-27"]["cycle_day"] == 1
+    assert by_date["2025-01-27"]["period"]
+    assert sum(day["ovulation"] for day in days) == 2
+    assert not any(day["predicted_period"] for day in days)
+
+
+def test_calendar_projects_across_a_missed_log():
+    starts = _starts(datetime(2025, 1, 1), [28, 28, 28, 56])
+    stats = compute_cycle_stats(starts)
+
+    days = project_calendar(starts, stats, starts[3], starts[4])
+    by_date = {day["date"]: day for day in days}
+    missed = (starts[3] + timedelta(days=28)).strftime("%Y-%m-%d")
+
+    assert stats.outlier_count == 1
+    assert by_date[missed]["cycle_day"] == 1
+    assert by_date[missed]["predicted_period"]
+    assert not by_date[missed]["period"]
+    assert days[-1]["period"]
+
+
+def test_calendar_projects_after_the_last_period():
+    starts = _starts(datetime(2025, 1, 1), [30, 30])
+    stats = compute_cycle_stats(starts)
+    end = starts[-1] + timedelta(days=65)
+
+    days = project_calendar(starts, stats, starts[-1], end)
+    predicted = [day["date"] for day in days if day["predicted_period"]]
+
+    assert predicted[0] == (starts[-1] + timedelta(days=30)).strftime("%Y-%m-%d")
+    assert len(predicted) == 2 * 5
@@ -0,0 +1,79 @@
+import json
+from datetime import datetime, timedelta
+
+from journal import handler as journal
+from journal.types import DayPeriod, FeelingType
+from utils.dynamo_helper import JournalTableObject
+from utils.insights import (
+    MAX_TAG_LENGTH,
+    MAX_TAGS,
+    build_insights,
+    summarize,
+)
+from utils.sort_keys import to_api_date
+from utils.user_stats import get_insights
+
+
+def _entry(day, tags):
+    return JournalTableObject(
+        user="sophia",
+        feeling=FeelingType.happy,
+        energy=3,
+        thoughts="",
+        tags=tags,
+        date=datetime(2025, 1, 1, 8) + timedelta(days=day),
+        time=DayPeriod.day
+    )
+
+
+def _tags_in(insights):
+    maps = [insights["tags"], insights["tag_feeling"], insights["tag_phase"]]
+    maps += [
+        feeling_tags
+        for feelings in insights["phase_feeling_tag"].values()
+        for feeling_tags in feelings.values()
+    ]
+    return set().union(*maps)
+
+
+def test_tags_are_capped():
+    # A steady tag, plus a new one-off tag on every entry
+    entries = [_entry(day, ["work", f"one-off {day}"]) for day in range(300)]
+
+    insights = build_insights(entries, [])
+
+    assert len(insights["tags"]) == MAX_TAGS
+    assert insights["tags"]["work"] == 300
+    assert _tags_in(insights) == set(insights["tags"])
+    # The newest tag is tracked, having replaced a less used one
+    assert "one-off 299" in insights["tags"]
+    assert summarize(insights)["top_tags"][0] == {"name": "work", "count": 300}
+
+
+def test_long_tags_are_cut():
+    insights = build_insights([_entry(0, ["x" * 500])], [])
+
+    assert list(insights["tags"]) == ["x" * MAX_TAG_LENGTH]
+
+
+def test_stats_item_stays_bounded():
+    for day in range(MAX_TAGS + 20):
+        body = {
+            "user": "sophia",
+            "feeling": "happy",
+            "energy": 3,
+            "thoughts": "",
+            "tags": ["work", f"tag {day}" + "x" * 100],
+            "date": to_api_date(datetime(2025, 1, 1) + timedelta(days=day)),
+            "night": False,
+        }
+        response = journal.lambda_handler(
+            {"httpMethod": "POST", "body": json.dumps(body)}, None
+        )
+        assert response["statusCode"] == 200, response
+
+    insights = get_insights(journal.repository, "sophia")
+
+    assert len(insights["tags"]) == MAX_TAGS
+    assert insights["tags"]["work"] == MAX_TAGS + 20
+    assert _tags_in(insights) == set(insights["tags"])
@@ -0,0 +1,110 @@
+import json
+
+import pytest
+
+from journal import handler as journal
+from utils.pagination import (
+    MAX_PAGE_SIZE,
+    decode_cursor,
+    encode_cursor,
+    parse_limit,
+)
+
+DATES = ["01-02-2025", "02-02-2025", "03-02-2025", "04-02-2025", "05-02-2025"]
+
+
+def _save(user, date):
+    body = {
+        "user": user,
+        "feeling": "happy",
+        "energy": 4,
+        "thoughts": date,
+        "tags": [],
+        "date": date,
+        "night": False,
+    }
+    response = journal.lambda_handler(
+        {"httpMethod": "POST", "body": json.dumps(body)}, None
+    )
+    assert response["statusCode"] == 200, response
+
+
+def _get(params):
+    response = journal.lambda_handler(
+        {"httpMethod": "GET", "queryStringParameters": params}, None
+    )
+    return response["statusCode"], json.loads(response["body"])
+
+
+def test_cursor_round_trip():
+    last_key = {"user": "sophia", "date": "JOURNAL#2025-02-12T08:30:00#morning"}
+    cursor = encode_cursor(last_key)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor, "sophia") == last_key
+    assert encode_cursor(None) is None
+    assert decode_cursor(None, "sophia") is None
+
+
+@pytest.mark.parametrize("cursor", [
+    encode_cursor({"user": "mia", "date": "JOURNAL#2025-02-12T08:30:00#morning"}),
+    encode_cursor({"user": "sophia"}),
+    "not a cursor!",
+    "bm90IGpzb24",
+])
+def test_decode_cursor_rejects_foreign_or_malformed(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor, "sophia")
+
+
+def test_parse_limit():
+    assert parse_limit({}) is None
+    assert parse_limit({"limit": "5"}) == 5
+    assert parse_limit({"limit": "100000"}) == MAX_PAGE_SIZE
+    for limit in ("0", "-1", "ten"):
+        with pytest.raises(ValueError):
+            parse_limit({"limit": limit})
+
+
+@pytest.mark.parametrize("limit", [1, 2, 5, 10])
+def test_pages_cover_history_once(limit):
+    for date in DATES:
+        _save("sophia", date)
+
+    seen = []
+    params = {"user": "sophia", "limit": str(limit)}
+    while True:
+        status, body = _get(params)
+        assert status == 200
+        assert len(body["entries"]) <= limit
+        seen += [entry["thoughts"] for entry in body["entries"]]
+        if not body["next_cursor"]:
+            break
+        params["cursor"] = body["next_cursor"]
+
+    assert seen == list(reversed(DATES))
+
+
+def test_without_limit_everything_is_one_page():
+    for date in DATES:
+        _save("sophia", date)
+
+    status, body = _get({"user": "sophia"})
+
+    assert status == 200
+    assert body["count"] == len(DATES)
+    assert body["next_cursor"] is None
+
+
+def test_cursor_of_another_user_is_refused():
+    for date in DATES:
+        _save("sophia", date)
+        _save("mia", date)
+    _, body = _get({"user": "mia", "limit": "2"})
+
+    status, body = _get(
+        {"user": "sophia", "limit": "2", "cursor": body["next_cursor"]}
+    )
+
+    assert status != 200
+    assert "Invalid cursor" in body["error"]
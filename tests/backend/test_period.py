@@ -0,0 +1,90 @@
+import json
+from datetime import datetime, timedelta
+
+from period import handler as period
+from utils.sort_keys import to_api_date
+from utils.user_stats import get_stats
+
+FIRST_PERIOD = datetime(2025, 1, 1)
+
+
+def _call(method, path="/period", body=None, headers=None, **params):
+    event = {
+        "httpMethod": method,
+        "path": path,
+        "queryStringParameters": {"user": "sophia", **params},
+        "headers": headers or {},
+    }
+    if body is not None:
+        event["body"] = json.dumps({"user": "sophia", **body})
+    response = period.lambda_handler(event, None)
+    assert response["statusCode"] in (200, 304), response
+    return response
+
+
+def _save(day):
+    _call("POST", body={"period_date": to_api_date(day)})
+
+
+def _cycle():
+    return json.loads(_call("GET")["body"])["cycle"]
+
+
+def _history(length=29, count=5):
+    for cycle in range(count):
+        _save(FIRST_PERIOD + timedelta(days=cycle * length))
+
+
+def _cached_cycle():
+    return get_stats(period.repository, "sophia").cycle
+
+
+def test_prediction_uses_the_whole_history():
+    _history()
+
+    cycle = _cycle()
+
+    assert cycle["cycle_length"] == 29
+    assert cycle["cycle_count"] == 4
+    assert cycle["last_period"] == "2025-04-27"
+
+
+def test_statistics_are_cached_until_the_periods_change(emulator):
+    _history()
+    _cycle()
+    assert _cached_cycle()["predicted_length"] == 29
+
+    emulator.reset_calls()
+    period.get_cycle_stats(
+        period.repository, "sophia", get_stats(period.repository, "sophia")
+    )
+    # Served from STATS, without reading the periods
+    assert "Query" not in emulator.calls
+
+    _save(FIRST_PERIOD + timedelta(days=5 * 29 + 31))
+    assert _cached_cycle() == {}
+    assert _cycle()["last_period"] == "2025-06-26"
+
+    _call("DELETE", body={"period_date": "26-06-2025"})
+    assert _cached_cycle() == {}
+    assert _cycle()["last_period"] == "2025-04-27"
+
+
+def test_calendar_is_not_modified_until_a_period_changes():
+    _history()
+    params = {"from": "01-05-2025", "to": "31-05-2025"}
+    first = _call("GET", path="/period/calendar", **params)
+    etag = first["headers"]["ETag"]
+    assert len(json.loads(first["body"])["days"]) == 31
+
+    again = _call(
+        "GET", path="/period/calendar", headers={"If-None-Match": etag}, **params
+    )
+    assert again["statusCode"] == 304
+
+    _save(datetime(2025, 5, 20))
+    changed = _call(
+        "GET", path="/period/calendar", headers={"If-None-Match": etag}, **params
+    )
+    assert changed["statusCode"] == 200
+    assert changed["headers"]["ETag"] != etag
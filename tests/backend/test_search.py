@@ -0,0 +1,196 @@
+import json
+from datetime import datetime
+
+import pytest
+from boto3.dynamodb.conditions import Attr
+
+from bulk_import import handler as bulk_import
+from journal import handler as journal
+from journal.types import DayPeriod, FeelingType
+from migrations.search_index import run as backfill_index
+from utils.dynamo_helper import JournalTableObject
+from utils.search_index import (
+    entry_positions,
+    is_indexed,
+    matches,
+    parse_query,
+    search,
+)
+
+THOUGHTS = {
+    "01-03-2025": "Slept well after yoga",
+    "02-03-2025": "Well, I slept badly",
+    "03-03-2025": "Long run, slept well again",
+    "04-03-2025": "Nothing to report",
+}
+
+
+def _save(user, date, thoughts, tags=()):
+    body = {
+        "user": user,
+        "feeling": "okay",
+        "energy": 3,
+        "thoughts": thoughts,
+        "tags": list(tags),
+        "date": date,
+        "night": False,
+    }
+    response = journal.lambda_handler(
+        {"httpMethod": "POST", "body": json.dumps(body)}, None
+    )
+    assert response["statusCode"] == 200, response
+
+
+def _search(user, query, **params):
+    response = journal.lambda_handler({
+        "httpMethod": "GET",
+        "path": "/journal/search",
+        "queryStringParameters": {"user": user, "q": query, **params},
+    }, None)
+    assert response["statusCode"] == 200, response
+    return json.loads(response["body"])
+
+
+def _unindexed_history(user):
+    """Entries written straight to the table, as before the index existed"""
+    for day, thoughts in enumerate(THOUGHTS.values(), start=1):
+        journal.repository.put(JournalTableObject(
+            user=user,
+            feeling=FeelingType.okay,
+            energy=3,
+            thoughts=thoughts,
+            tags=[],
+            date=datetime(2025, 3, day, 8),
+            time=DayPeriod.day
+        ))
+
+
+def test_parse_query():
+    assert parse_query('Slept "really WELL" yoga') == [
+        ["slept"], ["really", "well"], ["yoga"]
+    ]
+    assert parse_query('"" ,') == []
+
+
+def test_phrase_must_be_consecutive():
+    phrases = parse_query('"slept well"')
+
+    assert matches(phrases, entry_positions("I slept well", []))
+    assert not matches(phrases, entry_positions("Well, I slept badly", []))
+    # A phrase never runs from the thoughts into the tags
+    assert not matches(phrases, entry_positions("I slept", ["well"]))
+
+
+def test_words_and_phrases_through_the_index():
+    for date, thoughts in THOUGHTS.items():
+        _save("sophia", date, thoughts, tags=["sleep"])
+
+    assert _search("sophia", "slept well")["total"] == 3
+    phrase = _search("sophia", '"slept well"')
+    assert [entry["thoughts"] for entry in phrase["entries"]] == [
+        "Long run, slept well again",
+        "Slept well after yoga",
+    ]
+    assert _search("sophia", '"slept well" yoga')["total"] == 1
+    assert _search("sophia", "sleep report")["total"] == 1
+    assert _search("sophia", "swimming")["entries"] == []
+
+
+def test_results_page_with_cursor():
+    for date, thoughts in THOUGHTS.items():
+        _save("sophia", date, thoughts)
+
+    first = _search("sophia", "slept", limit="2")
+    second = _search("sophia", "slept", limit="2", cursor=first["next_cursor"])
+
+    assert first["total"] == 3
+    assert len(first["entries"]) == 2
+    assert [entry["thoughts"] for entry in second["entries"]] == [
+        "Slept well after yoga"
+    ]
+    assert second["next_cursor"] is None
+
+
+def test_overwritten_entry_no_longer_matches():
+    _save("sophia", "01-03-2025", "Slept well after yoga")
+    item = journal.repository.table.scan(
+        FilterExpression=Attr("date").begins_with("JOURNAL#")
+    )["Items"][0]
+
+    # Same sort key, new text; the postings for "yoga" stay behind
+    journal.repository.table.put_item(Item={**item, "thoughts": "Rest day"})
+
+    body = _search("sophia", "yoga")
+    assert body["entries"] == []
+
+
+def test_unindexed_user_is_searched_by_scan(emulator):
+    _unindexed_history("mia")
+    assert not is_indexed(journal.repository, "mia")
+    emulator.reset_calls()
+
+    assert _search("mia", '"slept well"')["total"] == 2
+    # Matches come straight from the history read
+    assert "BatchGetItem" not in emulator.calls
+
+
+def test_backfill_switches_to_the_index(emulator):
+    _unindexed_history("mia")
+
+    assert backfill_index(["mia"])["entries"] == len(THOUGHTS)
+    assert is_indexed(journal.repository, "mia")
+    emulator.reset_calls()
+
+    assert _search("mia", '"slept well"')["total"] == 2
+    # Only the matching entries are read
+    assert emulator.calls["BatchGetItem"] == 1
+
+
+def test_query_limits():
+    with pytest.raises(ValueError):
+        search(journal.repository, "sophia", '" "')
+    with pytest.raises(ValueError):
+        search(journal.repository, "sophia", "a b c d e f g h i")
+
+
+def _import(user, *records):
+    body = "\n".join(json.dumps(record) for record in records)
+    response = bulk_import.lambda_handler({
+        "httpMethod": "POST",
+        "queryStringParameters": {"user": user},
+        "body": body,
+    }, None)
+    assert response["statusCode"] == 200, response
+
+
+def _imported_thoughts(user):
+    _import(user, *(
+        {
+            "type": "journal",
+            "date": date,
+            "feeling": "okay",
+            "energy": 3,
+            "thoughts": thoughts,
+        }
+        for date, thoughts in THOUGHTS.items()
+    ))
+
+
+def test_import_of_a_new_history_uses_the_index(emulator):
+    _imported_thoughts("mia")
+
+    assert is_indexed(journal.repository, "mia")
+    emulator.reset_calls()
+    assert _search("mia", '"slept well"')["total"] == 2
+    assert emulator.calls["BatchGetItem"] == 1
+
+
+def test_import_onto_unindexed_entries_keeps_scanning(emulator):
+    _unindexed_history("mia")
+    _imported_thoughts("mia")
+
+    assert not is_indexed(journal.repository, "mia")
+    emulator.reset_calls()
+    # Two entries per matching day: the old ones and the imported ones
+    assert _search("mia", '"slept well"')["total"] == 4
+    assert "BatchGetItem" not in emulator.calls
@@ -0,0 +1,99 @@
+from migrations.sort_keys import CHECKPOINT_USER, migrate_item, run
+from utils.sort_keys import SORT_KEY_VERSION, SORT_KEY_VERSION_ATTRIBUTE, upgrade_sk
+
+LEGACY_ITEMS = [
+    {"user": "sophia", "date": "12-02-2025-08-30-00#morning", "thoughts": "v1 timed"},
+    {"user": "sophia", "date": "13-02-2025#evening", "thoughts": "v1 untimed"},
+    {"user": "sophia", "date": "2025-02-14T09:00:00#morning", "thoughts": "v2"},
+    {"user": "sophia", "date": "PERIOD#03-02-2025", "cycle_length": 28},
+    {"user": "mia", "date": "SKIN#01-03-2025#07-15-00", "summary": "Balanced"},
+]
+
+
+def _sort_keys(table, user):
+    return [item["date"] for item in table.scan()["Items"] if item["user"] == user]
+
+
+def test_upgrade_sk():
+    assert upgrade_sk("12-02-2025-08-30-00#morning") == (
+        "JOURNAL#2025-02-12T08:30:00#morning"
+    )
+    assert upgrade_sk("13-02-2025#evening") == "JOURNAL#2025-02-13T00:00:00#evening"
+    assert upgrade_sk("PERIOD#03-02-2025") == "PERIOD#2025-02-03"
+    assert upgrade_sk("SKIN#01-03-2025#07-15-00") == "SKIN#2025-03-01T07:15:00"
+    assert upgrade_sk("JOURNAL#2025-02-12T08:30:00#morning") is None
+    assert upgrade_sk("STATS") is None
+
+
+def test_run_moves_every_legacy_item(table):
+    for item in LEGACY_ITEMS:
+        table.put_item(Item=item)
+
+    assert run(table.name, page_size=2) == len(LEGACY_ITEMS)
+
+    assert sorted(_sort_keys(table, "sophia")) == [
+        "JOURNAL#2025-02-12T08:30:00#morning",
+        "JOURNAL#2025-02-13T00:00:00#evening",
+        "JOURNAL#2025-02-14T09:00:00#morning",
+        "PERIOD#2025-02-03",
+    ]
+    assert _sort_keys(table, "mia") == ["SKIN#2025-03-01T07:15:00"]
+    for item in table.scan()["Items"]:
+        if item["user"] != CHECKPOINT_USER:
+            assert item[SORT_KEY_VERSION_ATTRIBUTE] == SORT_KEY_VERSION
+    moved = table.get_item(
+        Key={"user": "sophia", "date": "JOURNAL#2025-02-13T00:00:00#evening"}
+    )
+    assert moved["Item"]["thoughts"] == "v1 untimed"
+
+
+def test_run_resumes_from_checkpoint(table, emulator):
+    for item in LEGACY_ITEMS:
+        table.put_item(Item=item)
+    run(table.name)
+    emulator.reset_calls()
+
+    # The finished segment is not scanned again
+    assert run(table.name) == len(LEGACY_ITEMS)
+    assert "Scan" not in emulator.calls
+
+
+def test_migrate_item_drops_old_copy_when_new_key_exists(table):
+    old = {"user": "sophia", "date": "PERIOD#03-02-2025", "cycle_length": 28}
+    new = {
+        "user": "sophia",
+        "date": "PERIOD#2025-02-03",
+        "cycle_length": 30,
+        SORT_KEY_VERSION_ATTRIBUTE: SORT_KEY_VERSION,
+    }
+    table.put_item(Item=old)
+    table.put_item(Item=new)
+
+    assert migrate_item(table, old)
+
+    assert _sort_keys(table, "sophia") == ["PERIOD#2025-02-03"]
+    assert table.get_item(Key={"user": "sophia", "date": "PERIOD#2025-02-03"})[
+        "Item"
+    ]["cycle_length"] == 30
+
+
+def test_migrate_item_skips_item_deleted_meanwhile(table):
+    old = {"user": "sophia", "date": "PERIOD#03-02-2025", "cycle_length": 28}
+
+    assert not migrate_item(table, old)
+    assert _sort_keys(table, "sophia") == []
+
+
+def test_migrate_item_dry_run_writes_nothing(table):
+    old = {"user": "sophia", "date": "PERIOD#03-02-2025", "cycle_length": 28}
+    table.put_item(Item=old)
+
+    assert migrate_item(table, old, dry_run=True)
+    assert _sort_keys(table, "sophia") == ["PERIOD#03-02-2025"]
+
+
+def test_checkpoint_user_is_never_migrated(table):
+    table.put_item(Item={"user": CHECKPOINT_USER, "date": "13-02-2025#evening"})
+
+    assert run(table.name) == 0
+    assert _sort_keys(table, CHECKPOINT_USER)[0] == "13-02-2025#evening"